@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Find byte-identical files across assets and optionally deduplicate them.
+
+Every asset file (and rendition) is digested through the checksum pass,
+with the digest cache answering unchanged files from a stat, and indexed
+by SHA-256. Groups stored more than once are reported; with --link the
+redundant copies are replaced by hardlinks or reflinks of one file.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+import click
+import humanize
+
+from ual.cache import DigestCache
+from ual.catalog import discover_metadata_files
+from ual.checksums import ChecksumGenerator
+from ual.dedup import LINK_MODES, DuplicateIndex, link_duplicates
+from ual.instrumentation import instrument_command
+from ual.renditions import RENDITIONS_DIR
+
+
+@click.command()
+@click.option('--path', default='assets', show_default=True, help='Path to assets directory')
+@click.option('--link', type=click.Choice(LINK_MODES), default=None,
+              help='Replace redundant copies with hardlinks or reflinks of one file')
+@click.option('--dry-run', is_flag=True, help='With --link, only show what would be linked')
+@click.option('--report', default=None, help='Also write the duplicate groups to this JSON file')
+@click.option('--jobs', default=1, show_default=True,
+              help='Number of files to hash concurrently (0 = one per CPU)')
+@click.option('--cache-dir', default=None,
+              help='Digest cache directory (default: $UAL_CACHE_DIR or .cache/ual)')
+@click.option('--no-cache', is_flag=True, help='Do not use the persistent digest cache')
+@instrument_command
+def main(path: str, link: Optional[str], dry_run: bool, report: Optional[str], jobs: int,
+         cache_dir: Optional[str], no_cache: bool):
+    """Report (and optionally link) byte-identical files across assets."""
+    root = Path(path)
+
+    if not root.is_dir():
+        click.echo(f"Error: Assets directory does not exist: {path}", err=True)
+        sys.exit(1)
+
+    digest_cache = None
+    if not no_cache:
+        digest_cache = DigestCache(Path(cache_dir) / 'digests.sqlite' if cache_dir else None)
+
+    asset_dirs = [Path(p).parent for p in discover_metadata_files(root)]
+    directories = asset_dirs + [d / RENDITIONS_DIR for d in asset_dirs
+                                if (d / RENDITIONS_DIR).is_dir()]
+    click.echo(f"Indexing files of {len(asset_dirs)} assets...")
+
+    index = DuplicateIndex()
+    generator = ChecksumGenerator(jobs=jobs, digest_cache=digest_cache)
+    try:
+        for directory, checksums in generator.generate_for_directories(directories):
+            if directory.name == RENDITIONS_DIR and directory.parent in asset_dirs:
+                asset = os.path.relpath(directory.parent, root)
+                checksums = {f"{RENDITIONS_DIR}/{name}": entry for name, entry in checksums.items()}
+            else:
+                asset = os.path.relpath(directory, root)
+            index.add_checksums(asset, checksums)
+    finally:
+        if digest_cache is not None:
+            digest_cache.close()
+
+    summary = index.report()
+    for group in summary['groups']:
+        click.echo(f"\n{group['copies']} copies of {humanize.naturalsize(group['size'])} "
+                   f"({group['sha256'][:12]}):")
+        for location in group['locations']:
+            click.echo(f"  {location}")
+
+    if report:
+        with open(report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+    click.echo("\n" + "="*50)
+    click.echo("Duplicate Summary:")
+    click.echo(f"  Duplicate groups: {summary['total_groups']}")
+    click.echo(f"  Redundant files: {summary['redundant_files']}")
+    click.echo(f"  Redundant size: {humanize.naturalsize(summary['redundant_bytes'])}")
+    click.echo("="*50)
+
+    if link is None:
+        return
+
+    result = link_duplicates(root, summary['groups'], mode=link, dry_run=dry_run)
+    for error in result['errors']:
+        click.echo(f"❌ {error}", err=True)
+
+    action = "Would link" if dry_run else "Linked"
+    click.echo(f"✓ {action} {result['linked']} files ({link}), "
+               f"saving {humanize.naturalsize(result['saved_bytes'])}; "
+               f"{result['already_linked']} already linked")
+    sys.exit(1 if result['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
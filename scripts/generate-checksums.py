@@ -6,153 +6,15 @@ This script creates MD5 and SHA256 checksums for all asset files
 in a directory and saves them to checksums.txt.
 """
 
-import hashlib
-import os
+import sys
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Optional, Tuple
 import click
-from tqdm import tqdm
 
-
-class ChecksumGenerator:
-    """Generate and manage file checksums."""
-    
-    EXCLUDED_FILES = ['metadata.json', 'checksums.txt', '.DS_Store', 'Thumbs.db']
-    
-    def __init__(self):
-        self.checksums = {}
-    
-    def calculate_checksums(self, file_path: Path) -> Tuple[str, str]:
-        """Calculate MD5 and SHA256 checksums for a file."""
-        md5_hash = hashlib.md5()
-        sha256_hash = hashlib.sha256()
-        
-        with open(file_path, 'rb') as f:
-            # Read file in chunks for memory efficiency
-            for chunk in iter(lambda: f.read(8192), b''):
-                md5_hash.update(chunk)
-                sha256_hash.update(chunk)
-        
-        return md5_hash.hexdigest(), sha256_hash.hexdigest()
-    
-    def generate_for_directory(self, directory: Path) -> Dict[str, Dict[str, str]]:
-        """Generate checksums for all files in a directory."""
-        checksums = {}
-        
-        # Find all files to process
-        files_to_process = []
-        for file_path in directory.iterdir():
-            if file_path.is_file() and file_path.name not in self.EXCLUDED_FILES:
-                files_to_process.append(file_path)
-        
-        # Process each file
-        for file_path in tqdm(files_to_process, desc=f"Generating checksums for {directory.name}"):
-            try:
-                md5, sha256 = self.calculate_checksums(file_path)
-                checksums[file_path.name] = {
-                    'md5': md5,
-                    'sha256': sha256,
-                    'size': file_path.stat().st_size
-                }
-            except Exception as e:
-                click.echo(f"Error processing {file_path.name}: {e}", err=True)
-        
-        return checksums
-    
-    def write_checksum_file(self, directory: Path, checksums: Dict[str, Dict[str, str]]) -> None:
-        """Write checksums to checksums.txt file."""
-        checksum_file = directory / 'checksums.txt'
-        
-        with open(checksum_file, 'w') as f:
-            # Write header
-            f.write("# Checksums for asset files\n")
-            f.write("# Format: [checksum]  [filename]\n")
-            f.write("# Generated by Universal Asset Library\n\n")
-            
-            # Write MD5 checksums
-            f.write("# MD5 checksums\n")
-            for filename in sorted(checksums.keys()):
-                f.write(f"{checksums[filename]['md5']}  {filename}\n")
-            
-            f.write("\n")
-            
-            # Write SHA256 checksums
-            f.write("# SHA256 checksums\n")
-            for filename in sorted(checksums.keys()):
-                f.write(f"{checksums[filename]['sha256']}  {filename}\n")
-    
-    def update_metadata_checksums(self, directory: Path, checksums: Dict[str, Dict[str, str]]) -> None:
-        """Update checksums in metadata.json if it exists."""
-        metadata_file = directory / 'metadata.json'
-        
-        if not metadata_file.exists():
-            return
-        
-        try:
-            import json
-            
-            # Read existing metadata
-            with open(metadata_file, 'r') as f:
-                metadata = json.load(f)
-            
-            # Update checksums in formats
-            for format_info in metadata.get('formats', []):
-                filename = format_info.get('filename')
-                if filename and filename in checksums:
-                    format_info['checksum'] = {
-                        'md5': checksums[filename]['md5'],
-                        'sha256': checksums[filename]['sha256']
-                    }
-                    # Also update size if it's different
-                    if checksums[filename]['size'] != format_info.get('size', 0):
-                        format_info['size'] = checksums[filename]['size']
-            
-            # Write updated metadata
-            with open(metadata_file, 'w') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
-            
-            click.echo(f"✓ Updated checksums in metadata.json")
-            
-        except Exception as e:
-            click.echo(f"Warning: Could not update metadata.json: {e}", err=True)
-    
-    def verify_checksums(self, directory: Path) -> Tuple[int, int]:
-        """Verify existing checksums against files."""
-        checksum_file = directory / 'checksums.txt'
-        
-        if not checksum_file.exists():
-            return 0, 0
-        
-        valid = 0
-        invalid = 0
-        
-        with open(checksum_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                
-                parts = line.split()
-                if len(parts) == 2:
-                    checksum, filename = parts
-                    file_path = directory / filename
-                    
-                    if file_path.exists():
-                        # Determine checksum type by length
-                        if len(checksum) == 32:  # MD5
-                            actual, _ = self.calculate_checksums(file_path)
-                        elif len(checksum) == 64:  # SHA256
-                            _, actual = self.calculate_checksums(file_path)
-                        else:
-                            continue
-                        
-                        if actual == checksum:
-                            valid += 1
-                        else:
-                            invalid += 1
-                            click.echo(f"❌ Checksum mismatch: {filename}", err=True)
-        
-        return valid, invalid
+from ual.cache import DigestCache
+from ual.checksums import ChecksumGenerator
+from ual.hashing import DEFAULT_ALGORITHMS, SUPPORTED_ALGORITHMS
+from ual.instrumentation import instrument_command
 
 
 @click.command()
@@ -161,14 +23,35 @@ class ChecksumGenerator:
 @click.option('--update-metadata', is_flag=True, help='Update checksums in metadata.json files')
 @click.option('--verify', is_flag=True, help='Verify existing checksums instead of generating')
 @click.option('--force', is_flag=True, help='Overwrite existing checksum files')
-def main(path: str, recursive: bool, update_metadata: bool, verify: bool, force: bool):
+@click.option('--jobs', default=1, show_default=True,
+              help='Number of files to hash concurrently (0 = one per CPU)')
+@click.option('--max-inflight-mb', default=256, show_default=True,
+              help='Upper bound on the total size of files being hashed at once')
+@click.option('--algorithm', 'algorithms', multiple=True,
+              type=click.Choice(SUPPORTED_ALGORITHMS), default=DEFAULT_ALGORITHMS,
+              show_default=True, help='Digest to generate (repeatable)')
+@click.option('--cache-dir', default=None,
+              help='Digest cache directory (default: $UAL_CACHE_DIR or .cache/ual)')
+@click.option('--no-cache', is_flag=True, help='Do not use the persistent digest cache')
+@click.option('--paranoid', is_flag=True,
+              help='Re-read every file even if the digest cache has it (refreshes the cache)')
+@instrument_command
+def main(path: str, recursive: bool, update_metadata: bool, verify: bool, force: bool,
+         jobs: int, max_inflight_mb: int, algorithms: Tuple[str, ...],
+         cache_dir: Optional[str], no_cache: bool, paranoid: bool):
     """Generate or verify checksums for asset files."""
-    generator = ChecksumGenerator()
+    digest_cache = None
+    if not no_cache:
+        cache_path = Path(cache_dir) / 'digests.sqlite' if cache_dir else None
+        digest_cache = DigestCache(cache_path, paranoid=paranoid)
+    
+    generator = ChecksumGenerator(jobs=jobs, max_inflight_bytes=max_inflight_mb * 1024 * 1024,
+                                  algorithms=algorithms, digest_cache=digest_cache)
     path_obj = Path(path)
     
     if not path_obj.exists():
         click.echo(f"Error: Path does not exist: {path}", err=True)
-        return 1
+        sys.exit(1)
     
     # Collect directories to process
     directories_to_process = []
@@ -181,20 +64,22 @@ def main(path: str, recursive: bool, update_metadata: bool, verify: bool, force:
         directories_to_process.append(path_obj)
     else:
         click.echo("Error: Path must be a directory", err=True)
-        return 1
+        sys.exit(1)
     
     if not directories_to_process:
         click.echo("No asset directories found to process")
-        return 0
+        return
+    
+    directories_to_process.sort()
     
     # Process each directory
     total_valid = 0
     total_invalid = 0
     
-    for directory in directories_to_process:
-        click.echo(f"\nProcessing: {directory}")
-        
-        if verify:
+    if verify:
+        for directory in directories_to_process:
+            click.echo(f"\nProcessing: {directory}")
+            
             # Verify mode
             valid, invalid = generator.verify_checksums(directory)
             total_valid += valid
@@ -204,15 +89,21 @@ def main(path: str, recursive: bool, update_metadata: bool, verify: bool, force:
                 click.echo(f"✓ All {valid} checksums valid")
             else:
                 click.echo(f"❌ {invalid} invalid checksums found")
-        else:
-            # Generate mode
+    else:
+        # Generate mode
+        pending = []
+        for directory in directories_to_process:
             checksum_file = directory / 'checksums.txt'
             
             if checksum_file.exists() and not force:
+                click.echo(f"\nProcessing: {directory}")
                 click.echo("  Checksum file already exists (use --force to overwrite)")
                 continue
             
-            checksums = generator.generate_for_directory(directory)
+            pending.append(directory)
+        
+        for directory, checksums in generator.generate_for_directories(pending):
+            click.echo(f"\nProcessing: {directory}")
             
             if checksums:
                 generator.write_checksum_file(directory, checksums)
@@ -223,6 +114,10 @@ def main(path: str, recursive: bool, update_metadata: bool, verify: bool, force:
             else:
                 click.echo("  No files to process")
     
+    if digest_cache is not None:
+        digest_cache.close()
+        click.echo(f"\nDigest cache: {digest_cache.hits} hits, {digest_cache.misses} misses")
+    
     # Summary
     if verify:
         click.echo("\n" + "="*50)
@@ -231,11 +126,10 @@ def main(path: str, recursive: bool, update_metadata: bool, verify: bool, force:
         click.echo(f"  Invalid checksums: {total_invalid}")
         click.echo("="*50)
         
-        return 1 if total_invalid > 0 else 0
+        sys.exit(1 if total_invalid > 0 else 0)
     else:
         click.echo("\n✓ Checksum generation complete")
-        return 0
 
 
 if __name__ == '__main__':
-    exit(main())
+    main()
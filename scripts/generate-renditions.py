@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Generate responsive renditions for image assets.
+
+This script writes WebP/AVIF thumbnails and downscaled WebP widths for
+each image asset into its renditions/ directory and records them, with
+size, dimensions and checksums, in the asset's metadata.json.
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import click
+from tqdm import tqdm
+
+from ual.cache import DigestCache
+from ual.catalog import discover_metadata_files
+from ual.instrumentation import instrument_command
+from ual.renditions import RenditionSpec, default_specs, remove_stale_files, renditions_for_asset
+
+# Each worker process owns its own digest cache connection
+_worker_cache: Optional[DigestCache] = None
+_worker_options: Dict[str, Any] = {}
+
+
+def _init_worker(cache_path: Optional[Path], use_cache: bool, specs: List[RenditionSpec],
+                 force: bool) -> None:
+    global _worker_cache, _worker_options
+    _worker_cache = DigestCache(cache_path) if use_cache else None
+    if _worker_cache is not None:
+        # Flush batched cache writes when the worker exits
+        Finalize(_worker_cache, _worker_cache.close, exitpriority=10)
+    _worker_options = {'specs': specs, 'force': force}
+
+
+def _render_asset(asset_dir: Path) -> Tuple[Path, str, Optional[List[Dict[str, Any]]]]:
+    """Bring one asset's renditions up to date; runs in a worker process."""
+    try:
+        with open(asset_dir / 'metadata.json', 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        status, renditions = renditions_for_asset(
+            asset_dir, metadata, _worker_options['specs'],
+            force=_worker_options['force'], digest_cache=_worker_cache
+        )
+    except Exception as e:
+        return asset_dir, f"error: {e}", None
+    return asset_dir, status, renditions
+
+
+def _record_renditions(asset_dir: Path, renditions: List[Dict[str, Any]]) -> None:
+    """Store the renditions list in metadata.json and drop unrecorded files."""
+    metadata_file = asset_dir / 'metadata.json'
+    with open(metadata_file, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+
+    metadata['renditions'] = renditions
+
+    with open(metadata_file, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+    remove_stale_files(asset_dir, renditions)
+
+
+@click.command()
+@click.option('--path', required=True, help='Path to asset or assets directory')
+@click.option('--recursive', is_flag=True, help='Process all assets below path')
+@click.option('--force', is_flag=True, help='Regenerate renditions even if the source is unchanged')
+@click.option('--jobs', default=1, show_default=True,
+              help='Number of worker processes (0 = one per CPU)')
+@click.option('--cache-dir', default=None,
+              help='Digest cache directory (default: $UAL_CACHE_DIR or .cache/ual)')
+@click.option('--no-cache', is_flag=True, help='Do not use the persistent digest cache')
+@instrument_command
+def main(path: str, recursive: bool, force: bool, jobs: int, cache_dir: Optional[str],
+         no_cache: bool):
+    """Generate thumbnails and responsive renditions for image assets."""
+    path_obj = Path(path)
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    cache_path = Path(cache_dir) / 'digests.sqlite' if cache_dir else None
+
+    if not path_obj.exists():
+        click.echo(f"Error: Path does not exist: {path}", err=True)
+        sys.exit(1)
+
+    if recursive:
+        asset_dirs = [Path(p).parent for p in discover_metadata_files(path_obj)]
+    else:
+        asset_dirs = [path_obj]
+
+    specs = default_specs()
+    formats = sorted({spec.format for spec in specs})
+    click.echo(f"Rendering {len(asset_dirs)} assets ({', '.join(formats)})...")
+
+    initargs = (cache_path, not no_cache, specs, force)
+    if jobs <= 1 or len(asset_dirs) <= 1:
+        _init_worker(*initargs)
+        results = map(_render_asset, asset_dirs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs)
+        results = pool.map(_render_asset, asset_dirs)
+
+    counts = {'rendered': 0, 'restored': 0, 'current': 0, 'skipped': 0, 'errors': 0}
+    try:
+        for asset_dir, status, renditions in tqdm(results, total=len(asset_dirs),
+                                                  desc="Rendering assets"):
+            if status in ('rendered', 'restored'):
+                _record_renditions(asset_dir, renditions)
+                counts[status] += 1
+            elif status.startswith('error'):
+                click.echo(f"\n❌ {asset_dir}: {status[len('error: '):]}", err=True)
+                counts['errors'] += 1
+            else:
+                counts[status] += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        elif _worker_cache is not None:
+            _worker_cache.close()
+
+    # Summary
+    click.echo("\n" + "="*50)
+    click.echo("Rendition Summary:")
+    click.echo(f"  Rendered: {counts['rendered']}")
+    click.echo(f"  Restored from renditions.json: {counts['restored']}")
+    click.echo(f"  Up to date: {counts['current']}")
+    click.echo(f"  Not renderable: {counts['skipped']}")
+    click.echo(f"  Errors: {counts['errors']}")
+    click.echo("="*50)
+
+    sys.exit(1 if counts['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
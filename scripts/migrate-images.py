@@ -6,12 +6,13 @@ Migrate images from static-assets to asset-library with proper naming scheme
 import os
 import shutil
 import json
-import hashlib
 from datetime import datetime
 from pathlib import Path
 from PIL import Image
 import mimetypes
 
+from ual.hashing import hash_file
+
 # Source and destination paths
 SOURCE_DIR = Path("../static-assets/assets")
 DEST_DIR = Path("assets/images")
@@ -54,18 +55,7 @@ FILE_MAPPINGS = {
 
 def calculate_checksums(file_path):
     """Calculate MD5 and SHA256 checksums for a file"""
-    md5_hash = hashlib.md5()
-    sha256_hash = hashlib.sha256()
-    
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            md5_hash.update(chunk)
-            sha256_hash.update(chunk)
-    
-    return {
-        "md5": md5_hash.hexdigest(),
-        "sha256": sha256_hash.hexdigest()
-    }
+    return hash_file(file_path, ("md5", "sha256"))
 
 def get_image_dimensions(file_path):
     """Get image dimensions"""
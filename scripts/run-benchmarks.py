@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark every processing stage and check for regressions.
+
+A seeded synthetic library is generated in a temporary directory (or an
+existing one is used with --assets-dir), each stage's script is run on
+it, and wall time, throughput and peak RSS are compared against the
+stored baseline. The exit status is 1 if any stage regressed.
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+import click
+import humanize
+
+from ual.benchmark import (DEFAULT_BASELINE, DEFAULT_TOLERANCE, STAGE_NAMES, STAGES,
+                           StageFailed, benchmark_report, benchmark_stages, compare,
+                           incompatibility, library_size, load_baseline, write_report)
+from ual.instrumentation import instrument_command
+from ual.synthetic import DEFAULT_SIZE_SCALE, LibrarySpec, generate_library
+
+
+@click.command()
+@click.option('--assets-dir', default=None,
+              help='Benchmark this existing assets directory instead of a generated library')
+@click.option('--count', default=1000, show_default=True,
+              help='Number of assets in the generated library')
+@click.option('--seed', default=0, show_default=True, help='Seed of the generated library')
+@click.option('--size-scale', default=DEFAULT_SIZE_SCALE, show_default=True,
+              help='Multiplier on realistic file sizes in the generated library')
+@click.option('--jobs', default=1, show_default=True,
+              help='Value passed to each stage\'s --jobs (0 = one per CPU)')
+@click.option('--stage', 'stages', multiple=True, type=click.Choice(STAGE_NAMES),
+              help='Stage to run (repeatable; default: all but renditions)')
+@click.option('--repeat', default=1, show_default=True,
+              help='Runs per stage; the fastest is reported')
+@click.option('--baseline', default=DEFAULT_BASELINE, show_default=True,
+              help='Baseline file to compare against')
+@click.option('--update-baseline', is_flag=True,
+              help='Store this run as the baseline instead of comparing')
+@click.option('--tolerance', default=DEFAULT_TOLERANCE, show_default=True,
+              help='Allowed growth of wall time and peak RSS before a stage fails')
+@click.option('--output', default=None, help='Also write this run\'s results to a JSON file')
+@instrument_command
+def main(assets_dir: Optional[str], count: int, seed: int, size_scale: float, jobs: int,
+         stages: Tuple[str, ...], repeat: int, baseline: str, update_baseline: bool,
+         tolerance: float, output: Optional[str]):
+    """Benchmark the processing scripts against a stored baseline."""
+    # click's standalone mode exits 0 whatever main() returns, and the
+    # exit status is what CI gates on, so it is set with sys.exit()
+    selected = [stage for stage in STAGES
+                if stage.name in stages or (not stages and stage.default)]
+
+    with tempfile.TemporaryDirectory(prefix='ual-benchmark-') as tmp:
+        work = Path(tmp)
+
+        if assets_dir:
+            assets = Path(assets_dir)
+            if not assets.is_dir():
+                click.echo(f"Error: Assets directory does not exist: {assets_dir}", err=True)
+                sys.exit(1)
+            library = {'path': str(assets.resolve())}
+            # Never modify a library we did not generate
+            for stage in selected:
+                if stage.writes_assets:
+                    click.echo(f"⚠️  Skipping {stage.name}: it writes into the assets directory")
+            selected = [stage for stage in selected if not stage.writes_assets]
+        else:
+            assets = work / 'assets'
+            spec = LibrarySpec(count=count, seed=seed, size_scale=size_scale)
+            library = spec.as_dict()
+            click.echo(f"Generating {count} synthetic assets (seed {seed})...")
+            start = time.perf_counter()
+            for _ in generate_library(assets, spec, jobs=jobs):
+                pass
+            click.echo(f"✓ Generated library in {time.perf_counter() - start:.1f}s")
+
+        files, size = library_size(assets)
+        click.echo(f"Benchmarking {len(selected)} stages on {files} files "
+                   f"({humanize.naturalsize(size)}), jobs={jobs}...")
+
+        results = {}
+        try:
+            for stage, metrics in benchmark_stages(selected, assets, work, jobs, repeat):
+                results[stage.name] = metrics
+                click.echo(f"  ✓ {stage.name:<11} {metrics['wall_seconds']:8.2f}s "
+                           f"{metrics['files_per_second']:10.1f} files/s "
+                           f"{metrics['mb_per_second']:8.2f} MB/s "
+                           f"{metrics['peak_rss_mb']:8.1f} MB peak RSS")
+        except StageFailed as e:
+            click.echo(f"❌ Stage failed: {e}", err=True)
+            sys.exit(1)
+
+    report = benchmark_report(library, files, size, jobs, results)
+    if output:
+        write_report(Path(output), report)
+
+    baseline_path = Path(baseline)
+    if update_baseline:
+        write_report(baseline_path, report)
+        click.echo(f"✓ Wrote baseline to {baseline_path}")
+        sys.exit(0)
+
+    stored = load_baseline(baseline_path)
+    if stored is None:
+        click.echo(f"⚠️  No baseline at {baseline_path}; record one with --update-baseline")
+        sys.exit(0)
+
+    reason = incompatibility(stored, report)
+    if reason:
+        click.echo(f"Error: Cannot compare with {baseline_path}: {reason}", err=True)
+        sys.exit(1)
+    if stored.get('machine') != report['machine']:
+        click.echo(f"⚠️  Baseline was recorded on a different machine: "
+                   f"{json.dumps(stored.get('machine'))}")
+
+    rows = compare(stored, report, tolerance)
+    regressions = [row for row in rows if row['regression']]
+
+    click.echo("\n" + "="*50)
+    click.echo(f"Comparison with {baseline_path} (tolerance {tolerance:.0%}):")
+    for row in rows:
+        marker = '❌' if row['regression'] else '✓'
+        click.echo(f"  {marker} {row['stage']:<11} {row['metric']:<13} "
+                   f"{row['baseline']:>9} → {row['current']:<9} ({row['change']:+.1%})")
+    click.echo(f"  Regressions: {len(regressions)}")
+    click.echo("="*50)
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Validate assets, generate checksums and build the catalog in one pass.
+
+This script replaces running validate-assets.py, generate-checksums.py
+and build-catalog.py back to back: the assets tree is walked once, each
+metadata.json is parsed once and each file is read once, and all three
+steps are fed from those shared results.
+
+With --watch it keeps running afterwards and, for every burst of changes
+under the assets directory, revalidates and rehashes just the affected
+assets and patches the catalog held in memory.
+"""
+
+import os
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import click
+from tqdm import tqdm
+
+from ual.cache import DigestCache
+from ual.catalog import CatalogBuilder, discover_metadata_files
+from ual.hashing import DEFAULT_ALGORITHMS, SUPPORTED_ALGORITHMS
+from ual.instrumentation import instrument_command
+from ual.phash import NearDuplicateIndex, find_near_duplicates, near_duplicate_warnings
+from ual.pipeline import (AssetOutcome, catalog_record, process_asset, process_assets,
+                          write_checksum_files)
+from ual.validation import close_validator, create_validator, report_result
+from ual.watch import DEBOUNCE_SECONDS, ChangeQueue, LiveCatalog, watch_assets
+
+
+@click.command()
+@click.option('--assets-dir', default='assets', help='Path to assets directory')
+@click.option('--catalog-dir', default='catalog', help='Path to catalog output directory')
+@click.option('--strict', is_flag=True, help='Treat validation warnings as errors')
+@click.option('--update-metadata', is_flag=True,
+              help='Update checksums in metadata.json files that get a new checksums.txt')
+@click.option('--force', is_flag=True, help='Overwrite existing checksum files')
+@click.option('--algorithm', 'algorithms', multiple=True,
+              type=click.Choice(SUPPORTED_ALGORITHMS), default=DEFAULT_ALGORITHMS,
+              show_default=True, help='Digest to generate (repeatable)')
+@click.option('--jobs', default=1, show_default=True,
+              help='Number of worker processes (0 = one per CPU)')
+@click.option('--pretty', is_flag=True, help='Pretty print JSON output (default is compact)')
+@click.option('--precompress/--no-precompress', default=True, show_default=True,
+              help='Write .gz and .br sidecars next to each catalog file')
+@click.option('--shard-size', default=0, show_default=True,
+              help='Also write paginated shards of this many assets (0 = disabled)')
+@click.option('--search-index/--no-search-index', default=True, show_default=True,
+              help='Write the prebuilt full-text search index')
+@click.option('--parquet-dir', default=None,
+              help='Also export assets and formats as Parquet datasets to this directory')
+@click.option('--sqlite-db', default=None,
+              help='Also upsert the catalog into this SQLite database (FTS5 + facet indexes)')
+@click.option('--cache-dir', default=None,
+              help='Cache directory (default: $UAL_CACHE_DIR or .cache/ual)')
+@click.option('--no-cache', is_flag=True,
+              help='Do not use the persistent digest and validation result caches')
+@click.option('--paranoid', is_flag=True,
+              help='Re-read and re-validate everything, ignoring (but refreshing) the caches')
+@click.option('--profile-datasets', is_flag=True,
+              help='Profile dataset files and store the profiles in metadata.json first')
+@click.option('--near-duplicates', is_flag=True,
+              help='Warn about near-duplicate images and write catalog/near-duplicates.json')
+@click.option('--duplicates', 'duplicates_report', is_flag=True,
+              help='Write catalog/duplicates.json listing byte-identical files across assets')
+@click.option('--watch', is_flag=True,
+              help='Keep running and update checksums and the catalog as assets change')
+@click.option('--debounce', default=DEBOUNCE_SECONDS, show_default=True,
+              help='With --watch, seconds without changes before a batch is processed')
+@instrument_command
+def main(assets_dir: str, catalog_dir: str, strict: bool, update_metadata: bool, force: bool,
+         algorithms: Tuple[str, ...], jobs: int, pretty: bool, precompress: bool,
+         shard_size: int, search_index: bool, parquet_dir: Optional[str],
+         sqlite_db: Optional[str], cache_dir: Optional[str], no_cache: bool, paranoid: bool,
+         profile_datasets: bool, near_duplicates: bool, duplicates_report: bool, watch: bool,
+         debounce: float):
+    """Validate, checksum and catalog every asset in a single traversal."""
+    assets_path = Path(assets_dir)
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+
+    if not assets_path.is_dir():
+        click.echo(f"Error: Assets directory does not exist: {assets_dir}", err=True)
+        sys.exit(1)
+
+    cache_path = Path(cache_dir) if cache_dir else None
+    asset_dirs = [Path(path).parent for path in discover_metadata_files(assets_path)]
+    click.echo(f"Found {len(asset_dirs)} assets to process...")
+
+    profile_errors = 0
+    if profile_datasets:
+        # Runs without --profile-datasets never load pyarrow
+        from ual.datasets import update_profiles
+
+        # Profiles go into metadata.json, so they are written before it is read
+        counts = update_profiles(asset_dirs, jobs,
+                                 cache_path / 'digests.sqlite' if cache_path else None,
+                                 use_cache=not no_cache, force=paranoid)
+        click.echo(f"✓ Profiled {counts['profiled']} datasets "
+                   f"({counts['current']} up to date, {counts['errors']} failed)")
+        profile_errors = counts['errors']
+
+    # 1. Validate and digest every asset (one read per file)
+    duplicates = {}
+    if near_duplicates:
+        duplicates = find_near_duplicates(asset_dirs, jobs, cache_path, use_cache=not no_cache)
+
+    results = process_assets(asset_dirs, jobs, algorithms, cache_path,
+                             use_cache=not no_cache, paranoid=paranoid)
+    outcomes, total_errors, total_warnings = check_outcomes(
+        tqdm(results, total=len(asset_dirs), desc="Processing assets"), strict, duplicates
+    )
+    total_errors += profile_errors
+
+    click.echo("\n" + "="*50)
+    click.echo("Validation Summary:")
+    click.echo(f"  Assets validated: {len(asset_dirs)}")
+    click.echo(f"  Errors: {total_errors}")
+    click.echo(f"  Warnings: {total_warnings}")
+    click.echo("="*50)
+
+    # Nothing is written unless validation passes; in watch mode only the
+    # assets that failed are held back. CI gates deployment on the exit
+    # status, and click's standalone mode exits 0 whatever main() returns,
+    # so failures exit through sys.exit()
+    if total_errors > 0 and not watch:
+        sys.exit(1)
+
+    # 2. Write checksum files from the digests computed above
+    written = write_checksum_files(outcomes, algorithms, force, update_metadata)
+    click.echo(f"✓ Generated checksums for {len(written)} assets")
+
+    # 3. Build the catalog from the metadata already in memory
+    records = [
+        catalog_record(outcome, assets_path, refresh_stat=update_metadata and outcome.path in written)
+        for outcome in outcomes
+    ]
+
+    # The persistent index already holds every hash computed above, and the
+    # digest cache spares re-reading the images to look them up
+    digest_cache = index = None
+    if near_duplicates:
+        if no_cache:
+            index = NearDuplicateIndex(':memory:')
+        else:
+            digest_cache = DigestCache(cache_path / 'digests.sqlite' if cache_path else None)
+            index = NearDuplicateIndex(cache_path / 'phash.sqlite' if cache_path else None,
+                                       digest_cache=digest_cache)
+    
+    builder = CatalogBuilder(assets_dir, catalog_dir, jobs=jobs, pretty=pretty,
+                             precompress=precompress, shard_size=shard_size,
+                             build_search_index=search_index, parquet_dir=parquet_dir,
+                             sqlite_path=sqlite_db, near_duplicates=index,
+                             duplicates_report=duplicates_report)
+    try:
+        builder.build(records)
+        if watch:
+            watch_library(assets_path, LiveCatalog(builder, records), algorithms, jobs, strict,
+                          force, update_metadata, cache_path, not no_cache, paranoid,
+                          debounce, written)
+    finally:
+        if index is not None:
+            index.close()
+        if digest_cache is not None:
+            digest_cache.close()
+
+
+def check_outcomes(outcomes: Iterable[AssetOutcome], strict: bool,
+                   duplicates: Dict[Path, List[str]]) -> Tuple[List[AssetOutcome], int, int]:
+    """Report each outcome; return those that passed with the error and warning counts."""
+    passed = []
+    total_errors = 0
+    total_warnings = 0
+
+    for outcome in outcomes:
+        validation = outcome.validation
+        if outcome.path in duplicates:
+            validation = replace(validation,
+                                 warnings=validation.warnings + tuple(duplicates[outcome.path]))
+        errors, warnings = report_result(validation, strict)
+        total_errors += errors
+        total_warnings += warnings
+        if not errors:
+            passed.append(outcome)
+
+    return passed, total_errors, total_warnings
+
+
+def watch_library(assets_path: Path, live: LiveCatalog, algorithms: Tuple[str, ...], jobs: int,
+                  strict: bool, force: bool, update_metadata: bool, cache_path: Optional[Path],
+                  use_cache: bool, paranoid: bool, debounce: float,
+                  written: List[Path]) -> None:
+    """Revalidate, rehash and patch the catalog for each batch of changed assets.
+
+    Runs until interrupted. Small batches reuse one validator (and its open
+    caches); larger ones are spread over a process pool.
+    """
+    assets_root = assets_path.resolve()
+    builder = live.builder
+    queue = ChangeQueue(debounce=debounce)
+    validator = create_validator(cache_path, use_cache, paranoid, algorithms)
+
+    def record_writes(paths: List[Path]) -> None:
+        for path in paths:
+            queue.record_own_write(path / 'checksums.txt')
+            if update_metadata:
+                queue.record_own_write(path / 'metadata.json')
+
+    def on_batch(changed: List[str]) -> None:
+        started = time.perf_counter()
+        existing = [key for key in changed if (assets_root / key / 'metadata.json').is_file()]
+        paths = [assets_root / key for key in existing]
+        # Assets whose metadata.json is gone leave the catalog
+        changes = {key: None for key in changed if key not in existing}
+
+        duplicates = {}
+        if builder.near_duplicates is not None:
+            duplicates = near_duplicate_warnings(builder.near_duplicates, paths, jobs)
+
+        if jobs > 1 and len(paths) > jobs:
+            results = process_assets(paths, jobs, algorithms, cache_path,
+                                     use_cache=use_cache, paranoid=paranoid)
+        else:
+            results = (process_asset(validator, path, algorithms) for path in paths)
+        passed, errors, _ = check_outcomes(results, strict, duplicates)
+
+        written = write_checksum_files(passed, algorithms, force, update_metadata)
+        record_writes(written)
+
+        # Assets that fail validation keep their last good record
+        for outcome in passed:
+            record = catalog_record(outcome, assets_root,
+                                    refresh_stat=update_metadata and outcome.path in written)
+            changes[record['_path']] = record
+        live.patch(changes)
+
+        click.echo(
+            f"↻ {len(changed)} changed: {len(passed)} updated, "
+            f"{len(existing) - len(passed)} failed validation ({errors} errors), "
+            f"{len(changed) - len(existing)} removed in {time.perf_counter() - started:.2f}s"
+        )
+
+    record_writes([assets_root / os.path.relpath(path, assets_path) for path in written])
+    click.echo(f"\nWatching {assets_path} for changes (Ctrl+C to stop)...")
+    try:
+        watch_assets(assets_root, queue, on_batch, lambda: set(live.records),
+                     ignore=[builder.catalog_dir])
+    finally:
+        close_validator(validator)
+
+
+if __name__ == '__main__':
+    main()
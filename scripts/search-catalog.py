@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Search the asset catalog using the prebuilt search index.
+
+This script looks query terms up in catalog/search-index.json and prints
+the matching entries from catalog/index.json, without scanning assets.
+"""
+
+import json
+import sys
+from pathlib import Path
+import click
+
+from ual.instrumentation import instrument_command
+from ual.search import SearchIndex
+
+
+@click.command()
+@click.argument('query')
+@click.option('--catalog-dir', default='catalog', help='Path to catalog directory')
+@click.option('--exact', is_flag=True, help='Match whole terms only (no prefix matching)')
+@click.option('--limit', default=20, show_default=True, help='Maximum number of results')
+@click.option('--json', 'as_json', is_flag=True, help='Print results as JSON')
+@instrument_command
+def main(query: str, catalog_dir: str, exact: bool, limit: int, as_json: bool):
+    """Search the catalog for assets matching QUERY."""
+    catalog_path = Path(catalog_dir)
+    if not (catalog_path / 'search-index.json').exists():
+        click.echo(f"Error: No search index in {catalog_dir}; run build-catalog.py first", err=True)
+        sys.exit(1)
+
+    search_index = SearchIndex.load(catalog_path / 'search-index.json')
+
+    with open(catalog_path / 'index.json', 'r', encoding='utf-8') as f:
+        entries = json.load(f)['assets']
+
+    positions = search_index.search(query, prefix=not exact)
+    results = [entries[position] for position in positions[:limit]]
+
+    if as_json:
+        click.echo(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+
+    for entry in results:
+        click.echo(f"{entry['id']:<40} {entry['type']:<8} {entry['title']}")
+    click.echo(f"\n{len(positions)} matching assets")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Serve the built catalog locally with a query API.
+
+The site root is served like GitHub Pages would, and /api/ answers
+filtered, sorted and paginated queries from indexes held in memory:
+
+    /api/assets?type=image&tag=forest&sort=-size&limit=20&offset=40
+    /api/assets/<id>
+    /api/facets?license=CC0
+
+The catalog is reloaded automatically whenever it is rebuilt.
+"""
+
+import sys
+from pathlib import Path
+import click
+
+from ual.instrumentation import instrument_command
+from ual.server import CatalogServer
+
+
+@click.command()
+@click.option('--catalog-dir', default='catalog', help='Path to catalog directory')
+@click.option('--root', 'site_root', default='.', show_default=True,
+              help='Directory served for non-API paths (the Pages site root)')
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on')
+@click.option('--port', default=8000, show_default=True, help='Port to listen on')
+@click.option('--reload-interval', default=1.0, show_default=True,
+              help='Seconds between checks for a rebuilt catalog')
+@click.option('--quiet', is_flag=True, help='Do not log each request')
+@instrument_command
+def main(catalog_dir: str, site_root: str, host: str, port: int, reload_interval: float,
+         quiet: bool):
+    """Serve the site root and a catalog query API."""
+    if not (Path(catalog_dir) / 'assets.json').is_file():
+        click.echo(f"Error: No catalog found in {catalog_dir}; run build-catalog.py first",
+                   err=True)
+        sys.exit(1)
+
+    server = CatalogServer((host, port), Path(catalog_dir), Path(site_root),
+                           reload_interval=reload_interval, quiet=quiet)
+    click.echo(f"✓ Loaded {len(server.index.assets)} assets from {catalog_dir}")
+    click.echo(f"Serving {site_root} on http://{host}:{server.server_address[1]}/ "
+               f"(API under /api/, Ctrl+C to stop)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
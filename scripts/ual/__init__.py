@@ -0,0 +1,7 @@
+"""
+Shared helpers for the Universal Asset Library scripts.
+
+The command-line scripts in this directory are run directly
+(``python scripts/build-catalog.py``), which puts ``scripts/`` on
+``sys.path`` so they can import these modules as ``ual.<module>``.
+"""
@@ -0,0 +1,243 @@
+"""
+Benchmark harness for the processing scripts.
+
+Each stage runs the real command-line script in a child process, so the
+numbers include everything a user pays for: interpreter start-up,
+imports, worker pools and output. Wall time is measured around the child
+and peak RSS comes from its resource usage as reported by wait4().
+
+Runs are compared against a stored baseline (benchmarks/baseline.json by
+default); a stage regresses when its wall time or peak RSS grows by more
+than the tolerance. Baselines are only comparable on the same library,
+job count and machine, so each machine should record its own.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ual.instrumentation import SPOOL_ENV, span
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_BASELINE = 'benchmarks/baseline.json'
+DEFAULT_TOLERANCE = 0.25
+
+# Wall-time differences below this are treated as noise, however large
+# relative to the baseline
+MIN_WALL_SLACK_SECONDS = 0.25
+
+BASELINE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class BenchmarkStage:
+    """One script invocation; '{assets}', '{work}' and '{jobs}' are filled in."""
+    name: str
+    script: str
+    args: Tuple[str, ...]
+    # Stages that write into the assets tree only run on generated libraries
+    writes_assets: bool = False
+    # Slow stages only run when asked for by name
+    default: bool = True
+
+    def command(self, assets: Path, work: Path, jobs: int) -> List[str]:
+        values = {'assets': str(assets), 'work': str(work), 'jobs': str(jobs)}
+        return [sys.executable, str(SCRIPTS_DIR / self.script)] + [
+            arg.format(**values) for arg in self.args
+        ]
+
+
+STAGES = [
+    BenchmarkStage('validate', 'validate-assets.py',
+                   ('--path', '{assets}', '--recursive', '--no-cache', '--jobs', '{jobs}')),
+    BenchmarkStage('checksums', 'generate-checksums.py',
+                   ('--path', '{assets}', '--recursive', '--verify', '--no-cache',
+                    '--jobs', '{jobs}')),
+    BenchmarkStage('duplicates', 'dedup-assets.py',
+                   ('--path', '{assets}', '--no-cache', '--jobs', '{jobs}')),
+    BenchmarkStage('catalog', 'build-catalog.py',
+                   ('--assets-dir', '{assets}', '--catalog-dir', '{work}/catalog',
+                    '--no-cache', '--jobs', '{jobs}')),
+    BenchmarkStage('pipeline', 'run-pipeline.py',
+                   ('--assets-dir', '{assets}', '--catalog-dir', '{work}/pipeline-catalog',
+                    '--no-cache', '--jobs', '{jobs}')),
+    BenchmarkStage('renditions', 'generate-renditions.py',
+                   ('--path', '{assets}', '--recursive', '--force', '--no-cache',
+                    '--jobs', '{jobs}'),
+                   writes_assets=True, default=False),
+]
+
+STAGE_NAMES = [stage.name for stage in STAGES]
+
+
+class StageFailed(Exception):
+    """A benchmarked script exited with a non-zero status."""
+
+
+def library_size(root: Path) -> Tuple[int, int]:
+    """Count the files and bytes under root; the denominators for throughput."""
+    files = size = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            files += 1
+            size += os.lstat(os.path.join(directory, filename)).st_size
+    return files, size
+
+
+# Linux carries the RSS high-water mark of a forked process across exec, so
+# a stage forked from this (large) process would inherit its peak. Stages
+# are therefore forked from this minimal launcher, which times the stage
+# and prints "<wall seconds> <ru_maxrss> <exit status>".
+_LAUNCHER = """
+import os, sys, time
+start = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.execv(sys.argv[1], sys.argv[1:])
+_, status, usage = os.wait4(pid, 0)
+print(time.perf_counter() - start, usage.ru_maxrss, os.waitstatus_to_exitcode(status))
+"""
+
+
+def _peak_rss_bytes(maxrss: int) -> int:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def run_stage(stage: BenchmarkStage, assets: Path, work: Path, jobs: int,
+              env: Dict[str, str]) -> Tuple[float, int]:
+    """Run one stage to completion; return (wall seconds, peak RSS bytes).
+
+    The peak RSS covers the stage's worker processes too, as rusage of a
+    reaped child includes the children it reaped itself.
+    """
+    with span('benchmark.stage', stage=stage.name), \
+            tempfile.TemporaryFile(dir=work) as stderr:
+        launched = subprocess.run([sys.executable, '-c', _LAUNCHER]
+                                  + stage.command(assets, work, jobs),
+                                  env=env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                  stderr=stderr, text=True)
+        wall, maxrss, status = launched.stdout.split()
+
+        if int(status) != 0:
+            stderr.seek(0)
+            tail = stderr.read().decode('utf-8', 'replace').strip().splitlines()[-5:]
+            raise StageFailed(f"{stage.script} exited with status {status}"
+                              + ''.join(f"\n    {line}" for line in tail))
+
+    return float(wall), _peak_rss_bytes(int(maxrss))
+
+
+def stage_metrics(wall: float, rss: int, files: int, size: int) -> Dict[str, float]:
+    return {
+        'wall_seconds': round(wall, 3),
+        'files_per_second': round(files / wall, 1) if wall else 0.0,
+        'mb_per_second': round(size / 1e6 / wall, 2) if wall else 0.0,
+        'peak_rss_mb': round(rss / 1e6, 1),
+    }
+
+
+def benchmark_stages(stages: Sequence[BenchmarkStage], assets: Path, work: Path, jobs: int,
+                     repeat: int = 1):
+    """Run each stage repeat times, yielding (stage, metrics) as stages finish.
+
+    The fastest wall time and the largest peak RSS over the repeats are
+    reported, which keeps one slow run from masking or faking a change.
+    """
+    files, size = library_size(assets)
+    env = dict(os.environ, UAL_CACHE_DIR=str(work / 'cache'))
+    # Stages are measured uninstrumented even when this run is profiled
+    env.pop(SPOOL_ENV, None)
+
+    for stage in stages:
+        walls, peaks = [], []
+        for _ in range(repeat):
+            wall, rss = run_stage(stage, assets, work, jobs, env)
+            walls.append(wall)
+            peaks.append(rss)
+        yield stage, stage_metrics(min(walls), max(peaks), files, size)
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def benchmark_report(library: Dict[str, Any], files: int, size: int, jobs: int,
+                     stages: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    return {
+        'version': BASELINE_VERSION,
+        'recorded': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        'library': library,
+        'files': files,
+        'bytes': size,
+        'jobs': jobs,
+        'machine': machine_info(),
+        'stages': stages,
+    }
+
+
+def load_baseline(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.is_file():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_report(path: Path, report: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+
+def incompatibility(baseline: Dict[str, Any], report: Dict[str, Any]) -> Optional[str]:
+    """Why the report cannot be compared with the baseline, if it cannot."""
+    if baseline.get('version') != BASELINE_VERSION:
+        return f"baseline format version {baseline.get('version')} is not {BASELINE_VERSION}"
+    for key in ('library', 'jobs'):
+        if baseline.get(key) != report[key]:
+            return f"baseline {key} {baseline.get(key)} differs from this run's {report[key]}"
+    return None
+
+
+def compare(baseline: Dict[str, Any], report: Dict[str, Any],
+            tolerance: float) -> List[Dict[str, Any]]:
+    """Compare stage metrics with the baseline, one row per stage and metric.
+
+    A row is a regression when wall time or peak RSS grew by more than
+    tolerance (a fraction of the baseline value).
+    """
+    rows = []
+    for name, metrics in report['stages'].items():
+        previous = baseline.get('stages', {}).get(name)
+        if previous is None:
+            continue
+        for metric in ('wall_seconds', 'peak_rss_mb'):
+            before, after = previous[metric], metrics[metric]
+            allowed = before * tolerance
+            if metric == 'wall_seconds':
+                allowed = max(allowed, MIN_WALL_SLACK_SECONDS)
+            rows.append({
+                'stage': name,
+                'metric': metric,
+                'baseline': before,
+                'current': after,
+                'change': (after - before) / before if before else 0.0,
+                'regression': after - before > allowed,
+            })
+    return rows
@@ -0,0 +1,247 @@
+"""
+Persistent on-disk caches shared by the scripts.
+
+The digest cache maps a file's identity (device, inode, size, mtime_ns)
+to the digests previously computed for it, so re-verifying an unchanged
+library costs a stat per file instead of a full read. The validation cache
+maps an asset directory to the outcome of its last validation together
+with the key (content and rules) it was computed for. Both live in SQLite
+databases under ``.cache/ual`` in the repository root, wherever the scripts
+are run from (override with ``UAL_CACHE_DIR``).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ual.hashing import hash_file
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_CACHE_DIR = REPO_ROOT / '.cache' / 'ual'
+
+# Files modified this recently are not cached: a write landing in the same
+# mtime tick after hashing would otherwise go unnoticed ("racy" entries)
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory, honouring UAL_CACHE_DIR."""
+    return Path(os.environ.get('UAL_CACHE_DIR', DEFAULT_CACHE_DIR))
+
+
+def open_cache_db(path: Path) -> sqlite3.Connection:
+    """Open a cache database that may be shared by threads and processes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
+
+
+FileKey = Tuple[int, int, int, int]
+
+
+def file_key(st: os.stat_result) -> FileKey:
+    """Identity of a file's current contents as far as the filesystem can tell."""
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class DigestCache:
+    """Digest cache keyed by (device, inode, size, mtime_ns).
+
+    Safe to share between threads; lookups and writes are serialized by a
+    lock and writes are batched (lookups also see digests not yet written).
+    With paranoid=True cached digests are never trusted, but freshly
+    computed ones are still recorded.
+    """
+
+    FLUSH_EVERY = 256
+
+    def __init__(self, path: Optional[Path] = None, paranoid: bool = False):
+        self.path = Path(path) if path else default_cache_dir() / 'digests.sqlite'
+        self.paranoid = paranoid
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Digests stored since the last flush, by file key
+        self._pending: Dict[FileKey, Dict[str, str]] = {}
+        self._pending_rows = 0
+        self._conn = open_cache_db(self.path)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS digests ('
+            ' device INTEGER NOT NULL, inode INTEGER NOT NULL,'
+            ' size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,'
+            ' algorithm TEXT NOT NULL, digest TEXT NOT NULL,'
+            ' PRIMARY KEY (device, inode, size, mtime_ns, algorithm)'
+            ') WITHOUT ROWID'
+        )
+        self._conn.commit()
+
+    def lookup(self, st: os.stat_result, algorithms: Sequence[str]) -> Optional[Dict[str, str]]:
+        """Return cached digests for every algorithm, or None on any miss."""
+        if self.paranoid:
+            return None
+
+        key = file_key(st)
+        with self._lock:
+            rows = dict(self._conn.execute(
+                'SELECT algorithm, digest FROM digests '
+                'WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ?',
+                key
+            ))
+            rows.update(self._pending.get(key, {}))
+
+        if all(algorithm in rows for algorithm in algorithms):
+            return {algorithm: rows[algorithm] for algorithm in algorithms}
+        return None
+
+    def store(self, st: os.stat_result, digests: Dict[str, str]) -> None:
+        """Record digests computed for a file with the given stat."""
+        if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+            return
+
+        key = file_key(st)
+        with self._lock:
+            self._pending.setdefault(key, {}).update(digests)
+            self._pending_rows += len(digests)
+            if self._pending_rows >= self.FLUSH_EVERY:
+                self._flush()
+
+    def get_or_compute(self, st: os.stat_result, algorithms: Sequence[str],
+                       compute: Callable[[], Dict[str, str]],
+                       restat: Callable[[], os.stat_result]) -> Dict[str, str]:
+        """Return cached digests for a file with stat st, or compute them.
+
+        restat is called after computing; the result is only cached if the
+        file did not change while being read.
+        """
+        cached = self.lookup(st, algorithms)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        digests = compute()
+
+        if file_key(restat()) == file_key(st):
+            self.store(st, digests)
+        return digests
+
+    def hash_file(self, file_path: Path, algorithms: Sequence[str]) -> Dict[str, str]:
+        """Return a file's digests, reading it only on a cache miss."""
+        return self.get_or_compute(
+            os.stat(file_path), algorithms,
+            lambda: hash_file(file_path, algorithms),
+            lambda: os.stat(file_path)
+        )
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        # Drop entries for older versions of the same files first: two
+        # versions of a file pending together would otherwise delete each
+        # other once both were inserted
+        self._conn.executemany(
+            'DELETE FROM digests WHERE device = ? AND inode = ? '
+            'AND (size != ? OR mtime_ns != ?)',
+            self._pending.keys()
+        )
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO digests (device, inode, size, mtime_ns, algorithm, digest) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [key + (algorithm, digest)
+             for key, digests in self._pending.items() for algorithm, digest in digests.items()]
+        )
+        self._conn.commit()
+        self._pending = {}
+        self._pending_rows = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            self._conn.close()
+
+
+class ValidationCache:
+    """Validation outcomes keyed by asset path and a content/rules key.
+
+    Only the latest outcome per asset is kept; a lookup with any other key
+    is a miss, so changing either the asset or the rules invalidates it.
+    Writes are batched, and lookups also see outcomes not yet written.
+    An outcome is its errors and warnings plus the JSON-serializable media
+    information probed along the way, which callers need even when the
+    outcome is replayed.
+    """
+
+    FLUSH_EVERY = 64
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_cache_dir() / 'validation.sqlite'
+        self.hits = 0
+        self.misses = 0
+        # Outcomes stored since the last flush, by asset path
+        self._pending: Dict[str, Tuple[str, str, str, str]] = {}
+        self._conn = open_cache_db(self.path)
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(validations)')}
+        if columns and 'media' not in columns:
+            # Written before media information was cached
+            self._conn.execute('DROP TABLE validations')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS validations ('
+            ' asset_path TEXT PRIMARY KEY, key TEXT NOT NULL,'
+            ' errors TEXT NOT NULL, warnings TEXT NOT NULL, media TEXT NOT NULL'
+            ')'
+        )
+        self._conn.commit()
+
+    def lookup(self, asset_path: str,
+               key: str) -> Optional[Tuple[List[str], List[str], Dict[str, Dict[str, Any]]]]:
+        """Return the (errors, warnings, media) recorded for asset_path under key."""
+        pending = self._pending.get(asset_path)
+        if pending is not None:
+            row = pending[1:] if pending[0] == key else None
+        else:
+            row = self._conn.execute(
+                'SELECT errors, warnings, media FROM validations WHERE asset_path = ? AND key = ?',
+                (asset_path, key)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0]), json.loads(row[1]), json.loads(row[2])
+
+    def store(self, asset_path: str, key: str, errors: Sequence[str],
+              warnings: Sequence[str], media: Dict[str, Dict[str, Any]]) -> None:
+        self._pending[asset_path] = (key, json.dumps(list(errors)), json.dumps(list(warnings)),
+                                     json.dumps(media))
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO validations (asset_path, key, errors, warnings, media) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(asset_path,) + row for asset_path, row in self._pending.items()]
+        )
+        self._conn.commit()
+        self._pending = {}
+
+    def close(self) -> None:
+        self._flush()
+        self._conn.close()
+
+
+def hash_file_cached(file_path: Path, algorithms: Sequence[str],
+                     cache: Optional[DigestCache]) -> Dict[str, str]:
+    """Hash through the cache when one is configured."""
+    if cache is None:
+        return hash_file(file_path, algorithms)
+    return cache.hash_file(file_path, algorithms)
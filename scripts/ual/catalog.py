@@ -0,0 +1,1023 @@
+"""
+Catalog building: scan asset metadata and write the catalog files.
+
+CatalogBuilder writes the main and per-type catalogs (with precompressed
+sidecars), optional shards, the search index and the Parquet and SQLite
+exports.
+"""
+
+import gzip
+import hashlib
+import heapq
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator
+import click
+from tqdm import tqdm
+import humanize
+
+from ual.cache import DigestCache
+from ual.dedup import index_from_records
+from ual.instrumentation import span, timed
+from ual.media import MediaInfo, MediaProbeError, probe_media
+from ual.phash import NEAR_DUPLICATE_DISTANCE, NearDuplicateIndex, image_sources
+from ual.search import SearchIndexBuilder
+from ual.sqlite_catalog import write_sqlite_catalog
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli sidecars are optional
+    brotli = None
+
+
+@timed('discover')
+def discover_metadata_files(root: Path) -> List[str]:
+    """Find every asset's metadata.json under root using os.scandir.
+    
+    A directory that contains metadata.json is an asset directory, so its
+    subdirectories are never descended into. Results are sorted so that
+    callers get a deterministic order regardless of directory listing order.
+    """
+    found = []
+    stack = [os.fspath(root)]
+    
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as e:
+            click.echo(f"\nError scanning {directory}: {e}", err=True)
+            continue
+        
+        subdirs = []
+        metadata_path = None
+        for entry in entries:
+            if entry.name == 'metadata.json' and entry.is_file():
+                metadata_path = entry.path
+                break
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+        
+        # Prune: an asset directory never contains nested assets
+        if metadata_path is not None:
+            found.append(metadata_path)
+        else:
+            stack.extend(subdirs)
+    
+    return sorted(found)
+
+
+def _load_asset_record(metadata_path: str, relative_path: str,
+                       file_stat: os.stat_result) -> Dict[str, Any]:
+    """Parse a metadata.json file and add computed catalog fields."""
+    with span('json.parse'), open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    
+    return asset_record(metadata, relative_path, file_stat)
+
+
+def asset_record(metadata: Dict[str, Any], relative_path: str,
+                 file_stat: os.stat_result) -> Dict[str, Any]:
+    """Add computed catalog fields to parsed metadata, in place.
+    
+    relative_path is the asset directory relative to the assets root and
+    file_stat the stat of its metadata.json.
+    """
+    # Add computed fields
+    metadata['_path'] = relative_path
+    metadata['_url_base'] = f"/assets/{relative_path}"
+    
+    # Calculate total size from all formats
+    total_size = sum(
+        fmt.get('size', 0) 
+        for fmt in metadata.get('formats', [])
+    )
+    metadata['_total_size'] = total_size
+    metadata['_total_size_human'] = humanize.naturalsize(total_size)
+    
+    # Add last modified time
+    metadata['_last_modified'] = datetime.fromtimestamp(
+        file_stat.st_mtime
+    ).isoformat() + 'Z'
+    
+    return metadata
+
+
+def apply_media_info(record: Dict[str, Any], media: Dict[str, MediaInfo]) -> int:
+    """Add header-probed stream properties to a video or audio catalog record.
+    
+    media maps format filenames to their probed MediaInfo. Each probed
+    format gets a ``media`` object (and video dimensions if metadata has
+    none); ``technical`` fields the metadata does not state are filled from
+    the first probed format. Stated values are never overridden. Returns
+    the number of formats annotated.
+    """
+    technical = dict(record.get('technical') or {})
+    formats = record.get('formats', [])
+    annotated = 0
+    
+    for index, fmt in enumerate(formats):
+        info = media.get(fmt.get('filename'))
+        if info is None:
+            continue
+        
+        entry = {**fmt, 'media': {'container': info.container, **info.technical()}}
+        if info.has_video and not fmt.get('dimensions'):
+            entry['dimensions'] = {'width': info.width, 'height': info.height}
+        formats[index] = entry
+        
+        if not annotated:
+            for key, value in info.technical().items():
+                technical.setdefault(key, value)
+        annotated += 1
+    
+    if annotated:
+        record['technical'] = technical
+    return annotated
+
+
+def apply_checksums(record: Dict[str, Any], checksums: Dict[str, Dict[str, Any]]) -> int:
+    """Fill format checksums missing from a catalog record with computed digests.
+    
+    checksums maps filenames to digests as produced by the checksum pass.
+    Stated checksums are never overridden. Returns the number filled.
+    """
+    formats = record.get('formats', [])
+    filled = 0
+    
+    for index, fmt in enumerate(formats):
+        digests = checksums.get(fmt.get('filename'))
+        if fmt.get('checksum') or not digests:
+            continue
+        formats[index] = {**fmt, 'checksum': {
+            algorithm: value for algorithm, value in digests.items() if algorithm != 'size'
+        }}
+        filled += 1
+    
+    return filled
+
+
+def _scan_metadata_file(task: Tuple[str, str, Optional[int], Optional[int]]) -> Dict[str, Any]:
+    """Stat one metadata.json and parse it unless the cached stat still matches.
+    
+    Runs inside worker threads or processes, so it takes and returns plain
+    picklable values. 'record' is None when the cached record is still valid.
+    """
+    metadata_path, assets_dir, cached_size, cached_mtime_ns = task
+    relative_path = os.path.relpath(os.path.dirname(metadata_path), assets_dir)
+    result = {'key': relative_path, 'path': metadata_path, 'record': None, 'error': None}
+    
+    try:
+        file_stat = os.stat(metadata_path)
+        result['size'] = file_stat.st_size
+        result['mtime_ns'] = file_stat.st_mtime_ns
+        
+        if cached_size != file_stat.st_size or cached_mtime_ns != file_stat.st_mtime_ns:
+            result['record'] = _load_asset_record(metadata_path, relative_path, file_stat)
+    except Exception as e:
+        result['error'] = str(e)
+    
+    return result
+
+
+class CatalogStream:
+    """Write a text file together with its .gz and .br precompressed sidecars.
+    
+    Chunks passed to write() are buffered up to BUFFER_SIZE characters and
+    then fed to the plain file and both compressors, so sidecars are
+    produced in the same pass with bounded memory. Files are written under temporary names and moved into place on
+    close, so a static host never serves a half-written catalog. With
+    fast=True the sidecars are compressed at the fastest levels, for files
+    that are rewritten often.
+    """
+    
+    GZIP_LEVEL = 9
+    BROTLI_QUALITY = 9
+    FAST_GZIP_LEVEL = 1
+    FAST_BROTLI_QUALITY = 4
+    SIDECAR_SUFFIXES = ['.gz', '.br']
+    BUFFER_SIZE = 1 << 16
+    
+    def __init__(self, path: Path, precompress: bool = True, fast: bool = False):
+        self.path = path
+        self.precompress = precompress
+        self._targets = [path]
+        self._files = [open(self._tmp(path), 'wb')]
+        self._gzip = None
+        self._brotli = None
+        self._buffer = []
+        self._buffered = 0
+        self.sha256 = hashlib.sha256()
+        
+        if precompress:
+            gz_path = path.with_name(path.name + '.gz')
+            self._targets.append(gz_path)
+            self._files.append(open(self._tmp(gz_path), 'wb'))
+            # mtime=0 keeps the sidecar byte-identical across rebuilds
+            self._gzip = gzip.GzipFile(filename='', mode='wb', fileobj=self._files[-1],
+                                       compresslevel=self.FAST_GZIP_LEVEL if fast
+                                       else self.GZIP_LEVEL, mtime=0)
+            
+            if brotli is not None:
+                br_path = path.with_name(path.name + '.br')
+                self._targets.append(br_path)
+                self._files.append(open(self._tmp(br_path), 'wb'))
+                self._brotli = brotli.Compressor(
+                    quality=self.FAST_BROTLI_QUALITY if fast else self.BROTLI_QUALITY
+                )
+    
+    @staticmethod
+    def _tmp(path: Path) -> Path:
+        return path.with_name(path.name + '.tmp')
+    
+    def write(self, text: str) -> None:
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.BUFFER_SIZE:
+            self._flush()
+    
+    def _flush(self) -> None:
+        data = ''.join(self._buffer).encode('utf-8')
+        self._buffer = []
+        self._buffered = 0
+        self.sha256.update(data)
+        self._files[0].write(data)
+        if self._gzip is not None:
+            self._gzip.write(data)
+        if self._brotli is not None:
+            self._files[-1].write(self._brotli.process(data))
+    
+    def close(self) -> None:
+        self._flush()
+        if self._gzip is not None:
+            self._gzip.close()
+        if self._brotli is not None:
+            self._files[-1].write(self._brotli.finish())
+        for f in self._files:
+            f.close()
+        
+        for target in self._targets:
+            os.replace(self._tmp(target), target)
+        
+        # Drop sidecars that were not regenerated so they can never go stale
+        for suffix in self.SIDECAR_SUFFIXES:
+            sidecar = self.path.with_name(self.path.name + suffix)
+            if sidecar not in self._targets and sidecar.exists():
+                sidecar.unlink()
+    
+    def abort(self) -> None:
+        for f in self._files:
+            f.close()
+        for target in self._targets:
+            self._tmp(target).unlink(missing_ok=True)
+    
+    def __enter__(self) -> 'CatalogStream':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class CatalogBuilder:
+    """Build and manage the asset catalog."""
+    
+    # Bump when the shape of cached records changes to discard old manifests
+    MANIFEST_VERSION = 1
+    
+    ASSET_TYPES = ['image', 'video', 'audio', 'dataset', 'archive']
+    
+    EXECUTORS = {
+        'thread': ThreadPoolExecutor,
+        'process': ProcessPoolExecutor
+    }
+    
+    def __init__(self, assets_dir: str = 'assets', catalog_dir: str = 'catalog',
+                 incremental: bool = False, manifest_path: Optional[str] = None,
+                 jobs: int = 1, executor: str = 'thread', pretty: bool = False,
+                 precompress: bool = True, shard_size: int = 0,
+                 build_search_index: bool = True, parquet_dir: Optional[str] = None,
+                 sqlite_path: Optional[str] = None,
+                 digest_cache: Optional[DigestCache] = None,
+                 probe_media: bool = False,
+                 near_duplicates: Optional[NearDuplicateIndex] = None,
+                 duplicates_report: bool = False, fast_compression: bool = False):
+        self.assets_dir = Path(assets_dir)
+        self.catalog_dir = Path(catalog_dir)
+        self.catalog_dir.mkdir(exist_ok=True)
+        self.incremental = incremental
+        self.manifest_path = (
+            Path(manifest_path) if manifest_path
+            else self.catalog_dir / '.scan-manifest.json'
+        )
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.executor = executor
+        self.pretty = pretty
+        self.precompress = precompress
+        self.shard_size = shard_size
+        self.build_search_index = build_search_index
+        self.search_index = None
+        self.parquet_dir = Path(parquet_dir) if parquet_dir else None
+        self.sqlite_path = Path(sqlite_path) if sqlite_path else None
+        self.digest_cache = digest_cache
+        self.probe_media = probe_media
+        self.near_duplicates = near_duplicates
+        self.duplicates_report = duplicates_report
+        self.fast_compression = fast_compression
+        # id() of records the caller keeps alive -> their encoded 'assets'
+        # entry (None until first written), for callers rewriting the same
+        # records many times
+        self.encoded_records: Optional[Dict[int, Optional[str]]] = None
+        
+    @timed('catalog.scan')
+    def scan_assets(self) -> List[Dict[str, Any]]:
+        """Scan the assets directory and collect all metadata.
+        
+        Metadata files are stat'ed and parsed in a worker pool when jobs > 1;
+        results are consumed in discovery order, so output is deterministic.
+        In incremental mode, metadata files whose size and mtime_ns match the
+        persisted scan manifest are served from the cached record instead of
+        being re-read and re-parsed.
+        """
+        assets = []
+        
+        # Find all metadata.json files
+        metadata_files = discover_metadata_files(self.assets_dir)
+        
+        click.echo(f"Found {len(metadata_files)} assets to process...")
+        
+        previous = self._load_manifest() if self.incremental else {}
+        entries = {}
+        parsed = 0
+        
+        assets_root = os.fspath(self.assets_dir)
+        tasks = []
+        for metadata_path in metadata_files:
+            key = os.path.relpath(os.path.dirname(metadata_path), assets_root)
+            cached = previous.get(key, {})
+            tasks.append((metadata_path, assets_root, cached.get('size'), cached.get('mtime_ns')))
+        
+        for result in tqdm(self._map(_scan_metadata_file, tasks), total=len(tasks),
+                           desc="Scanning assets"):
+            if result['error'] is not None:
+                click.echo(f"\nError processing {result['path']}: {result['error']}", err=True)
+                continue
+            
+            key = result['key']
+            if result['record'] is not None:
+                metadata = result['record']
+                parsed += 1
+            else:
+                metadata = previous[key]['record']
+            
+            entries[key] = {
+                'size': result['size'],
+                'mtime_ns': result['mtime_ns'],
+                'record': metadata
+            }
+            assets.append(metadata)
+        
+        if self.incremental:
+            removed = len(previous.keys() - entries.keys())
+            click.echo(
+                f"Incremental scan: {parsed} parsed, "
+                f"{len(entries) - parsed} unchanged, {removed} removed"
+            )
+            self._save_manifest(entries)
+                
+        return assets
+    
+    def _map(self, fn: Callable[[Any], Any], tasks: List[Any]) -> Iterator[Any]:
+        """Map fn over tasks, in a worker pool when jobs > 1, preserving order."""
+        if self.jobs <= 1 or len(tasks) <= 1:
+            yield from map(fn, tasks)
+            return
+        
+        executor_class = self.EXECUTORS[self.executor]
+        # Batch tasks for process pools to amortize pickling overhead
+        chunksize = max(1, len(tasks) // (self.jobs * 16))
+        with executor_class(max_workers=self.jobs) as pool:
+            yield from pool.map(fn, tasks, chunksize=chunksize)
+    
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Load the scan manifest from a previous incremental build."""
+        if not self.manifest_path.exists():
+            return {}
+        
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            click.echo(f"Warning: Ignoring unreadable scan manifest: {e}", err=True)
+            return {}
+        
+        # A manifest from another schema version or assets tree is useless
+        if (manifest.get('version') != self.MANIFEST_VERSION
+                or manifest.get('assets_dir') != str(self.assets_dir.resolve())):
+            return {}
+        
+        return manifest.get('entries', {})
+    
+    def _save_manifest(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Persist the scan manifest for the next incremental build."""
+        manifest = {
+            'version': self.MANIFEST_VERSION,
+            'assets_dir': str(self.assets_dir.resolve()),
+            'entries': entries
+        }
+        
+        # Write to a temporary file first so an interrupted build never
+        # leaves a truncated manifest behind
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.manifest_path)
+    
+    @timed('catalog.fill_checksums')
+    def fill_checksums_from_cache(self, assets: List[Dict[str, Any]]) -> None:
+        """Fill in format checksums missing from metadata using the digest cache.
+        
+        Only files without a stated checksum are stat'ed, and files are never
+        read: a digest is used only if validation or checksum generation
+        already recorded one for the file's current identity. The filled
+        values live in the catalog only; the scan manifest is not updated.
+        """
+        filled = 0
+        
+        for asset in assets:
+            formats = asset.get('formats', [])
+            for index, fmt in enumerate(formats):
+                if fmt.get('checksum') or not fmt.get('filename'):
+                    continue
+                
+                try:
+                    file_stat = os.stat(self.assets_dir / asset['_path'] / fmt['filename'])
+                except OSError:
+                    continue
+                
+                digests = self.digest_cache.lookup(file_stat, ('md5', 'sha256'))
+                if digests is not None:
+                    formats[index] = {**fmt, 'checksum': digests}
+                    filled += 1
+        
+        if filled:
+            click.echo(f"Filled {filled} missing checksums from the digest cache")
+    
+    @timed('catalog.media')
+    def fill_media_info(self, assets: List[Dict[str, Any]]) -> None:
+        """Probe the container headers of video and audio formats.
+        
+        Only headers are read, so this stays cheap for large files. Files
+        that cannot be probed are left as they are; validation reports them.
+        """
+        annotated = 0
+        
+        for asset in assets:
+            if asset.get('type') not in ('video', 'audio'):
+                continue
+            
+            media = {}
+            for fmt in asset.get('formats', []):
+                filename = fmt.get('filename')
+                if not filename:
+                    continue
+                try:
+                    media[filename] = probe_media(self.assets_dir / asset['_path'] / filename)
+                except (OSError, MediaProbeError):
+                    continue
+            
+            annotated += apply_media_info(asset, media)
+        
+        if annotated:
+            click.echo(f"Added stream properties for {annotated} media files")
+    
+    @timed('catalog.build')
+    def build_catalogs(self, assets: List[Dict[str, Any]]
+                       ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """Build the main catalog and all type catalogs in a single pass.
+        
+        Assets are sorted by id once; global and per-type statistics are
+        accumulated together while walking that order, and each type
+        catalog's asset list is sliced from it, so the cost is linear in the
+        number of assets rather than assets times types. The search index,
+        when enabled, is filled in the same pass and left in
+        self.search_index for write_catalogs.
+        """
+        sorted_assets = sorted(assets, key=lambda x: x.get('id', ''))
+        
+        stats = {}
+        self.search_index = SearchIndexBuilder() if self.build_search_index else None
+        
+        for position, asset in enumerate(sorted_assets):
+            self.add_stats(stats, asset)
+            if self.search_index is not None:
+                self.search_index.add(position, asset)
+        
+        return self.assemble_catalogs(sorted_assets, stats)
+    
+    def assemble_catalogs(self, sorted_assets: List[Dict[str, Any]],
+                          stats: Dict[Optional[str], Dict[str, Any]]
+                          ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """Build the catalog documents from id-sorted assets and their statistics.
+        
+        stats holds the accumulators filled by add_stats(); they are only
+        read, so a caller can keep them up to date across builds.
+        """
+        generated = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+        
+        type_assets = {}
+        for asset in sorted_assets:
+            asset_type = asset.get('type')
+            if asset_type in self.ASSET_TYPES:
+                type_assets.setdefault(asset_type, []).append(asset)
+        
+        main_catalog = self._catalog_document(generated, sorted_assets,
+                                              stats.get(None) or self._new_stats())
+        type_catalogs = {
+            asset_type: self._catalog_document(
+                generated, type_assets[asset_type], stats[asset_type], asset_type
+            )
+            for asset_type in self.ASSET_TYPES
+            if asset_type in type_assets
+        }
+        
+        return main_catalog, type_catalogs
+    
+    def add_stats(self, stats: Dict[Optional[str], Dict[str, Any]],
+                  asset: Dict[str, Any]) -> None:
+        """Count an asset into the global (key None) and per-type accumulators."""
+        for key in self._stats_keys(asset):
+            if key not in stats:
+                stats[key] = self._new_stats()
+            self._accumulate_stats(stats[key], asset)
+    
+    def remove_stats(self, stats: Dict[Optional[str], Dict[str, Any]],
+                     asset: Dict[str, Any]) -> None:
+        """Take an asset counted by add_stats() back out of the accumulators."""
+        removed = self._new_stats()
+        self._accumulate_stats(removed, asset)
+        
+        for key in self._stats_keys(asset):
+            stats[key]['total_size'] -= removed['total_size']
+            for name, counts in removed.items():
+                if name != 'total_size':
+                    # In-place subtraction drops entries that reach zero
+                    stats[key][name] -= counts
+    
+    def _stats_keys(self, asset: Dict[str, Any]) -> List[Optional[str]]:
+        asset_type = asset.get('type')
+        return [None, asset_type] if asset_type in self.ASSET_TYPES else [None]
+    
+    def build_main_catalog(self, assets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the main catalog with all assets."""
+        return self.build_catalogs(assets)[0]
+    
+    def build_type_catalogs(self, assets: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Build separate catalogs for each asset type."""
+        return self.build_catalogs(assets)[1]
+    
+    def _catalog_document(self, generated: str, assets: List[Dict[str, Any]],
+                          stats: Dict[str, Any],
+                          asset_type: Optional[str] = None) -> Dict[str, Any]:
+        """Assemble a catalog document from pre-sorted assets and raw stats."""
+        total_size = stats['total_size']
+        
+        catalog = {
+            'generated': generated,
+            'version': '1.0.0'
+        }
+        if asset_type is not None:
+            catalog['type'] = asset_type
+        catalog.update({
+            'total_assets': len(assets),
+            'total_size': total_size,
+            'total_size_human': humanize.naturalsize(total_size),
+            'stats': self._finalize_stats(stats),
+            'assets': assets
+        })
+        
+        return catalog
+    
+    def _new_stats(self) -> Dict[str, Any]:
+        """Create an empty statistics accumulator."""
+        return {
+            'total_size': 0,
+            'by_category': Counter(),
+            'by_license': Counter(),
+            'by_creator': Counter(),
+            'formats_available': Counter(),
+            'tags': Counter()
+        }
+    
+    def _accumulate_stats(self, stats: Dict[str, Any], asset: Dict[str, Any]) -> None:
+        """Add a single asset to a statistics accumulator."""
+        stats['total_size'] += asset.get('_total_size', 0)
+        
+        # Count by category
+        stats['by_category'][asset.get('category', 'uncategorized')] += 1
+        
+        # Count by license
+        stats['by_license'][asset.get('license', {}).get('type', 'unknown')] += 1
+        
+        # Count by creator
+        stats['by_creator'][asset.get('creator', {}).get('name', 'unknown')] += 1
+        
+        # Collect formats
+        for fmt in asset.get('formats', []):
+            stats['formats_available'][fmt.get('format')] += 1
+        
+        # Count tags
+        stats['tags'].update(asset.get('tags', []))
+    
+    def _finalize_stats(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert an accumulator into JSON-serializable statistics."""
+        return {
+            'by_category': dict(stats['by_category']),
+            'by_license': dict(stats['by_license']),
+            'by_creator': dict(stats['by_creator']),
+            # Every format in use, as a sorted list
+            'formats_available': sorted(stats['formats_available']),
+            # Top tags by frequency, ties by name, so the same counts always
+            # give the same tags however they were accumulated
+            'tags': dict(heapq.nsmallest(20, stats['tags'].items(),
+                                         key=lambda item: (-item[1], item[0])))
+        }
+    
+    def _calculate_stats(self, assets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Calculate statistics for a set of assets."""
+        stats = self._new_stats()
+        for asset in assets:
+            self._accumulate_stats(stats, asset)
+        return self._finalize_stats(stats)
+    
+    def write_catalogs(self, main_catalog: Dict[str, Any], 
+                      type_catalogs: Dict[str, Dict[str, Any]]) -> None:
+        """Write catalog files to disk."""
+        # Write main catalog
+        main_path = self.catalog_dir / 'assets.json'
+        self.write_json_document(main_path, main_catalog)
+        click.echo(f"✓ Wrote main catalog to {main_path}")
+        
+        # Write type-specific catalogs
+        for asset_type, catalog in type_catalogs.items():
+            # Use plural form for filename
+            filename = f"{asset_type}s.json"
+            type_path = self.catalog_dir / filename
+            
+            self.write_json_document(type_path, catalog)
+            click.echo(f"✓ Wrote {asset_type} catalog to {type_path}")
+        
+        # Write a compact index for quick lookups; entries are generated
+        # lazily so the index is never materialized in memory
+        index = {
+            'generated': main_catalog['generated'],
+            'total_assets': main_catalog['total_assets'],
+            'assets': (
+                {
+                    'id': asset.get('id'),
+                    'type': asset.get('type'),
+                    'title': asset.get('title'),
+                    'category': asset.get('category'),
+                    'path': asset.get('_path'),
+                    'url': asset.get('_url_base')
+                }
+                for asset in main_catalog['assets']
+            )
+        }
+        
+        index_path = self.catalog_dir / 'index.json'
+        self.write_json_document(index_path, index)
+        click.echo(f"✓ Wrote index to {index_path}")
+        
+        # Postings reference positions in index.json
+        if self.search_index is not None:
+            search_path = self.catalog_dir / 'search-index.json'
+            self.write_json_document(search_path, self.search_index.to_document())
+            click.echo(f"✓ Wrote search index to {search_path}")
+    
+    def write_json_document(self, path: Path, document: Dict[str, Any]) -> str:
+        """Stream a catalog document to disk.
+        
+        The 'assets' member (any iterable) is encoded one asset at a time, so
+        the full serialized document is never held in memory. Output is
+        compact unless the builder was created with pretty=True, in which
+        case it matches json.dump(..., indent=2) byte for byte. Records
+        registered in encoded_records are encoded once and reused. Returns
+        the SHA-256 of the uncompressed bytes written.
+        """
+        if self.pretty:
+            encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+            open_object, key_sep, item_sep = '{\n  ', ': ', ',\n  '
+            open_list, list_sep, close_list, close_object = '[\n    ', ',\n    ', '\n  ]', '\n}'
+        else:
+            encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+            open_object, key_sep, item_sep = '{', ':', ','
+            open_list, list_sep, close_list, close_object = '[', ',', ']', '}'
+        
+        def encode(value: Any, depth: int) -> str:
+            text = encoder.encode(value)
+            return text.replace('\n', '\n' + '  ' * depth) if self.pretty else text
+        
+        cache = self.encoded_records if self.encoded_records is not None else {}
+        
+        def encode_item(item: Any) -> str:
+            text = cache.get(id(item))
+            if text is None:
+                text = encode(item, 2)
+                if id(item) in cache:
+                    cache[id(item)] = text
+            return text
+        
+        with span('json.write', file=str(path)), \
+                CatalogStream(path, precompress=self.precompress,
+                              fast=self.fast_compression) as stream:
+            for position, (key, value) in enumerate(document.items()):
+                stream.write((open_object if position == 0 else item_sep)
+                             + encoder.encode(key) + key_sep)
+                
+                if key != 'assets':
+                    stream.write(encode(value, 1))
+                    continue
+                
+                empty = True
+                for item in value:
+                    stream.write(open_list if empty else list_sep)
+                    stream.write(encode_item(item))
+                    empty = False
+                stream.write('[]' if empty else close_list)
+            
+            stream.write(close_object if document else '{}')
+        
+        return stream.sha256.hexdigest()
+    
+    @timed('catalog.shards')
+    def write_shards(self, main_catalog: Dict[str, Any],
+                     type_catalogs: Dict[str, Dict[str, Any]]) -> None:
+        """Split the catalog into fixed-size pages and write a shard manifest.
+        
+        Pages are cut from the id-sorted asset order three ways: over all
+        assets, per type and per category. The manifest lists each page's
+        id range, count and content hash so clients fetch only what they need.
+        """
+        shard_dir = self.catalog_dir / 'shards'
+        written = set()
+        
+        by_category = {}
+        for asset in main_catalog['assets']:
+            by_category.setdefault(asset.get('category', 'uncategorized'), []).append(asset)
+        
+        shards = {
+            'id': self._write_shard_pages(shard_dir, ['id'], main_catalog['assets'], written),
+            'type': {
+                asset_type: self._write_shard_pages(
+                    shard_dir, ['type', asset_type], catalog['assets'], written
+                )
+                for asset_type, catalog in type_catalogs.items()
+            },
+            'category': {}
+        }
+        
+        used_slugs = set()
+        for category, assets in by_category.items():
+            slug = self._shard_slug(category, used_slugs)
+            shards['category'][category] = self._write_shard_pages(
+                shard_dir, ['category', slug], assets, written
+            )
+        
+        # The manifest goes last so it never references a page not yet written
+        manifest = {
+            'generated': main_catalog['generated'],
+            'version': '1.0.0',
+            'shard_size': self.shard_size,
+            'total_assets': main_catalog['total_assets'],
+            'total_size': main_catalog['total_size'],
+            'total_size_human': main_catalog['total_size_human'],
+            'by_type': {
+                asset_type: catalog['total_assets']
+                for asset_type, catalog in type_catalogs.items()
+            },
+            'shards': shards
+        }
+        manifest_path = shard_dir / 'manifest.json'
+        self.write_json_document(manifest_path, manifest)
+        written.add(manifest_path)
+        
+        self._remove_stale_shards(shard_dir, written)
+        click.echo(f"✓ Wrote shard manifest to {manifest_path}")
+    
+    def _write_shard_pages(self, shard_dir: Path, parts: List[str],
+                           assets: List[Dict[str, Any]], written: set) -> List[Dict[str, Any]]:
+        """Write one group of assets as numbered pages and describe each page."""
+        directory = shard_dir.joinpath(*parts)
+        directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        
+        for number, start in enumerate(range(0, len(assets), self.shard_size)):
+            page = assets[start:start + self.shard_size]
+            page_path = directory / f"{number:04d}.json"
+            first_id = page[0].get('id')
+            last_id = page[-1].get('id')
+            
+            # No timestamp in the page body, so unchanged pages keep their hash
+            content_hash = self.write_json_document(page_path, {
+                'first_id': first_id,
+                'last_id': last_id,
+                'count': len(page),
+                'assets': page
+            })
+            written.add(page_path)
+            
+            entries.append({
+                'path': page_path.relative_to(self.catalog_dir).as_posix(),
+                'first_id': first_id,
+                'last_id': last_id,
+                'count': len(page),
+                'sha256': content_hash
+            })
+        
+        return entries
+    
+    @timed('catalog.near_duplicates')
+    def write_near_duplicates(self, assets: List[Dict[str, Any]], generated: str) -> None:
+        """Write near-duplicates.json: pairs of image assets with similar perceptual hashes."""
+        by_dir = {
+            str((self.assets_dir / asset['_path']).resolve()): asset
+            for asset in assets if asset.get('type') == 'image'
+        }
+        sources = list(image_sources([Path(path) for path in by_dir]))
+        failures = self.near_duplicates.update(sources, self.jobs)
+        for path, error in failures.items():
+            click.echo(f"\nWarning: {by_dir[path]['_path']}: {error}", err=True)
+        
+        pairs = []
+        for asset_dir, filename in sources:
+            asset = by_dir[str(asset_dir)]
+            for other_dir, other_filename, distance in self.near_duplicates.matches(asset_dir):
+                other = by_dir.get(other_dir)
+                # Each pair once, and only between assets in this catalog
+                if other is None or other['_path'] <= asset['_path']:
+                    continue
+                pairs.append({
+                    'distance': distance,
+                    'assets': [
+                        {'id': asset.get('id'), 'path': asset['_path'], 'filename': filename},
+                        {'id': other.get('id'), 'path': other['_path'], 'filename': other_filename},
+                    ],
+                })
+        
+        pairs.sort(key=lambda pair: (pair['distance'], pair['assets'][0]['path'],
+                                     pair['assets'][1]['path']))
+        report = {
+            'generated': generated,
+            'max_distance': NEAR_DUPLICATE_DISTANCE,
+            'total_pairs': len(pairs),
+            'pairs': pairs,
+        }
+        report_path = self.catalog_dir / 'near-duplicates.json'
+        self.write_json_document(report_path, report)
+        click.echo(f"✓ Wrote {len(pairs)} near-duplicate pairs to {report_path}")
+    
+    @timed('catalog.duplicates')
+    def write_duplicates(self, assets: List[Dict[str, Any]], generated: str) -> None:
+        """Write duplicates.json: byte-identical files stored more than once.
+        
+        Built from the SHA-256 checksums already in the records (formats and
+        renditions), so it costs one pass over the catalog and no file reads.
+        """
+        report = {'generated': generated, **index_from_records(assets).report()}
+        report_path = self.catalog_dir / 'duplicates.json'
+        self.write_json_document(report_path, report)
+        click.echo(
+            f"✓ Wrote {report['total_groups']} duplicate groups to {report_path} "
+            f"({humanize.naturalsize(report['redundant_bytes'])} redundant)"
+        )
+        if report['unindexed_files']:
+            click.echo(f"Warning: {report['unindexed_files']} files have no SHA-256 checksum "
+                       f"and were not checked for duplicates", err=True)
+    
+    @timed('catalog.parquet')
+    def write_parquet(self, assets: List[Dict[str, Any]]) -> None:
+        """Export the catalog as Parquet datasets for analytics."""
+        # pyarrow is heavy to import, so only load it when asked for
+        from ual.columnar import write_parquet_dataset
+        
+        counts = write_parquet_dataset(assets, self.parquet_dir)
+        click.echo(
+            f"✓ Wrote Parquet dataset to {self.parquet_dir} "
+            f"({counts['assets']} assets, {counts['formats']} formats)"
+        )
+    
+    @timed('catalog.sqlite')
+    def write_sqlite(self, assets: List[Dict[str, Any]], generated: str) -> None:
+        """Upsert the catalog into the SQLite database."""
+        counts = write_sqlite_catalog(assets, self.sqlite_path, generated)
+        click.echo(
+            f"✓ Updated SQLite catalog {self.sqlite_path} "
+            f"({counts['inserted']} inserted, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['deleted']} deleted)"
+        )
+    
+    @staticmethod
+    def _shard_slug(name: str, used: set) -> str:
+        """Turn a category name into a unique, URL-safe directory name."""
+        base = re.sub(r'[^a-z0-9]+', '-', str(name).lower()).strip('-') or 'uncategorized'
+        slug = base
+        suffix = 2
+        while slug in used:
+            slug = f"{base}-{suffix}"
+            suffix += 1
+        used.add(slug)
+        return slug
+    
+    def _remove_stale_shards(self, shard_dir: Path, written: set) -> None:
+        """Delete pages (and their sidecars) left over from larger builds."""
+        keep = {
+            path.with_name(path.name + suffix)
+            for path in written
+            for suffix in [''] + CatalogStream.SIDECAR_SUFFIXES
+        }
+        for path in sorted(shard_dir.rglob('*'), reverse=True):
+            if path.is_file() and path not in keep:
+                path.unlink()
+            elif path.is_dir() and not any(path.iterdir()):
+                path.rmdir()
+    
+    def write_outputs(self, main_catalog: Dict[str, Any],
+                      type_catalogs: Dict[str, Dict[str, Any]],
+                      changed_types: Optional[set] = None) -> None:
+        """Write the catalogs and every enabled export.
+        
+        With changed_types, only the type catalogs of those types are
+        rewritten; the others are known to be unchanged.
+        """
+        if changed_types is None:
+            self.write_catalogs(main_catalog, type_catalogs)
+        else:
+            self.write_catalogs(main_catalog, {
+                asset_type: catalog for asset_type, catalog in type_catalogs.items()
+                if asset_type in changed_types
+            })
+            # A type that lost its last asset has no catalog in a fresh build
+            for asset_type in (changed_types & set(self.ASSET_TYPES)) - type_catalogs.keys():
+                for suffix in [''] + CatalogStream.SIDECAR_SUFFIXES:
+                    stale_path = self.catalog_dir / f"{asset_type}s.json{suffix}"
+                    if stale_path.exists():
+                        stale_path.unlink()
+        if self.shard_size > 0:
+            self.write_shards(main_catalog, type_catalogs)
+        if self.near_duplicates is not None:
+            self.write_near_duplicates(main_catalog['assets'], main_catalog['generated'])
+        if self.duplicates_report:
+            self.write_duplicates(main_catalog['assets'], main_catalog['generated'])
+        if self.parquet_dir is not None:
+            self.write_parquet(main_catalog['assets'])
+        if self.sqlite_path is not None:
+            self.write_sqlite(main_catalog['assets'], main_catalog['generated'])
+    
+    def build(self, assets: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Build all catalog files.
+        
+        assets are catalog records as produced by asset_record(); when not
+        given, the assets directory is scanned for them.
+        """
+        click.echo("Building Universal Asset Library catalog...")
+        
+        if self.precompress and brotli is None:
+            click.echo("Warning: brotli is not installed; skipping .br sidecars", err=True)
+        
+        # Scan assets
+        if assets is None:
+            assets = self.scan_assets()
+        
+        if not assets:
+            click.echo("No assets found. Catalog will be empty.", err=True)
+            return
+        
+        if self.digest_cache is not None:
+            self.fill_checksums_from_cache(assets)
+        
+        if self.probe_media:
+            self.fill_media_info(assets)
+        
+        # Build catalogs
+        main_catalog, type_catalogs = self.build_catalogs(assets)
+        
+        # Write to disk
+        self.write_outputs(main_catalog, type_catalogs)
+        
+        # Print summary
+        click.echo("\n" + "="*50)
+        click.echo("Catalog Build Summary:")
+        click.echo(f"  Total assets: {main_catalog['total_assets']}")
+        click.echo(f"  Total size: {main_catalog['total_size_human']}")
+        click.echo(f"  Categories: {len(main_catalog['stats']['by_category'])}")
+        click.echo(f"  Formats: {', '.join(main_catalog['stats']['formats_available'])}")
+        click.echo("="*50)
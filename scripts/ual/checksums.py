@@ -0,0 +1,246 @@
+"""
+Checksum generation and verification for asset directories.
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import click
+from tqdm import tqdm
+
+from ual.cache import DigestCache, hash_file_cached
+from ual.hashing import DEFAULT_ALGORITHMS, group_by_file, parse_checksum_file
+from ual.instrumentation import ASSET, span, timed
+
+
+class ByteBudget:
+    """Bound the number of bytes being hashed concurrently.
+    
+    acquire() blocks while admitting another file would exceed the limit.
+    A file larger than the whole budget is still admitted once nothing else
+    is in flight, so oversized files cannot deadlock the pool.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._condition = threading.Condition()
+    
+    def acquire(self, size: int) -> None:
+        with self._condition:
+            while self.in_flight and self.in_flight + size > self.limit:
+                self._condition.wait()
+            self.in_flight += size
+    
+    def release(self, size: int) -> None:
+        with self._condition:
+            self.in_flight -= size
+            self._condition.notify_all()
+
+
+class ChecksumGenerator:
+    """Generate and manage file checksums."""
+    
+    EXCLUDED_FILES = ['metadata.json', 'checksums.txt', '.DS_Store', 'Thumbs.db']
+    
+    DEFAULT_MAX_INFLIGHT_BYTES = 256 * 1024 * 1024
+    
+    def __init__(self, jobs: int = 1, max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_BYTES,
+                 algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+                 digest_cache: Optional[DigestCache] = None):
+        self.checksums = {}
+        self.algorithms = tuple(algorithms)
+        self.digest_cache = digest_cache
+        # hashlib releases the GIL while digesting large buffers, so
+        # threads are enough to keep every core busy
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.max_inflight_bytes = max_inflight_bytes
+    
+    def calculate_checksums(self, file_path: Path) -> Tuple[str, str]:
+        """Calculate MD5 and SHA256 checksums for a file."""
+        digests = hash_file_cached(file_path, ('md5', 'sha256'), self.digest_cache)
+        return digests['md5'], digests['sha256']
+    
+    def calculate_digests(self, file_path: Path) -> Dict[str, str]:
+        """Calculate every configured digest of a file in a single read.
+        
+        With a digest cache, unchanged files are answered from the cache
+        without being read at all.
+        """
+        return hash_file_cached(file_path, self.algorithms, self.digest_cache)
+    
+    def generate_for_directory(self, directory: Path) -> Dict[str, Dict[str, str]]:
+        """Generate checksums for all files in a directory."""
+        for _, checksums in self.generate_for_directories([directory]):
+            return checksums
+        return {}
+    
+    def generate_for_directories(self, directories: List[Path]
+                                 ) -> Iterator[Tuple[Path, Dict[str, Dict[str, str]]]]:
+        """Generate checksums for many directories with a shared worker pool.
+        
+        Files from all directories are hashed concurrently (bounded by
+        max_inflight_bytes), but results are yielded per directory in the
+        order given, with each directory's files in sorted order, so writes
+        made by the caller stay deterministic.
+        """
+        budget = ByteBudget(self.max_inflight_bytes)
+        batches = queue.Queue()
+        
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            producer = threading.Thread(
+                target=self._submit_directories,
+                args=(pool, budget, directories, batches),
+                daemon=True
+            )
+            producer.start()
+            
+            with tqdm(desc="Generating checksums", unit="file") as progress:
+                while (batch := batches.get()) is not None:
+                    directory, futures = batch
+                    checksums = {}
+                    
+                    for file_path, future in futures:
+                        try:
+                            checksums[file_path.name] = future.result()
+                        except Exception as e:
+                            click.echo(f"Error processing {file_path.name}: {e}", err=True)
+                        progress.update()
+                    
+                    yield directory, checksums
+            
+            producer.join()
+    
+    def _submit_directories(self, pool: ThreadPoolExecutor, budget: ByteBudget,
+                            directories: List[Path], batches: queue.Queue) -> None:
+        """Queue hashing work for every file, one batch per directory."""
+        try:
+            for directory in directories:
+                futures = []
+                
+                for file_path in self._files_to_process(directory):
+                    try:
+                        size = min(file_path.stat().st_size, self.max_inflight_bytes)
+                    except OSError as e:
+                        future = Future()
+                        future.set_exception(e)
+                        futures.append((file_path, future))
+                        continue
+                    
+                    budget.acquire(size)
+                    future = pool.submit(self._checksum_entry, file_path)
+                    future.add_done_callback(lambda _, size=size: budget.release(size))
+                    futures.append((file_path, future))
+                
+                batches.put((directory, futures))
+        finally:
+            batches.put(None)
+    
+    def _files_to_process(self, directory: Path) -> List[Path]:
+        """List the files in a directory that need checksums, sorted by name."""
+        return sorted(
+            file_path for file_path in directory.iterdir()
+            if file_path.is_file() and file_path.name not in self.EXCLUDED_FILES
+        )
+    
+    def _checksum_entry(self, file_path: Path) -> Dict[str, str]:
+        """Hash a single file; runs on a worker thread."""
+        entry = self.calculate_digests(file_path)
+        entry['size'] = file_path.stat().st_size
+        return entry
+    
+    @timed('checksums.write')
+    def write_checksum_file(self, directory: Path, checksums: Dict[str, Dict[str, str]]) -> None:
+        """Write checksums to checksums.txt file."""
+        checksum_file = directory / 'checksums.txt'
+        
+        with open(checksum_file, 'w') as f:
+            # Write header
+            f.write("# Checksums for asset files\n")
+            f.write("# Format: [checksum]  [filename]\n")
+            f.write("# Generated by Universal Asset Library\n")
+            
+            # One section per algorithm; the header names the algorithm so
+            # digests of equal length (e.g. SHA512 and BLAKE2b) stay unambiguous
+            for algorithm in self.algorithms:
+                f.write(f"\n# {algorithm.upper()} checksums\n")
+                for filename in sorted(checksums.keys()):
+                    f.write(f"{checksums[filename][algorithm]}  {filename}\n")
+    
+    def apply_metadata_checksums(self, metadata: Dict[str, Any],
+                                 checksums: Dict[str, Dict[str, Any]]) -> None:
+        """Set the checksum (and size) of every format listed in parsed metadata."""
+        for format_info in metadata.get('formats', []):
+            filename = format_info.get('filename')
+            if filename and filename in checksums:
+                format_info['checksum'] = {
+                    algorithm: checksums[filename][algorithm]
+                    for algorithm in self.algorithms
+                }
+                # Also update size if it's different
+                if checksums[filename]['size'] != format_info.get('size', 0):
+                    format_info['size'] = checksums[filename]['size']
+    
+    @timed('checksums.update_metadata')
+    def update_metadata_checksums(self, directory: Path, checksums: Dict[str, Dict[str, str]],
+                                  metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Update checksums in metadata.json if it exists.
+        
+        Pass the already-parsed metadata to avoid reading the file again;
+        it is updated in place.
+        """
+        metadata_file = directory / 'metadata.json'
+        
+        if not metadata_file.exists():
+            return
+        
+        try:
+            import json
+            
+            # Read existing metadata
+            if metadata is None:
+                with open(metadata_file, 'r') as f:
+                    metadata = json.load(f)
+            
+            # Update checksums in formats
+            self.apply_metadata_checksums(metadata, checksums)
+            
+            # Write updated metadata
+            with open(metadata_file, 'w') as f:
+                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            
+            click.echo(f"✓ Updated checksums in metadata.json")
+            
+        except Exception as e:
+            click.echo(f"Warning: Could not update metadata.json: {e}", err=True)
+    
+    def verify_checksums(self, directory: Path) -> Tuple[int, int]:
+        """Verify existing checksums against files."""
+        with span('checksums.verify', ASSET, asset=str(directory)):
+            checksum_file = directory / 'checksums.txt'
+            
+            if not checksum_file.exists():
+                return 0, 0
+            
+            valid = 0
+            invalid = 0
+            
+            # Hash each listed file once, computing every digest it is listed with
+            for filename, expected in group_by_file(parse_checksum_file(checksum_file)).items():
+                file_path = directory / filename
+                
+                if not file_path.exists():
+                    continue
+                
+                actual = hash_file_cached(file_path, list(expected), self.digest_cache)
+                for algorithm, checksum in expected.items():
+                    if actual[algorithm] == checksum:
+                        valid += 1
+                    else:
+                        invalid += 1
+                        click.echo(f"❌ Checksum mismatch ({algorithm}): {filename}", err=True)
+            
+            return valid, invalid
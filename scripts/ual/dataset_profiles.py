@@ -0,0 +1,48 @@
+"""
+Dataset profile bookkeeping that does not need pyarrow.
+
+Validation only has to know which format entry of a dataset asset is
+profiled and whether its stored profile is current; keeping that here
+means validating a library does not import pyarrow. Profiling itself
+lives in ual.datasets.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# File extensions that can be profiled, by reader
+PROFILABLE_FORMATS = {
+    '.csv': 'csv',
+    '.tsv': 'tsv',
+    '.parquet': 'parquet',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.xlsx': 'xlsx',
+}
+
+# Bump when profiles change shape or meaning, so stored ones are refreshed
+PROFILE_VERSION = 2
+
+
+def dataset_format(filename: str) -> Optional[str]:
+    """Return the reader name for a dataset file, or None if unsupported."""
+    return PROFILABLE_FORMATS.get(Path(filename).suffix.lower())
+
+
+def source_dataset(metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the format entry a dataset profile is taken from, if any."""
+    if metadata.get('type') != 'dataset':
+        return None
+    for fmt in metadata.get('formats', []):
+        if fmt.get('filename') and dataset_format(fmt['filename']):
+            return fmt
+    return None
+
+
+def profile_is_current(technical: Any, source: str, source_sha256: str) -> bool:
+    """Whether a stored profile was taken from this exact source file."""
+    if not isinstance(technical, dict):
+        return False
+    profiled = technical.get('profile') or {}
+    return (profiled.get('source') == source and profiled.get('source_sha256') == source_sha256
+            and profiled.get('version') == PROFILE_VERSION and 'schema' in technical)
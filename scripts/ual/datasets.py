@@ -0,0 +1,440 @@
+"""
+Streaming profiles of dataset assets.
+
+A profile records a dataset file's row count and, per column, its type,
+null count and min/max. Files are read in bounded-memory batches (pyarrow
+streaming readers, or openpyxl's read-only mode for XLSX), so profiling a
+multi-gigabyte file never loads it whole. Parquet files whose footer
+carries row-group statistics are profiled from the footer alone.
+
+Profiles are stored in the asset's metadata.json under ``technical``
+(``records``, ``columns`` and ``schema``) together with the SHA-256 of the
+file they describe, so unchanged files are not profiled again.
+"""
+
+import datetime
+import decimal
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import click
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ual.cache import DigestCache, hash_file_cached
+from ual.dataset_profiles import (PROFILE_VERSION, dataset_format, profile_is_current,
+                                  source_dataset)
+from ual.hashing import DEFAULT_ALGORITHMS
+from ual.instrumentation import ASSET, span, timed
+
+# Rows per batch for readers that count rows, bytes per block for text readers
+BATCH_ROWS = 65536
+BLOCK_SIZE = 4 * 1024 * 1024
+
+# String min/max values are truncated to this many characters
+MAX_VALUE_LENGTH = 64
+
+
+class DatasetProfileError(Exception):
+    """A dataset file could not be read."""
+
+
+def _json_value(value: Any) -> Any:
+    """Convert a min/max scalar into a JSON-safe value."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, str):
+        return value[:MAX_VALUE_LENGTH]
+    if isinstance(value, (bool, int, float)):
+        return value
+    return None
+
+
+def _is_comparable(data_type: pa.DataType) -> bool:
+    return (pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+            or pa.types.is_decimal(data_type) or pa.types.is_temporal(data_type)
+            or pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+            or pa.types.is_boolean(data_type))
+
+
+@dataclass
+class ColumnProfile:
+    """Running statistics of one column."""
+    name: str
+    type: pa.DataType
+    nulls: int = 0
+    min: Any = None
+    max: Any = None
+
+    def update(self, array: pa.Array) -> None:
+        if pa.types.is_dictionary(array.type):
+            array = array.dictionary_decode()
+
+        if array.type != self.type and not pa.types.is_null(array.type):
+            if pa.types.is_null(self.type):
+                self.type = array.type
+            elif self._widen(array.type):
+                try:
+                    array = array.cast(self.type)
+                except pa.ArrowException:
+                    self.nulls += array.null_count
+                    return
+
+        self.nulls += array.null_count
+        if not _is_comparable(array.type) or array.null_count == len(array):
+            return
+
+        bounds = pc.min_max(array)
+        self.merge(bounds['min'].as_py(), bounds['max'].as_py())
+
+    def _widen(self, other: pa.DataType) -> bool:
+        """Settle on a type both batches fit; True if the new batch must be cast."""
+        numeric = (pa.types.is_integer, pa.types.is_floating)
+        if any(check(self.type) for check in numeric) and any(check(other) for check in numeric):
+            self.type = pa.float64()
+            return False
+        # Anything else falls back to comparing text
+        self.type = pa.string()
+        if self.min is not None:
+            self.min, self.max = str(self.min), str(self.max)
+        return True
+
+    def merge(self, low: Any, high: Any) -> None:
+        if low is None:
+            return
+        if pa.types.is_string(self.type):
+            low, high = str(low), str(high)
+        if self.min is None or low < self.min:
+            self.min = low
+        if self.max is None or high > self.max:
+            self.max = high
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'type': str(self.type),
+            'nulls': self.nulls,
+            'min': _json_value(self.min),
+            'max': _json_value(self.max),
+        }
+
+
+@dataclass
+class DatasetProfile:
+    """Row count and column statistics of one dataset file."""
+    format: str
+    records: int
+    columns: List[ColumnProfile]
+
+    def technical(self) -> Dict[str, Any]:
+        """Fields for the metadata ``technical`` object (see metadata-schema.md)."""
+        return {
+            'records': self.records,
+            'columns': len(self.columns),
+            'schema': {column.name: column.as_dict() for column in self.columns},
+        }
+
+
+# --- Readers ---------------------------------------------------------------------
+
+def _schema_batch(schema: pa.Schema) -> pa.RecordBatch:
+    """An empty batch with every column of a reader's schema.
+
+    Readers yield it first, so columns are known even when the file has
+    a header but no rows.
+    """
+    return pa.RecordBatch.from_pylist([], schema=schema)
+
+
+def _csv_batches(path: Path, delimiter: str, as_text: bool = False) -> Iterator[pa.RecordBatch]:
+    from pyarrow import csv
+
+    # Empty cells are nulls in text columns too, not empty strings
+    convert_options = csv.ConvertOptions(strings_can_be_null=True)
+    if as_text:
+        # Read the header alone to type every column as text
+        with csv.open_csv(path, read_options=csv.ReadOptions(block_size=BLOCK_SIZE),
+                          parse_options=csv.ParseOptions(delimiter=delimiter)) as reader:
+            names = reader.schema.names
+        convert_options = csv.ConvertOptions(column_types={name: pa.string() for name in names},
+                                             strings_can_be_null=True)
+
+    with csv.open_csv(path, read_options=csv.ReadOptions(block_size=BLOCK_SIZE),
+                      parse_options=csv.ParseOptions(delimiter=delimiter),
+                      convert_options=convert_options) as reader:
+        yield _schema_batch(reader.schema)
+        yield from reader
+
+
+def _jsonl_batches(path: Path, tolerant: bool = False) -> Iterator[pa.RecordBatch]:
+    from pyarrow import json as arrow_json
+
+    if hasattr(arrow_json, 'open_json') and not tolerant:
+        read_options = arrow_json.ReadOptions(block_size=BLOCK_SIZE)
+        with arrow_json.open_json(path, read_options=read_options) as reader:
+            yield _schema_batch(reader.schema)
+            yield from reader
+        return
+
+    # pandas infers each chunk on its own, so it copes with fields that
+    # appear or change type part-way through (and with older pyarrow,
+    # which has no streaming JSON reader)
+    import pandas as pd
+    with pd.read_json(path, lines=True, chunksize=BATCH_ROWS) as chunks:
+        for chunk in chunks:
+            yield _frame_to_batch(chunk)
+
+
+def _frame_to_batch(frame) -> pa.RecordBatch:
+    """Convert a pandas chunk, reading mixed-type columns as text."""
+    try:
+        return pa.RecordBatch.from_pandas(frame, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mixed = frame.select_dtypes(include='object').columns
+        frame = frame.astype({column: 'string' for column in mixed})
+        return pa.RecordBatch.from_pandas(frame, preserve_index=False)
+
+
+def _xlsx_batches(path: Path) -> Iterator[pa.RecordBatch]:
+    import openpyxl
+    import pandas as pd
+
+    # Read-only mode streams rows from the sheet XML instead of building it
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        names = [str(name) if name is not None else f"column_{index + 1}"
+                 for index, name in enumerate(header)]
+        yield _schema_batch(pa.schema([(name, pa.null()) for name in names]))
+
+        batch = []
+        for row in rows:
+            batch.append(row[:len(names)])
+            if len(batch) == BATCH_ROWS:
+                yield _frame_to_batch(pd.DataFrame(batch, columns=names))
+                batch = []
+        if batch:
+            yield _frame_to_batch(pd.DataFrame(batch, columns=names))
+    finally:
+        workbook.close()
+
+
+def _parquet_batches(path: Path) -> Iterator[pa.RecordBatch]:
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    yield _schema_batch(parquet_file.schema_arrow)
+    yield from parquet_file.iter_batches(batch_size=BATCH_ROWS)
+
+
+def _parquet_footer_profile(path: Path) -> Optional[DatasetProfile]:
+    """Profile a Parquet file from footer statistics; None if they are incomplete."""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+    schema = parquet_file.schema_arrow
+
+    # Leaf columns only line up with top-level fields for flat schemas
+    if metadata.num_columns != len(schema):
+        return None
+
+    columns = [ColumnProfile(field.name, field.type) for field in schema]
+    for group_index in range(metadata.num_row_groups):
+        row_group = metadata.row_group(group_index)
+        for column_index, column in enumerate(columns):
+            statistics = row_group.column(column_index).statistics
+            if statistics is None or not statistics.has_null_count:
+                return None
+            column.nulls += statistics.null_count
+
+            if _is_comparable(column.type) and row_group.num_rows > statistics.null_count:
+                if not statistics.has_min_max:
+                    return None
+                column.merge(statistics.min, statistics.max)
+
+    return DatasetProfile('parquet', metadata.num_rows, columns)
+
+
+def _batches(path: Path, reader: str, fallback: bool = False) -> Iterator[pa.RecordBatch]:
+    """Stream a dataset; fallback selects the reader used when inferred types do not hold."""
+    if reader in ('csv', 'tsv'):
+        return _csv_batches(path, ',' if reader == 'csv' else '\t', as_text=fallback)
+    if reader == 'jsonl':
+        return _jsonl_batches(path, tolerant=fallback)
+    if reader == 'xlsx':
+        return _xlsx_batches(path)
+    return _parquet_batches(path)
+
+
+def _profile_batches(batches: Iterator[pa.RecordBatch], reader: str) -> DatasetProfile:
+    columns: Dict[str, ColumnProfile] = {}
+    records = 0
+
+    for batch in batches:
+        records += batch.num_rows
+        names = set(batch.schema.names)
+        for name, array in zip(batch.schema.names, batch.columns, strict=True):
+            column = columns.get(name)
+            if column is None:
+                # A column missing from earlier batches (JSON lines) was null there
+                column = columns[name] = ColumnProfile(name, array.type, nulls=records - batch.num_rows)
+            column.update(array)
+
+        for name, column in columns.items():
+            if name not in names:
+                column.nulls += batch.num_rows
+
+    return DatasetProfile(reader, records, list(columns.values()))
+
+
+@timed('dataset.read')
+def profile_dataset(path: Path) -> DatasetProfile:
+    """Profile one dataset file in bounded-memory batches."""
+    path = Path(path)
+    reader = dataset_format(path.name)
+    if reader is None:
+        raise DatasetProfileError(f"unsupported dataset format: {path.suffix}")
+
+    try:
+        if reader == 'parquet':
+            profile = _parquet_footer_profile(path)
+            if profile is not None:
+                return profile
+
+        try:
+            return _profile_batches(_batches(path, reader), reader)
+        except pa.ArrowInvalid:
+            if reader not in ('csv', 'tsv', 'jsonl'):
+                raise
+            # Types or fields inferred from the first block did not hold for a later one
+            return _profile_batches(_batches(path, reader, fallback=True), reader)
+    except (OSError, ValueError, KeyError, pa.ArrowException) as e:
+        raise DatasetProfileError(str(e)) from e
+
+
+# --- Metadata --------------------------------------------------------------------
+
+def profile_for_asset(asset_dir: Path, metadata: Dict[str, Any], force: bool = False,
+                      digest_cache: Optional[DigestCache] = None
+                      ) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Bring one dataset asset's profile up to date.
+
+    Returns a status ('skipped', 'current' or 'profiled') and, when
+    profiled, the new ``technical`` object for metadata.json.
+    """
+    with span('dataset.profile', ASSET, asset=str(asset_dir)):
+        fmt = source_dataset(metadata)
+        if fmt is None:
+            return 'skipped', None
+
+        source = fmt['filename']
+        source_path = asset_dir / source
+        source_sha256 = hash_file_cached(source_path, DEFAULT_ALGORITHMS, digest_cache)['sha256']
+
+        technical = metadata.get('technical')
+        if not force and profile_is_current(technical, source, source_sha256):
+            return 'current', None
+
+        technical = dict(technical) if isinstance(technical, dict) else {}
+        technical.update(profile_dataset(source_path).technical())
+        technical['profile'] = {'source': source, 'source_sha256': source_sha256,
+                                'version': PROFILE_VERSION}
+        return 'profiled', technical
+
+
+def record_profile(asset_dir: Path, technical: Dict[str, Any]) -> None:
+    """Store a dataset profile in the asset's metadata.json."""
+    metadata_file = asset_dir / 'metadata.json'
+    with open(metadata_file, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+
+    metadata['technical'] = technical
+
+    with open(metadata_file, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+
+# Each worker process owns its own digest cache connection
+_worker_cache: Optional[DigestCache] = None
+_worker_force = False
+
+
+def _init_worker(cache_path: Optional[Path], use_cache: bool, force: bool) -> None:
+    global _worker_cache, _worker_force
+    _worker_cache = DigestCache(cache_path) if use_cache else None
+    if _worker_cache is not None:
+        # Flush batched cache writes when the worker exits
+        Finalize(None, _worker_cache.close, exitpriority=10)
+    _worker_force = force
+
+
+def _profile_asset(asset_dir: Path) -> Tuple[Path, str, Optional[Dict[str, Any]]]:
+    """Bring one asset's profile up to date; runs in a worker process."""
+    try:
+        with open(asset_dir / 'metadata.json', 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        status, technical = profile_for_asset(asset_dir, metadata, force=_worker_force,
+                                              digest_cache=_worker_cache)
+    except Exception as e:
+        return asset_dir, f"error: {e}", None
+    return asset_dir, status, technical
+
+
+def profile_assets(asset_dirs: List[Path], jobs: int, cache_path: Optional[Path],
+                   use_cache: bool, force: bool = False
+                   ) -> Iterator[Tuple[Path, str, Optional[Dict[str, Any]]]]:
+    """Profile dataset assets, in a process pool when jobs > 1, yielding in input order.
+
+    Each item is (asset_dir, status, technical); status is 'skipped',
+    'current', 'profiled' or 'error: <message>'. Writing the new
+    ``technical`` objects back is left to the caller (see record_profile).
+    """
+    initargs = (cache_path, use_cache, force)
+    if jobs <= 1 or len(asset_dirs) <= 1:
+        _init_worker(*initargs)
+        try:
+            yield from map(_profile_asset, asset_dirs)
+        finally:
+            if _worker_cache is not None:
+                _worker_cache.close()
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=initargs) as pool:
+        yield from pool.map(_profile_asset, asset_dirs)
+
+
+def update_profiles(asset_dirs: List[Path], jobs: int, cache_path: Optional[Path],
+                    use_cache: bool, force: bool = False) -> Dict[str, int]:
+    """Profile dataset assets and store new profiles in their metadata.json.
+
+    Returns how many assets were profiled, already current, skipped (not
+    datasets) and failed; failures are reported as they happen.
+    """
+    counts = {'profiled': 0, 'current': 0, 'skipped': 0, 'errors': 0}
+
+    for asset_dir, status, technical in profile_assets(asset_dirs, jobs, cache_path,
+                                                       use_cache, force):
+        if status == 'profiled':
+            record_profile(asset_dir, technical)
+            counts['profiled'] += 1
+        elif status.startswith('error'):
+            click.echo(f"\n❌ {asset_dir}: could not profile dataset: "
+                       f"{status[len('error: '):]}", err=True)
+            counts['errors'] += 1
+        else:
+            counts[status] += 1
+
+    return counts
@@ -0,0 +1,175 @@
+"""
+Library-wide detection and storage deduplication of byte-identical files.
+
+A DuplicateIndex maps SHA-256 digests to every place the content is
+stored. It is filled from digests the checksum pass or the catalog already
+has, so finding every duplicate is a single O(n) dictionary pass.
+
+link_duplicates turns the redundant copies into hardlinks (or reflinks on
+filesystems that support copy-on-write clones) of one canonical file,
+which shrinks working trees and build artifacts (tar keeps hardlinks as
+links) without changing any path the catalog points to.
+"""
+
+import errno
+import filecmp
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from ual.instrumentation import timed
+
+# Linux FICLONE ioctl: clone a whole file (btrfs, XFS, bcachefs, ...)
+FICLONE = 0x40049409
+
+LINK_MODES = ('hardlink', 'reflink')
+
+
+@dataclass(frozen=True, order=True)
+class FileLocation:
+    """One stored copy: an asset directory (relative to the assets root) and a file in it."""
+    asset: str
+    filename: str
+    size: int
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.asset, self.filename)
+
+
+class DuplicateIndex:
+    """Digest-to-locations index of every file in the library."""
+
+    def __init__(self):
+        self._locations: Dict[str, List[FileLocation]] = {}
+        # Files whose digest was not known and so could not be indexed
+        self.unknown = 0
+
+    def add(self, sha256: str, location: FileLocation) -> None:
+        self._locations.setdefault(sha256, []).append(location)
+
+    def add_record(self, record: Dict[str, Any]) -> None:
+        """Index the formats and renditions of a catalog record."""
+        for entry in list(record.get('formats', [])) + list(record.get('renditions', [])):
+            sha256 = (entry.get('checksum') or {}).get('sha256')
+            if not entry.get('filename'):
+                continue
+            if sha256 is None:
+                self.unknown += 1
+                continue
+            self.add(sha256, FileLocation(record['_path'], entry['filename'], entry.get('size', 0)))
+
+    def add_checksums(self, asset: str, checksums: Dict[str, Dict[str, Any]]) -> None:
+        """Index a directory's checksums as produced by the checksum pass."""
+        for filename, digests in checksums.items():
+            if 'sha256' not in digests:
+                self.unknown += 1
+                continue
+            self.add(digests['sha256'], FileLocation(asset, filename, digests.get('size', 0)))
+
+    def duplicate_groups(self) -> List[Dict[str, Any]]:
+        """Every digest stored more than once, most wasted bytes first."""
+        groups = []
+        for sha256, locations in self._locations.items():
+            if len(locations) < 2:
+                continue
+            locations = sorted(locations)
+            size = max(location.size for location in locations)
+            groups.append({
+                'sha256': sha256,
+                'size': size,
+                'copies': len(locations),
+                'redundant_bytes': size * (len(locations) - 1),
+                'locations': [location.path for location in locations],
+            })
+
+        groups.sort(key=lambda group: (-group['redundant_bytes'], group['locations'][0]))
+        return groups
+
+    def report(self) -> Dict[str, Any]:
+        """Summary and groups, as written to duplicates.json."""
+        groups = self.duplicate_groups()
+        return {
+            'total_groups': len(groups),
+            'redundant_files': sum(group['copies'] - 1 for group in groups),
+            'redundant_bytes': sum(group['redundant_bytes'] for group in groups),
+            'unindexed_files': self.unknown,
+            'groups': groups,
+        }
+
+
+def _reflink(source: Path, target: Path) -> None:
+    import fcntl
+
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _replace_with_link(canonical: Path, duplicate: Path, mode: str) -> None:
+    """Atomically replace duplicate with a link or clone of canonical."""
+    tmp_path = duplicate.with_name(duplicate.name + '.dedup.tmp')
+    try:
+        if mode == 'hardlink':
+            os.link(canonical, tmp_path)
+        else:
+            _reflink(canonical, tmp_path)
+            # A clone is a new file; keep the duplicate's timestamps
+            st = os.stat(duplicate)
+            os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp_path, duplicate)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+@timed('dedup.link')
+def link_duplicates(root: Path, groups: Iterable[Dict[str, Any]], mode: str = 'hardlink',
+                    dry_run: bool = False) -> Dict[str, Any]:
+    """Replace redundant copies in each group with links to its first location.
+
+    Every pair is compared byte for byte before it is linked, so a stale
+    digest can never merge different files. Copies that are already the
+    same inode are left alone. Returns counts and any per-file errors.
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(f"unknown link mode: {mode}")
+
+    result: Dict[str, Any] = {'linked': 0, 'already_linked': 0, 'saved_bytes': 0,
+                              'errors': []}
+
+    for group in groups:
+        canonical = root / group['locations'][0]
+        for location in group['locations'][1:]:
+            duplicate = root / location
+            try:
+                if os.path.samefile(canonical, duplicate):
+                    result['already_linked'] += 1
+                    continue
+                if not filecmp.cmp(canonical, duplicate, shallow=False):
+                    result['errors'].append(f"{location}: contents differ from {group['locations'][0]}")
+                    continue
+                if not dry_run:
+                    _replace_with_link(canonical, duplicate, mode)
+            except OSError as e:
+                if e.errno in (errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL):
+                    reason = f"{mode}s are not supported here ({e.strerror})"
+                else:
+                    reason = str(e)
+                result['errors'].append(f"{location}: {reason}")
+                continue
+
+            result['linked'] += 1
+            result['saved_bytes'] += group['size']
+
+    return result
+
+
+def index_from_records(records: Iterable[Dict[str, Any]],
+                       index: Optional[DuplicateIndex] = None) -> DuplicateIndex:
+    """Build (or extend) an index from catalog records."""
+    index = index if index is not None else DuplicateIndex()
+    for record in records:
+        index.add_record(record)
+    return index
@@ -0,0 +1,137 @@
+"""
+Single-pass, multi-digest file hashing shared by all scripts.
+
+Every requested digest is updated from the same buffer, so a file is read
+once no matter how many algorithms are needed. Reads go through
+``readinto`` on a reusable, per-thread buffer to avoid allocating a new
+bytes object per chunk.
+"""
+
+import hashlib
+import re
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from ual.instrumentation import HASH, span
+
+DEFAULT_ALGORITHMS = ('md5', 'sha256')
+
+# Algorithms with a fixed-length hex digest that may appear in checksums.txt
+SUPPORTED_ALGORITHMS = (
+    'md5', 'sha1', 'sha256', 'sha512', 'blake2b', 'blake2s', 'sha3_256', 'sha3_512'
+)
+
+# Used to recognise digests listed without a section header
+_ALGORITHM_BY_LENGTH = {32: 'md5', 40: 'sha1', 64: 'sha256', 128: 'sha512'}
+
+BUFFER_SIZE = 1024 * 1024
+
+_SECTION_RE = re.compile(r'^#\s*([A-Za-z0-9_-]+)\s+checksums\s*$', re.IGNORECASE)
+
+_local = threading.local()
+
+
+class ChecksumEntry(NamedTuple):
+    """One line of a checksums.txt file."""
+    filename: str
+    algorithm: Optional[str]
+    digest: str
+
+
+class MultiHasher:
+    """Feed the same bytes to several hash algorithms at once."""
+
+    def __init__(self, algorithms: Iterable[str] = DEFAULT_ALGORITHMS):
+        self._hashers = {name: hashlib.new(name) for name in dict.fromkeys(algorithms)}
+        self.bytes_hashed = 0
+
+    def update(self, data: bytes) -> None:
+        for hasher in self._hashers.values():
+            hasher.update(data)
+        self.bytes_hashed += len(data)
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {name: hasher.hexdigest() for name, hasher in self._hashers.items()}
+
+
+def _buffer() -> bytearray:
+    """Return this thread's reusable read buffer."""
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is None:
+        buffer = _local.buffer = bytearray(BUFFER_SIZE)
+    return buffer
+
+
+def hash_stream(stream: BinaryIO, hasher: MultiHasher) -> None:
+    """Feed the rest of an open binary stream into hasher."""
+    buffer = _buffer()
+    view = memoryview(buffer)
+    while True:
+        count = stream.readinto(buffer)
+        if not count:
+            break
+        hasher.update(view[:count])
+
+
+def hash_file(file_path: Path, algorithms: Sequence[str] = DEFAULT_ALGORITHMS) -> Dict[str, str]:
+    """Compute every requested digest of a file in a single read."""
+    hasher = MultiHasher(algorithms)
+    with span('hash.file', HASH, file=str(file_path)) as timed:
+        with open(file_path, 'rb', buffering=0) as f:
+            hash_stream(f, hasher)
+        timed.set(bytes=hasher.bytes_hashed)
+    return hasher.hexdigests()
+
+
+def normalize_algorithm(name: str) -> Optional[str]:
+    """Map a section header or user-supplied name to a hashlib name."""
+    normalized = name.lower().replace('-', '_')
+    if normalized in ('sha_256', 'sha_512', 'sha_1'):
+        normalized = normalized.replace('_', '')
+    return normalized if normalized in SUPPORTED_ALGORITHMS else None
+
+
+def parse_checksum_file(checksum_file: Path) -> List[ChecksumEntry]:
+    """Parse a checksums.txt file.
+
+    Lines under a "# <ALGORITHM> checksums" header belong to that algorithm;
+    other digests are identified by length. Entries whose algorithm cannot
+    be determined are returned with algorithm None.
+    """
+    entries = []
+    section = None
+
+    with open(checksum_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith('#'):
+                match = _SECTION_RE.match(line)
+                if match:
+                    section = normalize_algorithm(match.group(1))
+                continue
+
+            parts = line.split()
+            if len(parts) != 2:
+                continue
+
+            digest, filename = parts
+            digest = digest.lower()
+            algorithm = section
+            if algorithm is None or len(digest) != hashlib.new(algorithm).digest_size * 2:
+                algorithm = _ALGORITHM_BY_LENGTH.get(len(digest))
+            entries.append(ChecksumEntry(filename, algorithm, digest))
+
+    return entries
+
+
+def group_by_file(entries: Iterable[ChecksumEntry]) -> Dict[str, Dict[str, str]]:
+    """Collect the expected digests of each file so it is hashed only once."""
+    expected: Dict[str, Dict[str, str]] = {}
+    for entry in entries:
+        if entry.algorithm is not None:
+            expected.setdefault(entry.filename, {})[entry.algorithm] = entry.digest
+    return expected
@@ -0,0 +1,323 @@
+"""
+Opt-in timing instrumentation shared by all scripts.
+
+Code marks the stages it goes through with ``span()``:
+
+    with span('validate.asset', 'asset', asset=str(asset_path)):
+        ...
+
+Instrumentation is off unless a script runs with --profile or
+--trace-file (see ``instrument_command``). While it is off, span()
+returns one shared no-op context manager, so a hook costs a function call
+and nothing is recorded.
+
+When on, spans are recorded with their process and thread. Worker
+processes inherit the spool directory through the environment and write
+their spans there when they exit; the script's own process collects them
+at the end, prints the --profile report (per-stage durations, hashing
+throughput per file and the slowest assets) and writes the Chrome
+trace-event file, which chrome://tracing and Perfetto open.
+"""
+
+import functools
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import click
+
+# Set while instrumentation is on; worker processes spool their spans here
+SPOOL_ENV = 'UAL_TRACE_SPOOL'
+
+SLOWEST_ASSETS = 10
+
+# Span categories the report treats specially
+ASSET = 'asset'
+HASH = 'hash'
+
+
+class Span:
+    """A timed region; use set() to attach values known only at its end."""
+
+    __slots__ = ('recorder', 'name', 'category', 'args', 'start')
+
+    def __init__(self, recorder: 'Recorder', name: str, category: str, args: Dict[str, Any]):
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def set(self, **args: Any) -> None:
+        self.args.update(args)
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.recorder.add(self.name, self.category, self.start,
+                          time.perf_counter_ns() - self.start, self.args)
+
+
+class _NullSpan:
+    """What span() returns while instrumentation is off."""
+
+    __slots__ = ()
+
+    def set(self, **args: Any) -> None:
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Recorder:
+    """Spans recorded by one process.
+
+    The collecting process keeps its spans in memory. Any other process
+    (a pool worker, forked or spawned) writes its spans to the spool
+    directory when it exits.
+    """
+
+    def __init__(self, spool_dir: Path, collector: bool = False):
+        self.spool_dir = spool_dir
+        self.collector = collector
+        self.pid = os.getpid()
+        self.events = []
+        self._finalizer = None
+
+    def add(self, name: str, category: str, start: int, duration: int,
+            args: Dict[str, Any]) -> None:
+        if self.pid != os.getpid():
+            # A forked worker starts with a copy of its parent's recorder
+            self.pid = os.getpid()
+            self.events = []
+            self.collector = False
+            self._finalizer = None
+        if not self.collector and self._finalizer is None:
+            # Registered on first use: multiprocessing clears finalizers
+            # registered before a worker starts running
+            self._finalizer = Finalize(None, self.flush, exitpriority=100)
+        self.events.append((name, category, start, duration, threading.get_native_id(), args))
+
+    def flush(self) -> None:
+        """Write this worker's spans to the spool directory."""
+        if not self.events or not self.spool_dir.is_dir():
+            return
+        with open(self.spool_dir / f"events-{self.pid}.json", 'w', encoding='utf-8') as f:
+            json.dump({'pid': self.pid, 'events': self.events}, f, default=str)
+        self.events = []
+
+
+_recorder: Optional[Recorder] = None
+if os.environ.get(SPOOL_ENV):
+    # A spawned worker of an instrumented script
+    _recorder = Recorder(Path(os.environ[SPOOL_ENV]))
+
+
+def span(name: str, category: str = 'stage', **args: Any):
+    """Time the enclosed block as a stage (no-op unless instrumentation is on)."""
+    if _recorder is None:
+        return _NULL_SPAN
+    return Span(_recorder, name, category, args)
+
+
+def timed(name: str, category: str = 'stage') -> Callable[[Callable], Callable]:
+    """Decorator form of span() for functions that are a stage as a whole.
+
+    Not for generator functions, which would only be timed until they
+    return their generator.
+    """
+    def decorate(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return function(*args, **kwargs)
+            with Span(_recorder, name, category, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start() -> None:
+    """Turn instrumentation on for this process and the workers it starts."""
+    global _recorder
+    spool_dir = Path(tempfile.mkdtemp(prefix='ual-trace-'))
+    os.environ[SPOOL_ENV] = str(spool_dir)
+    _recorder = Recorder(spool_dir, collector=True)
+
+
+def stop() -> 'Trace':
+    """Turn instrumentation off and collect every process's spans."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    os.environ.pop(SPOOL_ENV, None)
+
+    events = [(recorder.pid,) + tuple(event) for event in recorder.events]
+    for spool_file in sorted(recorder.spool_dir.glob('events-*.json')):
+        try:
+            with open(spool_file, 'r', encoding='utf-8') as f:
+                spooled = json.load(f)
+        except (OSError, ValueError):
+            continue
+        events.extend((spooled['pid'],) + tuple(event) for event in spooled['events'])
+    shutil.rmtree(recorder.spool_dir, ignore_errors=True)
+
+    return Trace(events, recorder.pid)
+
+
+class Trace:
+    """Spans collected from all processes of one run."""
+
+    def __init__(self, events: List[tuple], main_pid: int):
+        # (pid, name, category, start_ns, duration_ns, tid, args)
+        self.events = sorted(events, key=lambda event: event[3])
+        self.main_pid = main_pid
+
+    def stages(self) -> List[Dict[str, Any]]:
+        """Calls, total, mean and max duration per span name, by total time."""
+        durations = {}
+        for _, name, _, _, duration, _, _ in self.events:
+            durations.setdefault(name, []).append(duration)
+        rows = [{'name': name, 'calls': len(values), 'total': sum(values),
+                 'mean': sum(values) / len(values), 'max': max(values)}
+                for name, values in durations.items()]
+        return sorted(rows, key=lambda row: -row['total'])
+
+    def hashing(self) -> Optional[Dict[str, Any]]:
+        """Bytes, time and per-file throughput of the files actually read to hash them."""
+        files = [(args.get('bytes', 0), duration) for _, _, category, _, duration, _, args
+                 in self.events if category == HASH]
+        if not files:
+            return None
+        total_bytes = sum(size for size, _ in files)
+        total_ns = sum(duration for _, duration in files)
+        rates = [size / 1e6 / (duration / 1e9) for size, duration in files if duration]
+        return {
+            'files': len(files),
+            'bytes': total_bytes,
+            'seconds': total_ns / 1e9,
+            'mb_per_second': total_bytes / 1e6 / (total_ns / 1e9) if total_ns else 0.0,
+            'median_file_mb_per_second': statistics.median(rates) if rates else 0.0,
+            'slowest_file_mb_per_second': min(rates) if rates else 0.0,
+        }
+
+    def slowest_assets(self, count: int = SLOWEST_ASSETS) -> List[Dict[str, Any]]:
+        """The assets that took longest, each with its longest (outermost) span."""
+        longest = {}
+        for _, name, category, _, duration, _, args in self.events:
+            if category != ASSET:
+                continue
+            asset = str(args.get('asset'))
+            if asset not in longest or duration > longest[asset]['duration']:
+                longest[asset] = {'asset': asset, 'stage': name, 'duration': duration}
+        return sorted(longest.values(), key=lambda asset: -asset['duration'])[:count]
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The spans in Chrome's trace-event format (complete events, microseconds)."""
+        origin = self.events[0][3] if self.events else 0
+        trace_events = []
+
+        for pid in sorted({event[0] for event in self.events}):
+            trace_events.append({
+                'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                'args': {'name': 'main' if pid == self.main_pid else f"worker {pid}"},
+            })
+
+        for pid, name, category, start_ns, duration, tid, args in self.events:
+            if category == HASH and duration and args.get('bytes'):
+                args = {**args, 'mb_per_second': round(args['bytes'] * 1e3 / duration, 2)}
+            trace_events.append({
+                'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': (start_ns - origin) / 1e3, 'dur': duration / 1e3, 'args': args,
+            })
+
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms',
+                'otherData': {'command': ' '.join(sys.argv)}}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+    def report(self) -> List[str]:
+        """Lines of the --profile report."""
+        processes = len({event[0] for event in self.events})
+        lines = [f"Profile ({len(self.events)} spans in {processes} processes; "
+                 f"totals add up across processes and threads):",
+                 f"  {'Stage':<28} {'Calls':>8} {'Total':>10} {'Mean':>10} {'Max':>10}"]
+        for row in self.stages():
+            lines.append(f"  {row['name']:<28} {row['calls']:>8} {_duration(row['total']):>10} "
+                         f"{_duration(row['mean']):>10} {_duration(row['max']):>10}")
+
+        hashing = self.hashing()
+        if hashing is not None:
+            lines.append(
+                f"  Hashing: {hashing['files']} files, {hashing['bytes'] / 1e6:.1f} MB in "
+                f"{hashing['seconds']:.2f}s ({hashing['mb_per_second']:.1f} MB/s; per file "
+                f"median {hashing['median_file_mb_per_second']:.1f} MB/s, "
+                f"slowest {hashing['slowest_file_mb_per_second']:.1f} MB/s)"
+            )
+
+        slowest = self.slowest_assets()
+        if slowest:
+            lines.append("  Slowest assets:")
+            for asset in slowest:
+                lines.append(f"    {_duration(asset['duration']):>10}  {asset['asset']} "
+                             f"({asset['stage']})")
+        return lines
+
+
+def _duration(nanoseconds: float) -> str:
+    if nanoseconds >= 1e9:
+        return f"{nanoseconds / 1e9:.2f}s"
+    if nanoseconds >= 1e6:
+        return f"{nanoseconds / 1e6:.1f}ms"
+    return f"{nanoseconds / 1e3:.0f}us"
+
+
+def instrument_command(function: Callable) -> Callable:
+    """Add --profile and --trace-file to a click command function.
+
+    Apply it directly above the function, below the command's own options.
+    The report and the trace are produced however the command ends.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, profile: bool = False, trace_file: Optional[str] = None, **kwargs):
+        if not profile and not trace_file:
+            return function(*args, **kwargs)
+
+        start()
+        try:
+            with span(click.get_current_context().info_name, 'script'):
+                return function(*args, **kwargs)
+        finally:
+            trace = stop()
+            if profile:
+                click.echo("\n" + "="*50, err=True)
+                for line in trace.report():
+                    click.echo(line, err=True)
+                click.echo("="*50, err=True)
+            if trace_file:
+                trace.write_chrome_trace(Path(trace_file))
+                click.echo(f"✓ Wrote trace to {trace_file}", err=True)
+
+    wrapper = click.option('--trace-file', default=None,
+                           help='Write a Chrome trace-event JSON file of all stages')(wrapper)
+    wrapper = click.option('--profile', is_flag=True,
+                           help='Report per-stage timings, hashing throughput and the slowest '
+                                'assets')(wrapper)
+    return wrapper
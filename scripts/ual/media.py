@@ -0,0 +1,322 @@
+"""
+Header-only probing of video and audio files.
+
+Durations, resolutions, frame rates, sample rates and channel counts are
+read from container headers without decoding any media:
+
+- MP4/MOV/M4A (ISO base media): box headers are walked and the payload
+  between them (mdat) is seeked over, so a multi-gigabyte file costs a
+  handful of small reads wherever its moov box is.
+- WAV (RIFF) and FLAC: the format chunk / STREAMINFO block.
+
+Other containers (WebM/Matroska, MP3, Ogg, ...) fall back to ``ffprobe``
+when it is installed; ffprobe also only reads headers.
+"""
+
+import dataclasses
+import json
+import shutil
+import struct
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+# Boxes whose payload is a list of child boxes on the path to the track info
+_CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+# Reading more than this from a single header box means the file is not
+# what it claims to be
+_MAX_HEADER_BOX = 1024 * 1024
+
+FFPROBE_TIMEOUT = 30
+
+
+class MediaProbeError(Exception):
+    """A file's headers could not be parsed."""
+
+
+class MediaUnsupportedError(MediaProbeError):
+    """No prober understands the file's container."""
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """Stream properties read from a media file's headers."""
+    container: str
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    frame_rate: Optional[float] = None
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    bit_depth: Optional[int] = None
+    # Overall bitrate in bits per second (file size over duration)
+    bitrate: Optional[int] = None
+
+    @property
+    def has_video(self) -> bool:
+        return self.width is not None
+
+    def technical(self) -> Dict[str, Any]:
+        """Fields for the metadata ``technical`` object (see metadata-schema.md)."""
+        fields = {
+            'duration': round(self.duration, 3) if self.duration is not None else None,
+            'framerate': round(self.frame_rate, 3) if self.frame_rate is not None else None,
+            'bitrate': self.bitrate,
+            'codec': self.video_codec or self.audio_codec,
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'bit_depth': self.bit_depth,
+        }
+        return {key: value for key, value in fields.items() if value is not None}
+
+
+# --- ISO base media (MP4, MOV, M4A) -------------------------------------------
+
+def _box_headers(f: BinaryIO, start: int, end: int):
+    """Yield (type, payload_start, payload_end) for the boxes in [start, end)."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            raise MediaProbeError(f"invalid {box_type!r} box size {size}")
+        yield box_type, offset + header_size, min(offset + size, end)
+        offset += size
+
+
+def _read_payload(f: BinaryIO, start: int, end: int, limit: int = _MAX_HEADER_BOX) -> bytes:
+    f.seek(start)
+    return f.read(min(end - start, limit))
+
+
+def _parse_mdhd(data: bytes) -> Tuple[int, int]:
+    """Return (timescale, duration) from an mdhd or mvhd payload."""
+    if data[0] == 1:
+        return struct.unpack_from('>IQ', data, 20)
+    return struct.unpack_from('>II', data, 12)
+
+
+def _parse_tkhd(data: bytes) -> Tuple[int, int]:
+    """Return the presentation (width, height) from a tkhd payload."""
+    offset = 88 if data[0] == 1 else 76
+    width, height = struct.unpack_from('>II', data, offset)
+    return width >> 16, height >> 16
+
+
+def _probe_track(f: BinaryIO, start: int, end: int) -> Dict[str, Any]:
+    """Collect handler, timing, dimensions and sample-entry info of one trak."""
+    track: Dict[str, Any] = {}
+    stack = [(start, end)]
+
+    while stack:
+        box_start, box_end = stack.pop()
+        for box_type, payload_start, payload_end in _box_headers(f, box_start, box_end):
+            if box_type in _CONTAINER_BOXES:
+                stack.append((payload_start, payload_end))
+            elif box_type == b'tkhd':
+                track['dimensions'] = _parse_tkhd(_read_payload(f, payload_start, payload_end))
+            elif box_type == b'mdhd':
+                track['timescale'], track['duration'] = _parse_mdhd(
+                    _read_payload(f, payload_start, payload_end)
+                )
+            elif box_type == b'hdlr':
+                track['handler'] = _read_payload(f, payload_start, payload_end)[8:12]
+            elif box_type == b'stsz':
+                track['sample_count'] = struct.unpack_from(
+                    '>I', _read_payload(f, payload_start, payload_end, 12), 8
+                )[0]
+            elif box_type == b'stsd':
+                # The first sample entry names the codec and, for audio,
+                # carries the channel count and sample rate
+                entry = _read_payload(f, payload_start, payload_end, 8 + 36)
+                if len(entry) >= 16:
+                    track['codec'] = entry[12:16].decode('latin-1').strip()
+                if len(entry) >= 44:
+                    track['channels'], track['bit_depth'] = struct.unpack_from('>HH', entry, 32)
+                    track['sample_rate'] = struct.unpack_from('>I', entry, 40)[0] >> 16
+
+    return track
+
+
+def probe_iso_bmff(f: BinaryIO, file_size: int) -> MediaInfo:
+    """Probe an MP4/MOV/M4A file from its moov box."""
+    movie_duration = None
+    video = audio = None
+
+    for box_type, payload_start, payload_end in _box_headers(f, 0, file_size):
+        if box_type != b'moov':
+            continue
+        for child_type, child_start, child_end in _box_headers(f, payload_start, payload_end):
+            if child_type == b'mvhd':
+                timescale, duration = _parse_mdhd(_read_payload(f, child_start, child_end))
+                if timescale:
+                    movie_duration = duration / timescale
+            elif child_type == b'trak':
+                track = _probe_track(f, child_start, child_end)
+                if track.get('handler') == b'vide' and video is None:
+                    video = track
+                elif track.get('handler') == b'soun' and audio is None:
+                    audio = track
+        break
+    else:
+        raise MediaProbeError("no moov box found")
+
+    info: Dict[str, Any] = {'container': 'mp4', 'duration': movie_duration}
+    if video is not None:
+        info['width'], info['height'] = video.get('dimensions', (None, None))
+        info['video_codec'] = video.get('codec')
+        timescale, duration = video.get('timescale'), video.get('duration')
+        if timescale and duration and video.get('sample_count'):
+            info['frame_rate'] = video['sample_count'] * timescale / duration
+    if audio is not None:
+        info['audio_codec'] = audio.get('codec')
+        info['sample_rate'] = audio.get('sample_rate')
+        info['channels'] = audio.get('channels')
+    return MediaInfo(**info)
+
+
+# --- RIFF WAVE ------------------------------------------------------------------
+
+def probe_wav(f: BinaryIO, file_size: int) -> MediaInfo:
+    """Probe a WAV file from its fmt and data chunk headers."""
+    f.seek(12)
+    fmt = None
+    data_size = None
+    offset = 12
+
+    while offset + 8 <= file_size and (fmt is None or data_size is None):
+        f.seek(offset)
+        chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+        if chunk_id == b'fmt ':
+            fmt = struct.unpack('<HHIIHH', f.read(16))
+        elif chunk_id == b'data':
+            data_size = min(chunk_size, file_size - offset - 8)
+        # Chunks are padded to an even size
+        offset += 8 + chunk_size + (chunk_size & 1)
+
+    if fmt is None:
+        raise MediaProbeError("no fmt chunk found")
+
+    _, channels, sample_rate, byte_rate, _, bit_depth = fmt
+    duration = data_size / byte_rate if data_size is not None and byte_rate else None
+    return MediaInfo('wav', duration=duration, audio_codec='pcm', sample_rate=sample_rate,
+                     channels=channels, bit_depth=bit_depth, bitrate=byte_rate * 8)
+
+
+# --- FLAC -------------------------------------------------------------------------
+
+def probe_flac(f: BinaryIO, file_size: int) -> MediaInfo:
+    """Probe a FLAC file from its STREAMINFO block."""
+    f.seek(4)
+    header = f.read(4)
+    if len(header) < 4 or header[0] & 0x7F != 0:
+        raise MediaProbeError("STREAMINFO block missing")
+
+    info = f.read(34)
+    if len(info) < 34:
+        raise MediaProbeError("truncated STREAMINFO block")
+
+    packed = int.from_bytes(info[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bit_depth = ((packed >> 36) & 0x1F) + 1
+    total_samples = packed & 0xFFFFFFFFF
+
+    duration = total_samples / sample_rate if sample_rate and total_samples else None
+    return MediaInfo('flac', duration=duration, audio_codec='flac', sample_rate=sample_rate,
+                     channels=channels, bit_depth=bit_depth)
+
+
+# --- ffprobe fallback -----------------------------------------------------------
+
+def _parse_rate(rate: Optional[str]) -> Optional[float]:
+    if not rate or rate == '0/0':
+        return None
+    numerator, _, denominator = rate.partition('/')
+    return float(numerator) / float(denominator or 1)
+
+
+def probe_ffprobe(file_path: Path) -> MediaInfo:
+    """Probe any container ffprobe understands (reads headers only)."""
+    ffprobe = shutil.which('ffprobe')
+    if ffprobe is None:
+        raise MediaUnsupportedError("unsupported container and ffprobe is not installed")
+
+    try:
+        output = subprocess.run(
+            [ffprobe, '-v', 'error', '-of', 'json', '-show_entries',
+             'format=format_name,duration:stream=codec_type,codec_name,width,height,'
+             'avg_frame_rate,sample_rate,channels,bits_per_sample',
+             str(file_path)],
+            capture_output=True, check=True, timeout=FFPROBE_TIMEOUT
+        ).stdout
+        data = json.loads(output)
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        raise MediaProbeError(f"ffprobe failed: {e}") from e
+
+    fmt = data.get('format', {})
+    info: Dict[str, Any] = {
+        'container': fmt.get('format_name', 'unknown').split(',')[0],
+        'duration': float(fmt['duration']) if fmt.get('duration') else None,
+    }
+    for stream in data.get('streams', []):
+        if stream.get('codec_type') == 'video' and 'width' not in info:
+            info['width'] = stream.get('width')
+            info['height'] = stream.get('height')
+            info['frame_rate'] = _parse_rate(stream.get('avg_frame_rate'))
+            info['video_codec'] = stream.get('codec_name')
+        elif stream.get('codec_type') == 'audio' and 'audio_codec' not in info:
+            info['audio_codec'] = stream.get('codec_name')
+            info['sample_rate'] = int(stream['sample_rate']) if stream.get('sample_rate') else None
+            info['channels'] = stream.get('channels')
+            info['bit_depth'] = stream.get('bits_per_sample') or None
+    return MediaInfo(**info)
+
+
+# --- Dispatch -------------------------------------------------------------------
+
+def _sniff(head: bytes):
+    """Pick a native prober from a file's first bytes."""
+    if head[4:8] == b'ftyp':
+        return probe_iso_bmff
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return probe_wav
+    if head[:4] == b'fLaC':
+        return probe_flac
+    return None
+
+
+def probe_media_stream(f: BinaryIO, file_path: Path, file_size: int) -> MediaInfo:
+    """Probe an open media file, falling back to ffprobe for other containers."""
+    f.seek(0)
+    prober = _sniff(f.read(12))
+    if prober is None:
+        info = probe_ffprobe(file_path)
+    else:
+        try:
+            info = prober(f, file_size)
+        except (struct.error, IndexError) as e:
+            raise MediaProbeError(f"malformed header: {e}") from e
+
+    if info.bitrate is None and info.duration:
+        info = dataclasses.replace(info, bitrate=round(file_size * 8 / info.duration))
+    return info
+
+
+def probe_media(file_path: Path) -> MediaInfo:
+    """Probe a media file by path."""
+    with open(file_path, 'rb') as f:
+        return probe_media_stream(f, Path(file_path), f.seek(0, 2))
@@ -0,0 +1,322 @@
+"""
+Perceptual-hash index for finding near-duplicate images.
+
+Each image asset's primary raster file gets a 64-bit difference hash
+(dHash): the image is decoded at reduced scale, converted to grayscale,
+shrunk to 9x8 and each pixel compared with its right-hand neighbour in
+NumPy. Re-encoded, resized or lightly edited copies land within a few bits
+of the original.
+
+Hashes live in a SQLite database next to the other caches, keyed by the
+file's SHA-256 so unchanged images are never decoded twice, and are
+organised as a BK-tree whose nodes are persisted with their parent edge.
+Loading the tree is one table scan; a radius query then only visits the
+subtrees the triangle inequality cannot rule out, so checking new assets
+against the whole library is sub-linear.
+"""
+
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from ual.cache import DigestCache, default_cache_dir, hash_file_cached, open_cache_db
+from ual.hashing import DEFAULT_ALGORITHMS
+from ual.instrumentation import timed
+from ual.renditions import source_format
+
+HASH_SIZE = 8
+
+# Images whose hashes differ in at most this many of the 64 bits are
+# reported as near-duplicates
+NEAR_DUPLICATE_DISTANCE = 6
+
+
+def dhash(img: Image.Image, size: int = HASH_SIZE) -> int:
+    """Difference hash of an image as a size*size-bit integer."""
+    # Let the decoder downscale (JPEG DCT scaling) before anything else
+    img.draft('L', (size * 8, size * 8))
+    img = ImageOps.exif_transpose(img).convert('L')
+    pixels = np.asarray(img.resize((size + 1, size), Image.LANCZOS), dtype=np.int16)
+
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+@timed('image.dhash')
+def image_dhash(path: Path) -> int:
+    with Image.open(path) as img:
+        return dhash(img)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """BK-tree over integer hashes with Hamming distance.
+
+    children maps a node to {edge distance: child}; the tree is rebuilt
+    from (hash, parent, distance) rows, so inserting never rebalances.
+    """
+
+    def __init__(self):
+        self.root: Optional[int] = None
+        self.children: Dict[int, Dict[int, int]] = {}
+
+    def attach(self, node: int, parent: Optional[int], distance: int) -> None:
+        """Restore a persisted node under its recorded parent."""
+        self.children.setdefault(node, {})
+        if parent is None:
+            self.root = node
+        else:
+            self.children.setdefault(parent, {})[distance] = node
+
+    def add(self, node: int) -> Optional[Tuple[Optional[int], int]]:
+        """Insert a hash; return its (parent, distance) edge, or None if present."""
+        if node in self.children:
+            return None
+        if self.root is None:
+            self.attach(node, None, 0)
+            return None, 0
+
+        current = self.root
+        while True:
+            distance = hamming(node, current)
+            child = self.children[current].get(distance)
+            if child is None:
+                self.attach(node, current, distance)
+                return current, distance
+            current = child
+
+    def search(self, node: int, radius: int) -> Iterator[Tuple[int, int]]:
+        """Yield (hash, distance) for every stored hash within radius."""
+        if self.root is None:
+            return
+        stack = [self.root]
+        while stack:
+            current = stack.pop()
+            distance = hamming(node, current)
+            if distance <= radius:
+                yield current, distance
+            for edge, child in self.children[current].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+
+    def __len__(self) -> int:
+        return len(self.children)
+
+
+def _to_signed(value: int) -> int:
+    """Map an unsigned 64-bit hash onto SQLite's signed INTEGER."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class NearDuplicateIndex:
+    """Persistent perceptual-hash index of image assets.
+
+    images maps each asset directory (absolute path) to the file it was
+    hashed from; nodes holds the BK-tree over distinct hashes. With
+    path=':memory:' nothing is persisted.
+    """
+
+    def __init__(self, path: Optional[Path] = None, digest_cache: Optional[DigestCache] = None):
+        self.digest_cache = digest_cache
+        if str(path) == ':memory:':
+            self._conn = sqlite3.connect(':memory:')
+        else:
+            self._conn = open_cache_db(Path(path) if path else default_cache_dir() / 'phash.sqlite')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS images ('
+            ' asset TEXT PRIMARY KEY, filename TEXT NOT NULL,'
+            ' sha256 TEXT NOT NULL, hash INTEGER NOT NULL'
+            ')'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS images_by_hash ON images (hash)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS images_by_sha256 ON images (sha256)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS nodes ('
+            ' hash INTEGER PRIMARY KEY, parent INTEGER, distance INTEGER NOT NULL'
+            ')'
+        )
+        self._conn.commit()
+
+        self.tree = BKTree()
+        # Edges are restored as stored, so loading never re-inserts
+        for node, parent, distance in self._conn.execute(
+                'SELECT hash, parent, distance FROM nodes'):
+            self.tree.attach(_to_unsigned(node),
+                             None if parent is None else _to_unsigned(parent), distance)
+
+    def _stored(self, asset: str) -> Optional[Tuple[str, str, int]]:
+        row = self._conn.execute('SELECT filename, sha256, hash FROM images WHERE asset = ?',
+                                 (asset,)).fetchone()
+        return None if row is None else (row[0], row[1], _to_unsigned(row[2]))
+
+    def _known_hash(self, sha256: str) -> Optional[int]:
+        row = self._conn.execute('SELECT hash FROM images WHERE sha256 = ? LIMIT 1',
+                                 (sha256,)).fetchone()
+        return None if row is None else _to_unsigned(row[0])
+
+    def _insert(self, asset: str, filename: str, sha256: str, value: int) -> None:
+        self._conn.execute('INSERT OR REPLACE INTO images (asset, filename, sha256, hash) '
+                           'VALUES (?, ?, ?, ?)', (asset, filename, sha256, _to_signed(value)))
+        edge = self.tree.add(value)
+        if edge is not None:
+            parent, distance = edge
+            self._conn.execute('INSERT INTO nodes (hash, parent, distance) VALUES (?, ?, ?)',
+                               (_to_signed(value),
+                                None if parent is None else _to_signed(parent), distance))
+
+    def update(self, assets: Sequence[Tuple[Path, str]], jobs: int = 1) -> Dict[str, str]:
+        """Hash the given (asset_dir, filename) images where needed and index them.
+
+        Only files whose SHA-256 is not yet known are decoded, in a process
+        pool when jobs > 1. Returns the files that could not be hashed,
+        keyed by asset path, with the error.
+        """
+        pending = []
+        failures = {}
+
+        for asset_dir, filename in assets:
+            asset = str(Path(asset_dir).resolve())
+            try:
+                sha256 = hash_file_cached(Path(asset_dir) / filename, DEFAULT_ALGORITHMS,
+                                          self.digest_cache)['sha256']
+            except OSError as e:
+                failures[asset] = str(e)
+                continue
+
+            stored = self._stored(asset)
+            if stored is not None and stored[:2] == (filename, sha256):
+                continue
+
+            known = self._known_hash(sha256)
+            if known is not None:
+                self._insert(asset, filename, sha256, known)
+            else:
+                pending.append((asset, filename, sha256))
+
+        paths = [Path(asset) / filename for asset, filename, _ in pending]
+        if jobs > 1 and len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                hashes = list(pool.map(_safe_dhash, paths, chunksize=8))
+        else:
+            hashes = [_safe_dhash(path) for path in paths]
+
+        for (asset, filename, sha256), value in zip(pending, hashes):
+            if isinstance(value, str):
+                failures[asset] = value
+            else:
+                self._insert(asset, filename, sha256, value)
+
+        self._conn.commit()
+        return failures
+
+    def matches(self, asset_dir: Path, radius: int = NEAR_DUPLICATE_DISTANCE
+                ) -> List[Tuple[str, str, int]]:
+        """Return (asset, filename, distance) of other indexed images near an asset's.
+
+        Entries whose directory no longer exists are dropped as they turn up.
+        """
+        asset = str(Path(asset_dir).resolve())
+        stored = self._stored(asset)
+        if stored is None:
+            return []
+
+        found = []
+        for value, distance in self.tree.search(stored[2], radius):
+            for other, filename in self._conn.execute(
+                    'SELECT asset, filename FROM images WHERE hash = ? AND asset != ?',
+                    (_to_signed(value), asset)).fetchall():
+                if not os.path.exists(os.path.join(other, filename)):
+                    self._conn.execute('DELETE FROM images WHERE asset = ?', (other,))
+                    continue
+                found.append((other, filename, distance))
+
+        found.sort(key=lambda match: (match[2], match[0]))
+        return found
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+
+def _safe_dhash(path: Path):
+    """dHash of a file, or the error message if it cannot be decoded."""
+    try:
+        return image_dhash(path)
+    except Exception as e:
+        return f"could not hash {path.name}: {e}"
+
+
+def image_sources(asset_dirs: Sequence[Path]) -> Iterator[Tuple[Path, str]]:
+    """Yield (asset_dir, filename) of each image asset's primary raster file."""
+    for asset_dir in asset_dirs:
+        try:
+            with open(Path(asset_dir) / 'metadata.json', 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            continue
+        fmt = source_format(metadata) if isinstance(metadata, dict) else None
+        if fmt is not None and (Path(asset_dir) / fmt['filename']).is_file():
+            yield Path(asset_dir), fmt['filename']
+
+
+def _display_path(path: str) -> str:
+    """Show indexed (absolute) paths relative to the working directory when inside it."""
+    relative = os.path.relpath(path)
+    return path if relative.startswith('..') else relative
+
+
+def near_duplicate_warnings(index: NearDuplicateIndex, asset_dirs: Sequence[Path],
+                            jobs: int = 1) -> Dict[Path, List[str]]:
+    """Index the given image assets and describe each one's near-duplicates.
+
+    Matches are searched across everything in the index, i.e. the whole
+    library as of the latest run, not only asset_dirs.
+    """
+    sources = list(image_sources(asset_dirs))
+    index.update(sources, jobs)
+
+    warnings = {}
+    for asset_dir, filename in sources:
+        for other, other_filename, distance in index.matches(asset_dir):
+            warnings.setdefault(asset_dir, []).append(
+                f"Image {filename} looks like a near-duplicate of "
+                f"{_display_path(os.path.join(other, other_filename))} "
+                f"(perceptual hash distance {distance})"
+            )
+    return warnings
+
+
+def find_near_duplicates(asset_dirs: Sequence[Path], jobs: int, cache_dir: Optional[Path],
+                         use_cache: bool) -> Dict[Path, List[str]]:
+    """Open the persistent index, add asset_dirs to it and return their warnings.
+
+    Without the cache the index only lives for this call, so assets are
+    compared with each other rather than with the whole library.
+    """
+    digest_cache = None
+    if use_cache:
+        digest_cache = DigestCache(cache_dir / 'digests.sqlite' if cache_dir else None)
+        index = NearDuplicateIndex(cache_dir / 'phash.sqlite' if cache_dir else None,
+                                   digest_cache=digest_cache)
+    else:
+        index = NearDuplicateIndex(':memory:')
+
+    try:
+        return near_duplicate_warnings(index, asset_dirs, jobs)
+    finally:
+        index.close()
+        if digest_cache is not None:
+            digest_cache.close()
@@ -0,0 +1,171 @@
+"""
+Single-traversal asset pipeline: validate, checksum and catalog in one read.
+
+Each asset directory is processed once by a worker: metadata.json is read
+and parsed once, every file is opened once (the validation probe digests
+it with the checksum algorithms), and the results are handed back so that
+checksum files and the catalog can be written from memory.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from ual.cache import hash_file_cached
+from ual.catalog import apply_checksums, apply_media_info, asset_record
+from ual.checksums import ChecksumGenerator
+from ual.instrumentation import ASSET, span, timed
+from ual.media import MediaInfo
+from ual.validation import AssetValidator, ValidationResult, close_validator, create_validator
+
+
+@dataclass(frozen=True)
+class AssetOutcome:
+    """Everything the pipeline learned about one asset directory."""
+    path: Path
+    validation: ValidationResult
+    # Parsed metadata.json, or None if it could not be read or parsed
+    metadata: Optional[Any] = None
+    metadata_stat: Optional[os.stat_result] = None
+    # Digests and size of every non-excluded file in the directory
+    checksums: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    has_checksum_file: bool = False
+    # Header-probed stream properties of video and audio files, by filename
+    media: Dict[str, MediaInfo] = field(default_factory=dict)
+
+
+def _read_metadata(metadata_file: Path):
+    """Read and parse metadata.json once; (None, None) if that fails."""
+    try:
+        with span('json.parse'), open(metadata_file, 'rb') as f:
+            file_stat = os.fstat(f.fileno())
+            return json.loads(f.read()), file_stat
+    except (OSError, ValueError):
+        # The validator reports the problem when it reads the file itself
+        return None, None
+
+
+def process_asset(validator: AssetValidator, asset_path: Path,
+                  algorithms: Sequence[str]) -> AssetOutcome:
+    """Validate one asset and digest all of its files, reading each once."""
+    with span('pipeline.asset', ASSET, asset=str(asset_path)):
+        metadata, metadata_stat = _read_metadata(asset_path / 'metadata.json')
+        validation = validator.validate_asset(asset_path, metadata)
+
+        checksums = {}
+        has_checksum_file = False
+        try:
+            entries = sorted(os.scandir(asset_path), key=lambda entry: entry.name)
+        except OSError:
+            entries = []
+
+        for entry in entries:
+            if entry.name == 'checksums.txt':
+                has_checksum_file = True
+            if not entry.is_file() or entry.name in ChecksumGenerator.EXCLUDED_FILES:
+                continue
+
+            # Files listed in metadata were already digested by the validation probe
+            probe = validator.probes.get(entry.name)
+            if probe is not None and all(algorithm in probe.digests for algorithm in algorithms):
+                digests = {algorithm: probe.digests[algorithm] for algorithm in algorithms}
+                size = probe.size
+            else:
+                try:
+                    digests = hash_file_cached(Path(entry.path), algorithms, validator.digest_cache)
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+
+            checksums[entry.name] = {**digests, 'size': size}
+
+        return AssetOutcome(asset_path, validation, metadata, metadata_stat,
+                            checksums, has_checksum_file, validation.media)
+
+
+# Each worker process owns one validator, with its own libmagic handle
+# and cache connections
+_worker_validator: Optional[AssetValidator] = None
+_worker_algorithms: Sequence[str] = ()
+
+
+def _init_worker(cache_dir: Optional[Path], use_cache: bool, paranoid: bool,
+                 algorithms: Sequence[str]) -> None:
+    global _worker_validator, _worker_algorithms
+    _worker_validator = create_validator(cache_dir, use_cache, paranoid, algorithms)
+    _worker_algorithms = algorithms
+    # Flush batched cache writes when the worker exits
+    Finalize(None, close_validator, args=(_worker_validator,), exitpriority=10)
+
+
+def _process_in_worker(asset_path: Path) -> AssetOutcome:
+    return process_asset(_worker_validator, asset_path, _worker_algorithms)
+
+
+def process_assets(asset_paths: List[Path], jobs: int, algorithms: Sequence[str],
+                   cache_dir: Optional[Path], use_cache: bool,
+                   paranoid: bool) -> Iterator[AssetOutcome]:
+    """Process assets, in a process pool when jobs > 1, yielding outcomes in input order."""
+    algorithms = tuple(algorithms)
+
+    if jobs <= 1 or len(asset_paths) <= 1:
+        validator = create_validator(cache_dir, use_cache, paranoid, algorithms)
+        try:
+            for asset_path in asset_paths:
+                yield process_asset(validator, asset_path, algorithms)
+        finally:
+            close_validator(validator)
+        return
+
+    chunksize = max(1, min(16, len(asset_paths) // (jobs * 8)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(cache_dir, use_cache, paranoid, algorithms)) as pool:
+        yield from pool.map(_process_in_worker, asset_paths, chunksize=chunksize)
+
+
+@timed('checksums.write')
+def write_checksum_files(outcomes: Sequence[AssetOutcome], algorithms: Sequence[str],
+                         force: bool = False, update_metadata: bool = False) -> List[Path]:
+    """Write checksums.txt from the digests already computed; return the assets written.
+
+    Assets that have a checksum file are skipped unless force is set. With
+    update_metadata the checksums are also stored in metadata.json.
+    """
+    generator = ChecksumGenerator(algorithms=algorithms)
+    written = []
+
+    for outcome in outcomes:
+        if outcome.has_checksum_file and not force:
+            continue
+        if not outcome.checksums:
+            continue
+
+        generator.write_checksum_file(outcome.path, outcome.checksums)
+        written.append(outcome.path)
+
+        if update_metadata and isinstance(outcome.metadata, dict):
+            generator.update_metadata_checksums(outcome.path, outcome.checksums,
+                                                metadata=outcome.metadata)
+
+    return written
+
+
+def catalog_record(outcome: AssetOutcome, assets_root: Path,
+                   refresh_stat: bool = False) -> Dict[str, Any]:
+    """Build an asset's catalog record from the metadata already in memory.
+
+    refresh_stat re-stats metadata.json, for when it has just been rewritten.
+    """
+    metadata_stat = outcome.metadata_stat
+    if refresh_stat:
+        metadata_stat = (outcome.path / 'metadata.json').stat()
+
+    record = asset_record(outcome.metadata, os.path.relpath(outcome.path, assets_root),
+                          metadata_stat)
+    apply_media_info(record, outcome.media)
+    apply_checksums(record, outcome.checksums)
+    return record
@@ -0,0 +1,107 @@
+"""
+Single-open file probing for validation.
+
+A file is opened once: the leading bytes are handed to libmagic, the same
+handle is rewound for PIL to parse the image header (or for ual.media to
+walk video and audio container headers), and the rest of the file is
+streamed into the requested digests after the already-read head.
+"""
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Sequence, Tuple
+
+from PIL import Image, UnidentifiedImageError
+
+from ual.cache import DigestCache
+from ual.hashing import BUFFER_SIZE, MultiHasher, hash_stream
+from ual.instrumentation import HASH, span
+from ual.media import MediaInfo, MediaProbeError, MediaUnsupportedError, probe_media_stream
+
+# libmagic looks at most this far into a file by default
+HEAD_SIZE = BUFFER_SIZE
+
+
+@dataclass(frozen=True)
+class FileProbe:
+    """What a single pass over a file revealed."""
+    size: int
+    mimetype: Optional[str] = None
+    mime_error: Optional[str] = None
+    dimensions: Optional[Tuple[int, int]] = None
+    image_error: Optional[str] = None
+    media: Optional[MediaInfo] = None
+    media_error: Optional[str] = None
+    digests: Dict[str, str] = field(default_factory=dict)
+
+
+def _digest_rest(f: BinaryIO, head: bytes, algorithms: Sequence[str],
+                 file_path: Path) -> Dict[str, str]:
+    """Digest a file whose first len(head) bytes have already been read."""
+    hasher = MultiHasher(algorithms)
+    with span('hash.file', HASH, file=str(file_path)) as timed:
+        hasher.update(head)
+        f.seek(len(head))
+        hash_stream(f, hasher)
+        timed.set(bytes=hasher.bytes_hashed)
+    return hasher.hexdigests()
+
+
+def probe_file(file_path: Path, file_magic: Any, algorithms: Sequence[str] = (),
+               inspect_image: bool = False, inspect_media: bool = False,
+               digest_cache: Optional[DigestCache] = None) -> FileProbe:
+    """Sniff the MIME type, optionally read image or media headers and digest a file.
+
+    file_magic is a ``magic.Magic(mime=True)`` handle. Digests come from
+    digest_cache when it knows the file, in which case only the head is read.
+    """
+    with open(file_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        head = f.read(HEAD_SIZE)
+
+        mimetype = mime_error = None
+        try:
+            with span('probe.magic'):
+                mimetype = file_magic.from_buffer(head)
+        except Exception as e:
+            mime_error = str(e)
+
+        dimensions = image_error = None
+        if inspect_image:
+            f.seek(0)
+            try:
+                # Only the header is parsed; PIL leaves a passed-in handle open
+                with span('probe.image'), Image.open(f) as img:
+                    dimensions = img.size
+            except UnidentifiedImageError:
+                # PIL would name the handle rather than the file
+                image_error = f"cannot identify image file {str(file_path)!r}"
+            except Exception as e:
+                image_error = str(e)
+
+        media = media_error = None
+        if inspect_media:
+            try:
+                with span('probe.media'):
+                    media = probe_media_stream(f, Path(file_path), st.st_size)
+            except MediaUnsupportedError:
+                # Nothing can read this container here; leave it unchecked
+                pass
+            except MediaProbeError as e:
+                media_error = str(e)
+
+        digests = {}
+        if algorithms:
+            if digest_cache is None:
+                digests = _digest_rest(f, head, algorithms, file_path)
+            else:
+                digests = digest_cache.get_or_compute(
+                    st, algorithms,
+                    lambda: _digest_rest(f, head, algorithms, file_path),
+                    lambda: os.fstat(f.fileno())
+                )
+
+    return FileProbe(size=st.st_size, mimetype=mimetype, mime_error=mime_error,
+                     dimensions=dimensions, image_error=image_error,
+                     media=media, media_error=media_error, digests=digests)
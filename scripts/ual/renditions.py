@@ -0,0 +1,258 @@
+"""
+Responsive image renditions (thumbnails and downscaled widths).
+
+Renditions are derived from an image asset's primary raster format and
+written to a ``renditions/`` subdirectory of the asset, which validation,
+checksum generation and catalog discovery do not descend into. Each one is
+recorded in metadata.json under ``renditions`` together with the SHA-256 of
+the source it was made from, so unchanged sources are skipped. The same
+list is written to ``renditions/renditions.json``, so a renditions
+directory restored without its metadata record (as from a CI cache) is
+adopted rather than rendered again.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageOps
+
+from ual.cache import DigestCache, hash_file_cached
+from ual.hashing import DEFAULT_ALGORITHMS, hash_file
+from ual.instrumentation import ASSET, span, timed
+
+RENDITIONS_DIR = 'renditions'
+MANIFEST_NAME = 'renditions.json'
+
+# Sources Pillow can decode; vector formats (SVG) have no renditions
+RASTER_MIMETYPES = ('image/jpeg', 'image/png', 'image/webp', 'image/gif', 'image/tiff')
+
+THUMBNAIL_WIDTH = 320
+RESPONSIVE_WIDTHS = (640, 1280, 1920)
+
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+MIMETYPES = {'webp': 'image/webp', 'avif': 'image/avif'}
+
+EXIF_ORIENTATION = 0x0112
+
+
+@dataclass(frozen=True)
+class RenditionSpec:
+    """One derivative to produce from a source image."""
+    role: str
+    width: int
+    format: str
+
+    def filename(self, source: str) -> str:
+        stem = Path(source).stem
+        suffix = 'thumb' if self.role == 'thumbnail' else f"{self.width}w"
+        return f"{RENDITIONS_DIR}/{stem}-{suffix}.{self.format}"
+
+
+def avif_supported() -> bool:
+    """Whether this Pillow build can encode AVIF."""
+    Image.init()
+    return 'AVIF' in Image.SAVE
+
+
+def default_specs() -> List[RenditionSpec]:
+    """WebP (and, when available, AVIF) thumbnails plus responsive WebP widths."""
+    formats = ['webp', 'avif'] if avif_supported() else ['webp']
+    specs = [RenditionSpec('thumbnail', THUMBNAIL_WIDTH, fmt) for fmt in formats]
+    specs.extend(RenditionSpec('responsive', width, 'webp') for width in RESPONSIVE_WIDTHS)
+    return specs
+
+
+def source_format(metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the format entry renditions are derived from, if any."""
+    if metadata.get('type') != 'image':
+        return None
+    for fmt in metadata.get('formats', []):
+        if fmt.get('mimetype') in RASTER_MIMETYPES and fmt.get('filename'):
+            return fmt
+    return None
+
+
+def plan_specs(specs: Sequence[RenditionSpec], source_width: int) -> List[RenditionSpec]:
+    """Drop responsive widths that would upscale the source."""
+    return [
+        spec for spec in specs
+        if spec.role == 'thumbnail' or spec.width < source_width
+    ]
+
+
+def _is_current(asset_dir: Path, existing: List[Dict[str, Any]], source: str,
+                source_sha256: str, planned: List[RenditionSpec]) -> bool:
+    """Whether recorded renditions match the source digest and the plan."""
+    recorded = {
+        entry.get('filename'): entry for entry in existing
+        if entry.get('source') == source and entry.get('source_sha256') == source_sha256
+    }
+    if set(recorded) != {spec.filename(source) for spec in planned}:
+        return False
+
+    for filename, entry in recorded.items():
+        try:
+            if (asset_dir / filename).stat().st_size != entry.get('size'):
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _is_rotated(img: Image.Image) -> bool:
+    """Whether EXIF orientation swaps the stored width and height."""
+    return img.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8)
+
+
+def display_size(img: Image.Image) -> Tuple[int, int]:
+    """Image size after EXIF orientation, from the header alone."""
+    return (img.height, img.width) if _is_rotated(img) else img.size
+
+
+@timed('image.decode')
+def _load_for_width(img: Image.Image, width: int) -> Image.Image:
+    """Decode img at the smallest scale that still covers width.
+
+    For JPEG, draft() makes the decoder do the downscaling (DCT scaling);
+    then reduce() does a fast integer box downscale while the image is
+    still well above the target, leaving the final resize little to do.
+    """
+    rotated = _is_rotated(img)
+    source_width, source_height = display_size(img)
+    height = max(1, round(source_height * width / source_width))
+    if img.format == 'JPEG':
+        img.draft('RGB', (height, width) if rotated else (width, height))
+
+    img = ImageOps.exif_transpose(img)
+    factor = min(img.width // width, img.height // height) // 2
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img
+
+
+@timed('image.encode')
+def _save(img: Image.Image, path: Path, fmt: str) -> None:
+    tmp_path = path.with_name(path.name + '.tmp')
+    if fmt == 'avif':
+        img.save(tmp_path, 'AVIF', quality=AVIF_QUALITY)
+    else:
+        img.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+    os.replace(tmp_path, path)
+
+
+def render_source(asset_dir: Path, source: str, source_sha256: str,
+                  planned: List[RenditionSpec]) -> List[Dict[str, Any]]:
+    """Write every planned rendition of one source and describe them."""
+    (asset_dir / RENDITIONS_DIR).mkdir(exist_ok=True)
+    largest = max(spec.width for spec in planned)
+    entries = []
+
+    with Image.open(asset_dir / source) as img:
+        base = _load_for_width(img, largest)
+        if base.mode not in ('RGB', 'RGBA'):
+            base = base.convert('RGBA' if 'A' in base.getbands() or 'transparency' in base.info
+                                else 'RGB')
+
+        for spec in sorted(planned, key=lambda spec: -spec.width):
+            width = min(spec.width, base.width)
+            height = max(1, round(base.height * width / base.width))
+            rendition = base if width == base.width else base.resize(
+                (width, height), Image.LANCZOS, reducing_gap=3.0
+            )
+
+            filename = spec.filename(source)
+            path = asset_dir / filename
+            _save(rendition, path, spec.format)
+
+            entries.append({
+                'role': spec.role,
+                'format': spec.format,
+                'filename': filename,
+                'mimetype': MIMETYPES[spec.format],
+                'size': path.stat().st_size,
+                'dimensions': {'width': rendition.width, 'height': rendition.height},
+                'checksum': hash_file(path, DEFAULT_ALGORITHMS),
+                'source': source,
+                'source_sha256': source_sha256,
+            })
+
+    # Keep a stable order in metadata.json: thumbnails first, then by width
+    entries.sort(key=lambda entry: (entry['role'] != 'thumbnail',
+                                    entry['dimensions']['width'], entry['format']))
+    write_manifest(asset_dir, entries)
+    return entries
+
+
+def write_manifest(asset_dir: Path, renditions: List[Dict[str, Any]]) -> None:
+    """Record the renditions list next to the files it describes."""
+    path = asset_dir / RENDITIONS_DIR / MANIFEST_NAME
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(renditions, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(asset_dir: Path) -> List[Dict[str, Any]]:
+    """Return the renditions list stored with the files, or [] if unreadable."""
+    try:
+        with open(asset_dir / RENDITIONS_DIR / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            renditions = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return renditions if isinstance(renditions, list) else []
+
+
+def renditions_for_asset(asset_dir: Path, metadata: Dict[str, Any],
+                         specs: Sequence[RenditionSpec], force: bool = False,
+                         digest_cache: Optional[DigestCache] = None
+                         ) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+    """Bring one asset's renditions up to date.
+
+    Returns a status ('skipped', 'current', 'restored' or 'rendered') and,
+    when restored from the manifest or rendered, the new ``renditions`` list
+    for metadata.json.
+    """
+    with span('renditions.asset', ASSET, asset=str(asset_dir)):
+        fmt = source_format(metadata)
+        if fmt is None:
+            return 'skipped', None
+
+        source = fmt['filename']
+        source_path = asset_dir / source
+        source_sha256 = hash_file_cached(source_path, DEFAULT_ALGORITHMS, digest_cache)['sha256']
+
+        # Opening only parses the header, which is all the plan needs
+        with Image.open(source_path) as img:
+            source_width = display_size(img)[0]
+        planned = plan_specs(specs, source_width)
+
+        existing = metadata.get('renditions', [])
+        if not force and _is_current(asset_dir, existing, source, source_sha256, planned):
+            return 'current', None
+
+        # Files already on disk but not recorded in this metadata.json
+        restored = [] if force else read_manifest(asset_dir)
+        if restored and _is_current(asset_dir, restored, source, source_sha256, planned):
+            return 'restored', restored
+
+        return 'rendered', render_source(asset_dir, source, source_sha256, planned)
+
+
+def remove_stale_files(asset_dir: Path, renditions: List[Dict[str, Any]]) -> int:
+    """Delete files in the renditions directory that are no longer recorded."""
+    directory = asset_dir / RENDITIONS_DIR
+    keep = {Path(entry['filename']).name for entry in renditions} | {MANIFEST_NAME}
+    removed = 0
+
+    if not directory.is_dir():
+        return 0
+    for path in directory.iterdir():
+        if path.is_file() and path.name not in keep:
+            path.unlink()
+            removed += 1
+    return removed
@@ -0,0 +1,233 @@
+"""
+Prebuilt full-text search index for the asset catalog.
+
+The index is an inverted index over a few text fields of each asset.
+Postings reference an asset's position in ``catalog/index.json`` (which
+uses the same id-sorted order as ``catalog/assets.json``), so a search is
+a dictionary lookup instead of a scan over every asset.
+
+Serialized layout::
+
+    {
+      "version": 1,
+      "fields": ["title", "description", "tags", "category", "creator.name"],
+      "documents": 150,
+      "terms": ["abstract", "blue", ...],        # sorted by code point, for prefix search
+      "postings": [[0, 5, 3, 1], [12, 4], ...]   # per term: doc delta, field mask, ...
+    }
+
+Each posting list is a flat sequence of (doc position delta, field bitmask)
+pairs; bit ``i`` of the mask is set when the term occurs in ``fields[i]``.
+"""
+
+import bisect
+import json
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+INDEX_VERSION = 1
+
+# Indexed fields, in bitmask order
+SEARCH_FIELDS = ['title', 'description', 'tags', 'category', 'creator.name']
+
+# Relevance weight of a match in each field, in SEARCH_FIELDS order
+FIELD_WEIGHTS = [4, 1, 3, 2, 1]
+
+
+class _CharTable(dict):
+    """str.translate table that maps each character by its Unicode category.
+
+    Filled on demand, as most text only ever uses a few hundred characters.
+    """
+
+    def __init__(self, replace: Callable[[str, str], str]):
+        super().__init__()
+        self.replace = replace
+
+    def __missing__(self, code: int) -> str:
+        char = chr(code)
+        value = self[code] = self.replace(char, unicodedata.category(char)[0])
+        return value
+
+
+# The same character classes as \p{M} and [\p{L}\p{N}] in index.html
+_STRIP_MARKS = _CharTable(lambda char, category: '' if category == 'M' else char)
+_SEPARATE = _CharTable(lambda char, category: char if category in 'LN' else ' ')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase, accent-folded word tokens.
+
+    Mirrors the tokenizer used by index.html step by step (NFKD, drop
+    marks, lowercase, split on anything but letters and numbers), so both
+    sides agree on terms.
+    """
+    folded = unicodedata.normalize('NFKD', text).translate(_STRIP_MARKS).lower()
+    return folded.translate(_SEPARATE).split()
+
+
+def _field_values(asset: Dict[str, Any]) -> List[str]:
+    """Return the raw text of each indexed field, in SEARCH_FIELDS order."""
+    creator = asset.get('creator') or {}
+    return [
+        asset.get('title') or '',
+        asset.get('description') or '',
+        ' '.join(asset.get('tags') or []),
+        asset.get('category') or '',
+        (creator.get('name') or '') if isinstance(creator, dict) else ''
+    ]
+
+
+def document_terms(asset: Dict[str, Any]) -> Dict[str, int]:
+    """Return {term: field mask} for the indexed text of one asset."""
+    terms: Dict[str, int] = {}
+    for field_bit, text in enumerate(_field_values(asset)):
+        mask = 1 << field_bit
+        for term in tokenize(text):
+            terms[term] = terms.get(term, 0) | mask
+    return terms
+
+
+class SearchIndexBuilder:
+    """Accumulate postings while the catalog builder walks the sorted assets.
+
+    Documents are keyed by their position in the id-sorted catalog. A
+    long-lived index can key them by something stable instead (such as the
+    asset path) and set positions to map keys to catalog positions before
+    each to_document(); documents can then be removed and added one at a
+    time, and only the posting lists of the terms they touch are encoded
+    again.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self.documents = 0
+        self.positions: Optional[Dict[Hashable, int]] = None
+        # Encoded posting lists of a keyed index, valid for _encoded_positions
+        self._encoded: Dict[str, List[int]] = {}
+        self._encoded_positions: Optional[Dict[Hashable, int]] = None
+
+    def add(self, key: Hashable, asset: Dict[str, Any]) -> None:
+        """Index one asset, by default under its position in the id-sorted catalog."""
+        for term, mask in document_terms(asset).items():
+            self._postings.setdefault(term, {})[key] = mask
+            if self._encoded:
+                self._encoded.pop(term, None)
+
+        self.documents += 1
+
+    def remove(self, key: Hashable, asset: Dict[str, Any]) -> None:
+        """Drop a document; asset must be the record it was added with."""
+        for term in document_terms(asset):
+            docs = self._postings[term]
+            del docs[key]
+            if not docs:
+                del self._postings[term]
+            self._encoded.pop(term, None)
+
+        self.documents -= 1
+
+    def to_document(self) -> Dict[str, Any]:
+        """Serialize the index into its compact JSON layout."""
+        positions = self.positions
+        if positions != self._encoded_positions:
+            self._encoded = {}
+            self._encoded_positions = positions
+
+        terms = sorted(self._postings)
+        postings = []
+
+        for term in terms:
+            flat = self._encoded.get(term)
+            if flat is None:
+                docs = self._postings[term]
+                if positions is not None:
+                    docs = {positions[key]: mask for key, mask in docs.items()}
+                flat = []
+                previous = 0
+                for position in sorted(docs):
+                    flat.append(position - previous)
+                    flat.append(docs[position])
+                    previous = position
+                if positions is not None:
+                    self._encoded[term] = flat
+            postings.append(flat)
+
+        return {
+            'version': INDEX_VERSION,
+            'fields': SEARCH_FIELDS,
+            'documents': self.documents,
+            'terms': terms,
+            'postings': postings
+        }
+
+
+class SearchIndex:
+    """Query a serialized search index."""
+
+    def __init__(self, document: Dict[str, Any]):
+        if document.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported search index version: {document.get('version')}")
+
+        self.terms: List[str] = document['terms']
+        self._postings: List[List[int]] = document['postings']
+        self.documents: int = document['documents']
+
+    @classmethod
+    def load(cls, path: Path) -> 'SearchIndex':
+        """Load an index written by the catalog builder."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _decode(self, term_id: int) -> Iterable[Tuple[int, int]]:
+        flat = self._postings[term_id]
+        position = 0
+        for i in range(0, len(flat), 2):
+            position += flat[i]
+            yield position, flat[i + 1]
+
+    def lookup(self, token: str, prefix: bool = False) -> Dict[int, int]:
+        """Return {position: field mask} for a term, or all terms it prefixes."""
+        start = bisect.bisect_left(self.terms, token)
+        matches: Dict[int, int] = {}
+
+        for term_id in range(start, len(self.terms)):
+            term = self.terms[term_id]
+            if term != token and not (prefix and term.startswith(token)):
+                break
+            for position, mask in self._decode(term_id):
+                matches[position] = matches.get(position, 0) | mask
+
+        return matches
+
+    def search(self, query: str, prefix: bool = True) -> List[int]:
+        """Return catalog positions matching every query token, best first.
+
+        With prefix=True each token also matches longer terms, which gives
+        search-as-you-type behaviour.
+        """
+        scores: Dict[int, int] = {}
+
+        for number, token in enumerate(tokenize(query)):
+            matches = self.lookup(token, prefix=prefix)
+            if number > 0:
+                matches = {position: mask for position, mask in matches.items()
+                           if position in scores}
+
+            scores = {
+                position: scores.get(position, 0) + _mask_weight(mask)
+                for position, mask in matches.items()
+            }
+            if not scores:
+                break
+
+        return sorted(scores, key=lambda position: (-scores[position], position))
+
+
+def _mask_weight(mask: int) -> int:
+    """Score a match by the best field it occurred in."""
+    return max(
+        (weight for bit, weight in enumerate(FIELD_WEIGHTS) if mask & (1 << bit)),
+        default=0
+    )
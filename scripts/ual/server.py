@@ -0,0 +1,528 @@
+"""
+Local query server for the built catalog.
+
+CatalogQueryIndex loads catalog/assets.json (and search-index.json when
+present) into memory: a position per asset in the catalog's id order, a
+posting list of positions per facet value (type, category, license,
+creator, tag) and a precomputed order per sort key and direction, with
+ties in id order either way. A filtered query
+intersects the posting lists, smallest first; a sorted page either sorts
+the matches by their precomputed rank or, for broad filters, walks the
+presorted order, so no query scans the raw records.
+
+CatalogServer serves the query API under /api/ and every other path as a
+static file from a site root, like GitHub Pages (precompressed .br/.gz
+sidecars are used when the client accepts them). Responses carry strong
+ETags and honour If-None-Match; API responses are gzip-encoded when
+accepted. A background thread reloads the index when the catalog files
+change, swapping it in only once it has loaded completely.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+
+import click
+
+from ual.instrumentation import span, timed
+from ual.search import SearchIndex
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+
+# Facet name -> values of an asset
+FACETS: Dict[str, Callable[[Dict[str, Any]], Iterable[Any]]] = {
+    'type': lambda asset: [asset.get('type')],
+    'category': lambda asset: [asset.get('category', 'uncategorized')],
+    'license': lambda asset: [(asset.get('license') or {}).get('type', 'unknown')],
+    'creator': lambda asset: [(asset.get('creator') or {}).get('name', 'unknown')],
+    'tag': lambda asset: asset.get('tags') or [],
+}
+
+# Sort key name -> value of an asset; ties keep id order
+SORT_KEYS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    'id': lambda asset: asset.get('id') or '',
+    'title': lambda asset: (asset.get('title') or '').casefold(),
+    'size': lambda asset: asset.get('_total_size', 0),
+    'modified': lambda asset: asset.get('_last_modified') or '',
+    'created': lambda asset: asset.get('created') or '',
+}
+
+# Rendered API responses kept per loaded catalog
+RESPONSE_CACHE_SIZE = 256
+
+# Bodies smaller than this are not worth compressing
+MIN_GZIP_SIZE = 1024
+
+# Text files above this size are sent uncompressed rather than gzipped in memory
+MAX_GZIP_FILE_SIZE = 32 * 1024 * 1024
+
+COMPRESSIBLE_TYPES = {'application/json', 'application/javascript', 'image/svg+xml',
+                      'application/xml'}
+
+
+class QueryError(ValueError):
+    """A query parameter is invalid; reported as 400 Bad Request."""
+
+
+class CatalogQueryIndex:
+    """In-memory indexes over one version of the catalog."""
+
+    def __init__(self, catalog: Dict[str, Any], version: str,
+                 search_index: Optional[SearchIndex] = None):
+        self.version = version
+        self.generated = catalog.get('generated')
+        # assets.json is already sorted by id
+        self.assets: List[Dict[str, Any]] = catalog.get('assets', [])
+        self.by_id = {asset.get('id'): position for position, asset in enumerate(self.assets)}
+
+        # Search postings are positions in the same order, if built with it
+        if search_index is not None and search_index.documents != len(self.assets):
+            search_index = None
+        self.search_index = search_index
+
+        self.postings: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        for position, asset in enumerate(self.assets):
+            for facet, values in FACETS.items():
+                for value in set(values(asset)):
+                    if value is not None:
+                        self.postings[facet].setdefault(str(value), []).append(position)
+
+        self.orders: Dict[str, List[int]] = {}
+        self.ranks: Dict[str, List[int]] = {}
+        for name, key in SORT_KEYS.items():
+            keys = [key(asset) for asset in self.assets]
+            # sorted() is stable with reverse=True too, so equal keys stay in
+            # id order when descending instead of being reversed with the rest
+            for sort, descending in ((name, False), ('-' + name, True)):
+                order = sorted(range(len(self.assets)), key=keys.__getitem__,
+                               reverse=descending)
+                rank = [0] * len(order)
+                for number, position in enumerate(order):
+                    rank[position] = number
+                self.orders[sort] = order
+                self.ranks[sort] = rank
+
+        # route -> [body, gzip-encoded body or None until first asked for]
+        self._responses: 'OrderedDict[str, List[Optional[bytes]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    @timed('server.load')
+    def load(cls, catalog_dir: Path) -> 'CatalogQueryIndex':
+        """Load assets.json and, if present, search-index.json from a catalog directory."""
+        catalog_dir = Path(catalog_dir)
+        with open(catalog_dir / 'assets.json', 'rb') as f:
+            data = f.read()
+        version = hashlib.sha256(data)
+
+        search_index = None
+        search_path = catalog_dir / 'search-index.json'
+        if search_path.exists():
+            with open(search_path, 'rb') as f:
+                search_data = f.read()
+            version.update(search_data)
+            search_index = SearchIndex(json.loads(search_data))
+
+        return cls(json.loads(data), version.hexdigest(), search_index)
+
+    def select(self, filters: Dict[str, List[str]], q: Optional[str] = None
+               ) -> Tuple[Optional[Set[int]], Optional[List[int]]]:
+        """Positions matching every facet filter (any of a facet's values) and q.
+
+        Returns (matches, relevance): matches is None when nothing filters;
+        relevance is the search order when q is given.
+        """
+        candidates = []
+        for facet, values in filters.items():
+            postings = self.postings[facet]
+            if len(values) == 1:
+                candidates.append(postings.get(values[0], []))
+            else:
+                candidates.append(sorted({position for value in values
+                                          for position in postings.get(value, [])}))
+
+        relevance = None
+        if q:
+            if self.search_index is None:
+                raise QueryError("q needs the catalog's search index (build with --search-index)")
+            relevance = self.search_index.search(q)
+            candidates.append(relevance)
+
+        if not candidates:
+            return None, None
+
+        candidates.sort(key=len)
+        matches = set(candidates[0])
+        for positions in candidates[1:]:
+            if not matches:
+                break
+            matches.intersection_update(positions)
+        return matches, relevance
+
+    def ordered(self, matches: Optional[Set[int]], sort: str,
+                relevance: Optional[List[int]] = None) -> List[int]:
+        """Matching positions in the requested order."""
+        if sort == 'relevance':
+            return [position for position in relevance if position in matches]
+
+        if matches is None:
+            return self.orders[sort]
+        if len(matches) * 4 < len(self.assets):
+            return sorted(matches, key=self.ranks[sort].__getitem__)
+        return [position for position in self.orders[sort] if position in matches]
+
+    def query(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Answer /api/assets: filter, sort and paginate."""
+        filters, q = _filters(params)
+        sort = _single(params, 'sort', 'relevance' if q else 'id')
+        if sort != 'relevance' and sort not in self.orders:
+            raise QueryError(f"unknown sort key: {sort}")
+        if sort == 'relevance' and not q:
+            raise QueryError("sort=relevance needs q")
+        limit = _integer(params, 'limit', DEFAULT_LIMIT, 1, MAX_LIMIT)
+        offset = _integer(params, 'offset', 0, 0, None)
+
+        matches, relevance = self.select(filters, q)
+        order = self.ordered(matches, sort, relevance)
+        return {
+            'generated': self.generated,
+            'total': len(order),
+            'offset': offset,
+            'limit': limit,
+            'sort': sort,
+            'assets': [self.assets[position] for position in order[offset:offset + limit]],
+        }
+
+    def facets(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Answer /api/facets: value counts of every facet among the matching assets."""
+        filters, q = _filters(params)
+        matches, _ = self.select(filters, q)
+        counts = {}
+        for facet, postings in self.postings.items():
+            if matches is None:
+                values = {value: len(positions) for value, positions in postings.items()}
+            else:
+                values = {value: count for value, positions in postings.items()
+                          if (count := len(matches.intersection(positions)))}
+            counts[facet] = dict(sorted(values.items(), key=lambda item: (-item[1], item[0])))
+        return {
+            'generated': self.generated,
+            'total': len(self.assets) if matches is None else len(matches),
+            'facets': counts,
+        }
+
+    def asset(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        position = self.by_id.get(asset_id)
+        return None if position is None else self.assets[position]
+
+    def etag(self, route: str) -> str:
+        """Strong ETag of an API response: the catalog version and the canonical request."""
+        digest = hashlib.sha256(f"{self.version}\0{route}".encode('utf-8')).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def render(self, route: str, build: Callable[[], Dict[str, Any]],
+               gzipped: bool = False) -> Tuple[bytes, bool]:
+        """Serialize a response, reusing it while the same catalog is loaded.
+
+        Returns the body and whether it is gzip-encoded, which it is when
+        gzipped is set and the body is large enough to benefit.
+        """
+        with self._lock:
+            entry = self._responses.get(route)
+            if entry is not None:
+                self._responses.move_to_end(route)
+
+        if entry is None:
+            body = json.dumps(build(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            entry = [body, None]
+            with self._lock:
+                self._responses[route] = entry
+                if len(self._responses) > RESPONSE_CACHE_SIZE:
+                    self._responses.popitem(last=False)
+
+        if not gzipped or len(entry[0]) < MIN_GZIP_SIZE:
+            return entry[0], False
+        if entry[1] is None:
+            # mtime=0 keeps the encoded bytes stable
+            entry[1] = gzip.compress(entry[0], compresslevel=6, mtime=0)
+        return entry[1], True
+
+
+def _filters(params: Dict[str, List[str]]) -> Tuple[Dict[str, List[str]], Optional[str]]:
+    filters = {facet: params[facet] for facet in FACETS if params.get(facet)}
+    return filters, _single(params, 'q', None)
+
+
+def _single(params: Dict[str, List[str]], name: str, default: Optional[str]) -> Optional[str]:
+    values = params.get(name)
+    if not values:
+        return default
+    if len(values) > 1:
+        raise QueryError(f"{name} may only be given once")
+    return values[0]
+
+
+def _integer(params: Dict[str, List[str]], name: str, default: int,
+             minimum: int, maximum: Optional[int]) -> int:
+    value = _single(params, name, None)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer") from None
+    if number < minimum or (maximum is not None and number > maximum):
+        bounds = f"at least {minimum}" if maximum is None else f"between {minimum} and {maximum}"
+        raise QueryError(f"{name} must be {bounds}")
+    return number
+
+
+def canonical_query(query: str) -> Tuple[Dict[str, List[str]], str]:
+    """Parse a query string; also return it in a canonical (sorted) form for caching."""
+    pairs = sorted(parse_qsl(query, keep_blank_values=False))
+    params: Dict[str, List[str]] = {}
+    for name, value in pairs:
+        params.setdefault(name, []).append(value)
+    return params, urlencode(pairs)
+
+
+def _accepts(header: Optional[str], coding: str) -> bool:
+    """Whether an Accept-Encoding header accepts a content coding (q=0 refuses it)."""
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        if name.strip().lower() in (coding, '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(candidate.strip().removeprefix('W/') == etag for candidate in header.split(','))
+
+
+class CatalogServer(ThreadingHTTPServer):
+    """HTTP server holding the current CatalogQueryIndex and a static site root."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], catalog_dir: Path, site_root: Path,
+                 reload_interval: float = 1.0, quiet: bool = False):
+        self.catalog_dir = Path(catalog_dir)
+        self.site_root = Path(site_root).resolve()
+        self.reload_interval = reload_interval
+        self.quiet = quiet
+        self._signature = self._catalog_signature()
+        self.index = CatalogQueryIndex.load(self.catalog_dir)
+        self._stopped = threading.Event()
+        super().__init__(address, partial(CatalogRequestHandler,
+                                          directory=os.fspath(self.site_root)))
+
+    def _catalog_signature(self) -> Tuple:
+        signature = []
+        for name in ('assets.json', 'search-index.json'):
+            try:
+                st = os.stat(self.catalog_dir / name)
+                signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _watch_catalog(self) -> None:
+        """Reload the index whenever the catalog files change."""
+        while not self._stopped.wait(self.reload_interval):
+            signature = self._catalog_signature()
+            if signature == self._signature:
+                continue
+            try:
+                index = CatalogQueryIndex.load(self.catalog_dir)
+            except (OSError, ValueError) as e:
+                # Probably caught between two writes; retry next round
+                click.echo(f"Warning: Could not reload catalog: {e}", err=True)
+                continue
+            self._signature = signature
+            self.index = index
+            click.echo(f"↻ Reloaded catalog ({len(index.assets)} assets)")
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        reloader = threading.Thread(target=self._watch_catalog, daemon=True)
+        reloader.start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self._stopped.set()
+
+
+class CatalogRequestHandler(SimpleHTTPRequestHandler):
+    """Route /api/ requests to the query index and serve everything else statically."""
+
+    server: CatalogServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        self._handle(head=False)
+
+    def do_HEAD(self) -> None:
+        self._handle(head=True)
+
+    def _handle(self, head: bool) -> None:
+        with span('http.request', path=self.path, method=self.command):
+            url = urlsplit(self.path)
+            path = unquote(url.path)
+            if path == '/api' or path.startswith('/api/'):
+                self._handle_api(path, url.query, head)
+            else:
+                self._handle_static(url.path, head)
+
+    # --- API --------------------------------------------------------------------
+
+    def _handle_api(self, path: str, query: str, head: bool) -> None:
+        index = self.server.index
+        params, canonical = canonical_query(query)
+        route = f"{path}?{canonical}"
+
+        if path == '/api/assets':
+            def build() -> Dict[str, Any]:
+                return index.query(params)
+        elif path == '/api/facets':
+            def build() -> Dict[str, Any]:
+                return index.facets(params)
+        elif path.startswith('/api/assets/'):
+            asset = index.asset(path[len('/api/assets/'):])
+            if asset is None:
+                self._send_error_json(HTTPStatus.NOT_FOUND, "asset not found", head)
+                return
+
+            def build() -> Dict[str, Any]:
+                return asset
+        else:
+            self._send_error_json(HTTPStatus.NOT_FOUND, "unknown endpoint", head)
+            return
+
+        try:
+            body, gzipped = index.render(route, build,
+                                         _accepts(self.headers.get('Accept-Encoding'), 'gzip'))
+        except QueryError as e:
+            self._send_error_json(HTTPStatus.BAD_REQUEST, str(e), head)
+            return
+
+        etag = index.etag(route)
+        if gzipped:
+            etag = etag[:-1] + '-gzip"'
+        if _etag_matches(self.headers.get('If-None-Match'), etag):
+            self._send_not_modified(etag, 'no-cache')
+            return
+        self._send_body(body, 'application/json', etag, 'no-cache', gzipped, head)
+
+    def _send_error_json(self, status: HTTPStatus, message: str, head: bool) -> None:
+        body = json.dumps({'error': message}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    # --- Static files -----------------------------------------------------------
+
+    def _handle_static(self, path: str, head: bool) -> None:
+        """Serve a file below the site root; path is still percent-encoded."""
+        file_path = Path(self.translate_path(path))
+        if file_path.is_dir():
+            if not path.endswith('/'):
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                self.send_header('Location', path + '/')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            file_path = file_path / 'index.html'
+        if not file_path.is_file():
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        content_type = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+        accept = self.headers.get('Accept-Encoding')
+        encoding = None
+        served = file_path
+        # Prefer the sidecars CatalogBuilder precompresses
+        for coding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            sidecar = file_path.with_name(file_path.name + suffix)
+            if _accepts(accept, coding) and sidecar.is_file():
+                encoding, served = coding, sidecar
+                break
+
+        st = served.stat()
+        etag = f'"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"'
+        compress = (encoding is None and _accepts(accept, 'gzip')
+                    and MIN_GZIP_SIZE <= st.st_size <= MAX_GZIP_FILE_SIZE
+                    and (content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES))
+        if compress:
+            etag = etag[:-1] + '-gzip"'
+        if _etag_matches(self.headers.get('If-None-Match'), etag):
+            self._send_not_modified(etag, 'max-age=600')
+            return
+
+        if compress:
+            body = gzip.compress(served.read_bytes(), compresslevel=6, mtime=0)
+            self._send_body(body, content_type, etag, 'max-age=600', True, head)
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(st.st_size))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'max-age=600')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        if not head:
+            with open(served, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile)
+
+    # --- Shared -----------------------------------------------------------------
+
+    def _send_not_modified(self, etag: str, cache_control: str) -> None:
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+    def _send_body(self, body: bytes, content_type: str, etag: str, cache_control: str,
+                   gzipped: bool, head: bool) -> None:
+        """Send a complete response; gzipped means body is already gzip-encoded."""
+        self.send_response(HTTPStatus.OK)
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
@@ -0,0 +1,262 @@
+"""
+SQLite backend for the asset catalog.
+
+Writes the records collected by the catalog builder into a single SQLite
+database with faceted indexes and an FTS5 table over the text fields.
+Updates are incremental: rows are upserted by asset id and only touched
+when an asset's record actually changed, and assets that disappeared from
+the library are deleted. Each full-text row's rowid is its asset's pk, an
+INTEGER PRIMARY KEY (so VACUUM cannot renumber it), which makes replacing
+or deleting it a key lookup rather than a scan of the FTS table.
+
+Example queries::
+
+    SELECT id FROM assets WHERE type = 'image' AND license_type = 'CC0';
+
+    SELECT a.id FROM assets a JOIN tags t ON t.asset_id = a.id
+     WHERE a.category = 'nature' AND t.tag = 'forest';
+
+    SELECT id FROM assets_fts WHERE assets_fts MATCH 'forest AND dawn*'
+     ORDER BY rank;
+
+    SELECT a.* FROM assets_fts f JOIN assets a ON a.pk = f.rowid
+     WHERE assets_fts MATCH 'forest';
+"""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS assets (
+    pk INTEGER PRIMARY KEY,
+    id TEXT UNIQUE NOT NULL,
+    type TEXT,
+    category TEXT,
+    subcategory TEXT,
+    title TEXT,
+    description TEXT,
+    version TEXT,
+    license_type TEXT,
+    license_url TEXT,
+    creator_name TEXT,
+    created TEXT,
+    added TEXT,
+    modified TEXT,
+    total_size INTEGER NOT NULL DEFAULT 0,
+    path TEXT,
+    url_base TEXT,
+    last_modified TEXT,
+    record TEXT NOT NULL,
+    record_hash TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS formats (
+    asset_id TEXT NOT NULL REFERENCES assets(id) ON DELETE CASCADE,
+    filename TEXT NOT NULL,
+    format TEXT,
+    mimetype TEXT,
+    size INTEGER,
+    width INTEGER,
+    height INTEGER,
+    md5 TEXT,
+    sha256 TEXT,
+    PRIMARY KEY (asset_id, filename)
+);
+
+CREATE TABLE IF NOT EXISTS tags (
+    asset_id TEXT NOT NULL REFERENCES assets(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (asset_id, tag)
+);
+
+CREATE INDEX IF NOT EXISTS idx_assets_type ON assets(type);
+CREATE INDEX IF NOT EXISTS idx_assets_category ON assets(category);
+CREATE INDEX IF NOT EXISTS idx_assets_license ON assets(license_type);
+CREATE INDEX IF NOT EXISTS idx_assets_creator ON assets(creator_name);
+CREATE INDEX IF NOT EXISTS idx_assets_type_category ON assets(type, category);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag);
+CREATE INDEX IF NOT EXISTS idx_formats_format ON formats(format);
+CREATE INDEX IF NOT EXISTS idx_formats_sha256 ON formats(sha256);
+
+-- rowid is the asset's pk in assets
+CREATE VIRTUAL TABLE IF NOT EXISTS assets_fts USING fts5(
+    id UNINDEXED,
+    title,
+    description,
+    tags,
+    category,
+    creator_name,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+DROP_SCHEMA = """
+DROP TABLE IF EXISTS assets_fts;
+DROP TABLE IF EXISTS formats;
+DROP TABLE IF EXISTS tags;
+DROP TABLE IF EXISTS assets;
+DROP TABLE IF EXISTS meta;
+"""
+
+_ASSET_COLUMNS = [
+    'id', 'type', 'category', 'subcategory', 'title', 'description', 'version',
+    'license_type', 'license_url', 'creator_name', 'created', 'added', 'modified',
+    'total_size', 'path', 'url_base', 'last_modified', 'record', 'record_hash'
+]
+
+_UPSERT_ASSET = (
+    f"INSERT INTO assets ({', '.join(_ASSET_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _ASSET_COLUMNS)}) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    + ', '.join(f"{column} = excluded.{column}" for column in _ASSET_COLUMNS[1:])
+)
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    """Open (and if needed create) a catalog database.
+
+    A database written with another schema version is emptied first; it
+    only holds derived data, which the next export writes again.
+    """
+    conn = sqlite3.connect(str(db_path))
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('PRAGMA journal_mode = WAL')
+    if _schema_version(conn) not in (None, str(SCHEMA_VERSION)):
+        conn.executescript(DROP_SCHEMA)
+    conn.executescript(SCHEMA)
+    conn.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+        (str(SCHEMA_VERSION),)
+    )
+    return conn
+
+
+def _schema_version(conn: sqlite3.Connection) -> Optional[str]:
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    except sqlite3.OperationalError:
+        # A new database without a meta table yet
+        return None
+    return row[0] if row else None
+
+
+def _record_hash(record_json: str) -> str:
+    # The whole record, so a new _last_modified alone refreshes last_modified
+    return hashlib.sha256(record_json.encode('utf-8')).hexdigest()
+
+
+def _asset_values(asset: Dict[str, Any], record_json: str, record_hash: str) -> List[Any]:
+    license_info = asset.get('license') or {}
+    creator = asset.get('creator') or {}
+    return [
+        asset.get('id'), asset.get('type'), asset.get('category'), asset.get('subcategory'),
+        asset.get('title'), asset.get('description'), asset.get('version'),
+        license_info.get('type'), license_info.get('url'), creator.get('name'),
+        asset.get('created'), asset.get('added'), asset.get('modified'),
+        asset.get('_total_size', 0), asset.get('_path'), asset.get('_url_base'),
+        asset.get('_last_modified'), record_json, record_hash
+    ]
+
+
+def _write_children(conn: sqlite3.Connection, asset: Dict[str, Any], pk: int) -> None:
+    """Replace an asset's formats, tags and full-text row."""
+    asset_id = asset.get('id')
+    conn.execute('DELETE FROM formats WHERE asset_id = ?', (asset_id,))
+    conn.execute('DELETE FROM tags WHERE asset_id = ?', (asset_id,))
+    conn.execute('DELETE FROM assets_fts WHERE rowid = ?', (pk,))
+
+    conn.executemany(
+        'INSERT OR REPLACE INTO formats (asset_id, filename, format, mimetype, size, '
+        'width, height, md5, sha256) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [
+            (
+                asset_id, fmt.get('filename'), fmt.get('format'), fmt.get('mimetype'),
+                fmt.get('size'), (fmt.get('dimensions') or {}).get('width'),
+                (fmt.get('dimensions') or {}).get('height'),
+                (fmt.get('checksum') or {}).get('md5'),
+                (fmt.get('checksum') or {}).get('sha256')
+            )
+            for fmt in asset.get('formats') or []
+            if fmt.get('filename')
+        ]
+    )
+    conn.executemany(
+        'INSERT OR IGNORE INTO tags (asset_id, tag) VALUES (?, ?)',
+        [(asset_id, tag) for tag in asset.get('tags') or []]
+    )
+    conn.execute(
+        'INSERT INTO assets_fts (rowid, id, title, description, tags, category, creator_name) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (
+            pk, asset_id, asset.get('title') or '', asset.get('description') or '',
+            ' '.join(asset.get('tags') or []), asset.get('category') or '',
+            (asset.get('creator') or {}).get('name') or ''
+        )
+    )
+
+
+def write_sqlite_catalog(assets: List[Dict[str, Any]], db_path: Path,
+                         generated: str) -> Dict[str, int]:
+    """Upsert catalog records into the database keyed by asset id.
+
+    Returns counts of inserted, updated, unchanged and deleted assets.
+    """
+    conn = connect(Path(db_path))
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+
+    try:
+        with conn:
+            existing = {asset_id: (pk, record_hash) for asset_id, pk, record_hash
+                        in conn.execute('SELECT id, pk, record_hash FROM assets')}
+            seen = set()
+
+            for asset in assets:
+                asset_id = asset.get('id')
+                if not asset_id or asset_id in seen:
+                    continue
+                seen.add(asset_id)
+
+                record_json = json.dumps(asset, sort_keys=True, ensure_ascii=False,
+                                         separators=(',', ':'))
+                record_hash = _record_hash(record_json)
+                previous = existing.get(asset_id)
+
+                if previous is not None and previous[1] == record_hash:
+                    counts['unchanged'] += 1
+                    continue
+
+                conn.execute(_UPSERT_ASSET, _asset_values(asset, record_json, record_hash))
+                if previous is not None:
+                    pk = previous[0]
+                else:
+                    pk = conn.execute('SELECT pk FROM assets WHERE id = ?',
+                                      (asset_id,)).fetchone()[0]
+                _write_children(conn, asset, pk)
+                counts['inserted' if previous is None else 'updated'] += 1
+
+            removed = [existing[asset_id][0] for asset_id in existing.keys() - seen]
+            conn.executemany('DELETE FROM assets_fts WHERE rowid = ?',
+                             [(pk,) for pk in removed])
+            # formats and tags follow through ON DELETE CASCADE
+            conn.executemany('DELETE FROM assets WHERE pk = ?',
+                             [(pk,) for pk in removed])
+            counts['deleted'] = len(removed)
+
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('generated', ?)",
+                (generated,)
+            )
+    finally:
+        conn.close()
+
+    return counts
@@ -0,0 +1,383 @@
+"""
+Seeded generator of synthetic asset libraries for benchmarking.
+
+Every asset is derived from (seed, index) alone, so a library of any size
+is reproducible and can be generated in parallel. Types, categories,
+tags, creators and licenses follow skewed (Zipf-like) distributions and
+file sizes are log-normal per type, scaled by size_scale so that
+million-asset trees fit on a laptop.
+
+Files are real enough for every pipeline stage: JPEG/PNG images with the
+stated dimensions (a cached encoded frame followed by random padding up
+to the drawn size), MP4 files with a proper moov box, PCM WAV files, CSV
+datasets and ZIP archives. Metadata validates against the schema and
+carries checksums and dataset profiles, and checksums.txt is written as
+generate-checksums.py would.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import math
+import os
+import random
+import struct
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+from PIL import Image, ImageOps
+
+from ual.checksums import ChecksumGenerator
+from ual.datasets import profile_for_asset
+from ual.instrumentation import ASSET, span
+
+# Share of each asset type
+TYPE_WEIGHTS = {'image': 0.55, 'video': 0.1, 'audio': 0.15, 'dataset': 0.12, 'archive': 0.08}
+
+TYPE_DIRS = {'image': 'images', 'video': 'videos', 'audio': 'audio',
+             'dataset': 'datasets', 'archive': 'archives'}
+
+# Median file size in bytes of each type at size_scale=1, and the spread
+# (sigma of the underlying normal) of the log-normal size distribution
+MEDIAN_SIZES = {'image': 2_500_000, 'video': 80_000_000, 'audio': 8_000_000,
+                'dataset': 4_000_000, 'archive': 20_000_000}
+SIZE_SIGMA = 0.9
+
+DEFAULT_SIZE_SCALE = 0.01
+
+IMAGE_DIMENSIONS = [(1920, 1080), (2560, 1440), (3000, 2000), (3840, 2160), (4000, 3000)]
+VIDEO_DIMENSIONS = [(1280, 720), (1920, 1080), (3840, 2160)]
+FRAME_RATES = [24, 25, 30, 60]
+SAMPLE_RATES = [44100, 48000]
+
+LICENSES = [('CC0', 'https://creativecommons.org/publicdomain/zero/1.0/'),
+            ('CC-BY-4.0', 'https://creativecommons.org/licenses/by/4.0/'),
+            ('CC-BY-SA-4.0', 'https://creativecommons.org/licenses/by-sa/4.0/'),
+            ('MIT', 'https://opensource.org/licenses/MIT'),
+            ('Apache-2.0', 'https://www.apache.org/licenses/LICENSE-2.0')]
+
+WORDS = ['forest', 'ocean', 'city', 'night', 'abstract', 'portrait', 'mountain', 'river',
+         'texture', 'pattern', 'sunset', 'street', 'industrial', 'vintage', 'minimal',
+         'nature', 'architecture', 'water', 'sky', 'winter', 'summer', 'desert', 'macro',
+         'aerial', 'interior', 'food', 'people', 'technology', 'music', 'ambient', 'voice',
+         'census', 'weather', 'sales', 'sensor', 'traffic', 'finance', 'science', 'sport',
+         'animal', 'plant', 'light', 'shadow', 'color', 'black', 'white', 'blue', 'green']
+
+CATEGORIES_PER_TYPE = 40
+TAG_VOCABULARY = 2000
+CREATORS = 5000
+
+
+@dataclass(frozen=True)
+class LibrarySpec:
+    """Parameters a synthetic library is fully determined by."""
+    count: int
+    seed: int = 0
+    size_scale: float = DEFAULT_SIZE_SCALE
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'count': self.count, 'seed': self.seed, 'size_scale': self.size_scale}
+
+
+def _zipf_index(rng: random.Random, n: int, exponent: float = 1.1) -> int:
+    """Draw an index in [0, n) with a Zipf-like skew towards small indexes."""
+    # Inverse-CDF sampling of a continuous power law, cheap and good enough
+    u = rng.random()
+    if exponent == 1.0:
+        value = n ** u
+    else:
+        value = ((n ** (1 - exponent) - 1) * u + 1) ** (1 / (1 - exponent))
+    return min(n - 1, int(value) - 1)
+
+
+def _word(index: int) -> str:
+    """Deterministic readable name for a vocabulary index."""
+    word = WORDS[index % len(WORDS)]
+    return word if index < len(WORDS) else f"{word}-{index // len(WORDS)}"
+
+
+def _target_size(rng: random.Random, asset_type: str, size_scale: float) -> int:
+    median = MEDIAN_SIZES[asset_type] * size_scale
+    return max(1024, int(rng.lognormvariate(math.log(median), SIZE_SIGMA)))
+
+
+# --- File builders -----------------------------------------------------------------
+
+# Distinct image templates per (dimensions, format); every template is
+# encoded once per process, so this bounds the encoding cost
+IMAGE_VARIANTS = 4
+
+
+@lru_cache(maxsize=len(IMAGE_DIMENSIONS) * 2 * IMAGE_VARIANTS)
+def _image_frame(width: int, height: int, fmt: str, variant: int) -> bytes:
+    """Encoded image of the given size; cached, as encoding is the slow part."""
+    # A rotated, colorized gradient gives renditions and perceptual hashing
+    # real structure to work on, unlike a flat fill
+    gradient = Image.linear_gradient('L').rotate(variant * 360 / IMAGE_VARIANTS)
+    image = ImageOps.colorize(gradient.resize((width, height)),
+                              black=(variant * 60, 20, 80), white=(250, 230 - variant * 40, 120))
+    buffer = io.BytesIO()
+    if fmt == 'jpg':
+        image.save(buffer, 'JPEG', quality=85)
+    else:
+        image.save(buffer, 'PNG', compress_level=1)
+    return buffer.getvalue()
+
+
+def build_image(rng: random.Random, size: int) -> Tuple[bytes, Dict[str, Any]]:
+    width, height = rng.choice(IMAGE_DIMENSIONS)
+    fmt = 'jpg' if rng.random() < 0.7 else 'png'
+    frame = _image_frame(width, height, fmt, rng.randrange(IMAGE_VARIANTS))
+    # Decoders stop at the end-of-image marker, so padding keeps the file valid
+    data = frame + rng.randbytes(max(0, size - len(frame)))
+    return data, {
+        'format': fmt,
+        'mimetype': 'image/jpeg' if fmt == 'jpg' else 'image/png',
+        'dimensions': {'width': width, 'height': height},
+    }
+
+
+def _box(box_type: bytes, *payload: bytes) -> bytes:
+    body = b''.join(payload)
+    return struct.pack('>I4s', 8 + len(body), box_type) + body
+
+
+def _full_box(box_type: bytes, *payload: bytes) -> bytes:
+    return _box(box_type, b'\0\0\0\0', *payload)
+
+
+def _mp4_track(track_id: int, handler: bytes, sample_entry: bytes, timescale: int,
+               duration: int, samples: int, width: int = 0, height: int = 0,
+               movie_duration: int = 0) -> bytes:
+    matrix = struct.pack('>9I', 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+    tkhd = _full_box(b'tkhd', struct.pack('>IIIII', 0, 0, track_id, 0, movie_duration),
+                     bytes(8), struct.pack('>hhhh', 0, 0, 0x100 if handler == b'soun' else 0, 0),
+                     matrix, struct.pack('>II', width << 16, height << 16))
+    mdhd = _full_box(b'mdhd', struct.pack('>IIIIHH', 0, 0, timescale, duration, 0x55C4, 0))
+    hdlr = _full_box(b'hdlr', bytes(4), handler, bytes(12), b'synthetic\0')
+    stsd = _full_box(b'stsd', struct.pack('>I', 1), sample_entry)
+    stsz = _full_box(b'stsz', struct.pack('>II', 0, samples))
+    stbl = _box(b'stbl', stsd, stsz)
+    minf = _box(b'minf', stbl)
+    return _box(b'trak', tkhd, _box(b'mdia', mdhd, hdlr, minf))
+
+
+def build_video(rng: random.Random, size: int) -> Tuple[bytes, Dict[str, Any], Dict[str, Any]]:
+    width, height = rng.choice(VIDEO_DIMENSIONS)
+    frame_rate = rng.choice(FRAME_RATES)
+    sample_rate = rng.choice(SAMPLE_RATES)
+    # Duration follows from the drawn size at a plausible bitrate
+    bitrate = {720: 5_000_000, 1080: 8_000_000, 2160: 35_000_000}[height]
+    seconds = max(1.0, size * 8 / bitrate)
+    frames = max(1, round(seconds * frame_rate))
+    duration = frames / frame_rate
+
+    visual_entry = _box(b'avc1', bytes(6), struct.pack('>H', 1), bytes(16),
+                        struct.pack('>HHIIIH', width, height, 0x480000, 0x480000, 0, 1),
+                        bytes(32), struct.pack('>Hh', 0x18, -1))
+    audio_entry = _box(b'mp4a', bytes(6), struct.pack('>H', 1), bytes(8),
+                       struct.pack('>HHHHI', 2, 16, 0, 0, sample_rate << 16))
+    movie_timescale = 1000
+    moov = _box(
+        b'moov',
+        _full_box(b'mvhd', struct.pack('>IIII', 0, 0, movie_timescale,
+                                       round(duration * movie_timescale)),
+                  struct.pack('>IH', 0x10000, 0x100), bytes(10),
+                  struct.pack('>9I', 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000),
+                  bytes(24), struct.pack('>I', 3)),
+        _mp4_track(1, b'vide', visual_entry, frame_rate * 1000, frames * 1000, frames,
+                   width, height, round(duration * movie_timescale)),
+        _mp4_track(2, b'soun', audio_entry, sample_rate, round(duration * sample_rate),
+                   round(duration * sample_rate / 1024),
+                   movie_duration=round(duration * movie_timescale)),
+    )
+    ftyp = _box(b'ftyp', b'isom', struct.pack('>I', 512), b'isomiso2avc1mp41')
+    header = ftyp + moov
+    payload = rng.randbytes(max(0, size - len(header) - 8))
+    data = header + _box(b'mdat', payload)
+    return data, {
+        'format': 'mp4',
+        'mimetype': 'video/mp4',
+        'dimensions': {'width': width, 'height': height},
+    }, {'duration': round(duration, 3), 'framerate': frame_rate}
+
+
+def build_audio(rng: random.Random, size: int) -> Tuple[bytes, Dict[str, Any], Dict[str, Any]]:
+    sample_rate = rng.choice(SAMPLE_RATES)
+    channels = rng.choice([1, 2, 2])
+    bit_depth = rng.choice([16, 16, 24])
+    block_align = channels * bit_depth // 8
+    frames = max(1, (size - 44) // block_align)
+    data_size = frames * block_align
+
+    header = (b'RIFF' + struct.pack('<I', 36 + data_size) + b'WAVE'
+              + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate,
+                                      sample_rate * block_align, block_align, bit_depth)
+              + b'data' + struct.pack('<I', data_size))
+    return header + rng.randbytes(data_size), {
+        'format': 'wav',
+        'mimetype': 'audio/x-wav',
+    }, {
+        'duration': round(frames / sample_rate, 3),
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'bit_depth': bit_depth,
+    }
+
+
+def build_dataset(rng: random.Random, size: int) -> Tuple[bytes, Dict[str, Any]]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(['id', 'station', 'timestamp', 'value', 'flag'])
+    start = datetime(2020, 1, 1)
+    row = 0
+    # Rows are generated in blocks to keep the size check cheap
+    while buffer.tell() < size:
+        for _ in range(256):
+            writer.writerow([row, _word(_zipf_index(rng, 200)),
+                             (start + timedelta(minutes=row)).isoformat(),
+                             round(rng.gauss(20, 8), 3), rng.random() < 0.1])
+            row += 1
+    return buffer.getvalue().encode('utf-8'), {
+        'format': 'csv',
+        'mimetype': 'text/csv',
+    }
+
+
+def build_archive(rng: random.Random, size: int) -> Tuple[bytes, Dict[str, Any]]:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        # Fixed timestamps keep archives byte-identical across runs
+        stamp = (2020, 1, 1, 0, 0, 0)
+        archive.writestr(zipfile.ZipInfo('README.txt', stamp),
+                         'Synthetic archive generated for benchmarks.\n')
+        archive.writestr(zipfile.ZipInfo('data.bin', stamp), rng.randbytes(max(0, size - 256)))
+    return buffer.getvalue(), {
+        'format': 'zip',
+        'mimetype': 'application/zip',
+    }
+
+
+# --- Assets ------------------------------------------------------------------------
+
+def asset_plan(spec: LibrarySpec, index: int) -> Dict[str, Any]:
+    """Draw everything about asset index except its file contents."""
+    rng = random.Random(f"{spec.seed}:{index}")
+    asset_type = rng.choices(list(TYPE_WEIGHTS), weights=list(TYPE_WEIGHTS.values()))[0]
+    category = _word(_zipf_index(rng, CATEGORIES_PER_TYPE))
+    wanted = rng.randint(3, 8)
+    tags = set()
+    while len(tags) < wanted:
+        tags.add(_word(_zipf_index(rng, TAG_VOCABULARY)))
+    tags = sorted(tags)
+    creator = f"creator-{_zipf_index(rng, CREATORS):05d}"
+    license_type, license_url = LICENSES[_zipf_index(rng, len(LICENSES), 1.5)]
+    license_info = {'type': license_type, 'url': license_url}
+    if license_type.startswith('CC-BY'):
+        license_info['attribution'] = f"{creator} (synthetic)"
+    created = datetime(2015, 1, 1, tzinfo=timezone.utc) + timedelta(
+        seconds=rng.randrange(10 * 365 * 86400))
+
+    return {
+        'rng': rng,
+        'type': asset_type,
+        'id': f"{asset_type}-{category}-{index:07d}",
+        'category': category,
+        'title': f"{category.replace('-', ' ').title()} {asset_type} {index}",
+        'description': f"Synthetic {asset_type} asset {index} about {', '.join(tags)}.",
+        'tags': tags,
+        'creator': creator,
+        'license': license_info,
+        'created': created.isoformat().replace('+00:00', 'Z'),
+        'size': _target_size(rng, asset_type, spec.size_scale),
+    }
+
+
+def asset_directory(root: Path, plan: Dict[str, Any]) -> Path:
+    return Path(root) / TYPE_DIRS[plan['type']] / plan['category'] / plan['id']
+
+
+def write_asset(root: Path, spec: LibrarySpec, index: int) -> Tuple[int, int]:
+    """Generate one asset directory; return (files written, bytes written)."""
+    with span('synthetic.asset', ASSET, asset=str(index)):
+        plan = asset_plan(spec, index)
+        rng = plan['rng']
+        asset_type = plan['type']
+
+        technical = {}
+        if asset_type == 'image':
+            data, fmt = build_image(rng, plan['size'])
+        elif asset_type == 'video':
+            data, fmt, technical = build_video(rng, plan['size'])
+        elif asset_type == 'audio':
+            data, fmt, technical = build_audio(rng, plan['size'])
+        elif asset_type == 'dataset':
+            data, fmt = build_dataset(rng, plan['size'])
+        else:
+            data, fmt = build_archive(rng, plan['size'])
+
+        directory = asset_directory(root, plan)
+        directory.mkdir(parents=True, exist_ok=True)
+        filename = f"{plan['id']}.{fmt['format']}"
+        with open(directory / filename, 'wb') as f:
+            f.write(data)
+
+        checksums = {'md5': hashlib.md5(data).hexdigest(),
+                     'sha256': hashlib.sha256(data).hexdigest()}
+        metadata = {
+            'id': plan['id'],
+            'title': plan['title'],
+            'description': plan['description'],
+            'category': plan['category'],
+            'type': asset_type,
+            'version': '1.0.0',
+            'created': plan['created'],
+            'license': plan['license'],
+            'creator': {'name': plan['creator']},
+            'tags': plan['tags'],
+            'formats': [{'filename': filename, 'size': len(data), **fmt, 'checksum': checksums}],
+        }
+        if technical:
+            metadata['technical'] = technical
+        if asset_type == 'dataset':
+            # Profile up front, as validate-assets.py --profile-datasets would
+            metadata['technical'] = profile_for_asset(directory, metadata)[1]
+
+        with open(directory / 'metadata.json', 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+        ChecksumGenerator().write_checksum_file(directory,
+                                                {filename: {**checksums, 'size': len(data)}})
+
+        return 3, len(data) + (directory / 'metadata.json').stat().st_size
+
+
+def _write_range(task: Tuple[Path, LibrarySpec, int, int]) -> Tuple[int, int, int]:
+    root, spec, start, stop = task
+    files = size = 0
+    for index in range(start, stop):
+        written, nbytes = write_asset(root, spec, index)
+        files += written
+        size += nbytes
+    return stop - start, files, size
+
+
+def generate_library(root: Path, spec: LibrarySpec, jobs: int = 1,
+                     chunk: int = 256) -> Iterator[Tuple[int, int, int]]:
+    """Write the library under root, yielding (assets, files, bytes) per finished chunk."""
+    tasks = [(Path(root), spec, start, min(start + chunk, spec.count))
+             for start in range(0, spec.count, chunk)]
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+
+    if jobs <= 1 or len(tasks) <= 1:
+        yield from map(_write_range, tasks)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(_write_range, tasks)
+
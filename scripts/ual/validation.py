@@ -0,0 +1,747 @@
+"""
+Asset validation: structure, metadata schema, file and checksum checks.
+
+AssetValidator checks one asset directory at a time; validate_assets runs
+it over many assets, in a process pool with one validator per worker.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple, Any, Optional
+import click
+from jsonschema import FormatChecker
+from jsonschema.validators import validator_for
+import magic
+
+from ual.cache import (RACY_WINDOW_NS, DigestCache, ValidationCache, file_key,
+                       hash_file_cached)
+from ual.dataset_profiles import PROFILE_VERSION, profile_is_current, source_dataset
+from ual.hashing import group_by_file, parse_checksum_file
+from ual.instrumentation import ASSET, span, timed
+from ual.media import MediaInfo
+from ual.probe import FileProbe, probe_file
+
+
+@dataclass(frozen=True)
+class ValidationResult:
+    """Outcome of validating one asset directory."""
+    path: Path
+    errors: Tuple[str, ...] = ()
+    warnings: Tuple[str, ...] = ()
+    # Header-probed stream properties of video and audio files, by filename;
+    # cached with the outcome, so replaying it yields the same catalog
+    media: Dict[str, MediaInfo] = field(default_factory=dict, hash=False)
+    
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+
+class AssetValidator:
+    """Validate assets against defined standards."""
+    
+    # Metadata schema for validation
+    METADATA_SCHEMA = {
+        "type": "object",
+        "required": ["id", "title", "description", "category", "type", "version", "license", "creator", "formats"],
+        "properties": {
+            "id": {"type": "string", "pattern": "^[a-z0-9-]+$"},
+            "title": {"type": "string", "minLength": 3},
+            "description": {"type": "string", "minLength": 10},
+            "category": {"type": "string"},
+            "subcategory": {"type": "string"},
+            "type": {"type": "string", "enum": ["image", "video", "audio", "dataset", "archive"]},
+            "created": {"type": "string", "format": "date-time"},
+            "added": {"type": "string", "format": "date-time"},
+            "modified": {"type": "string", "format": "date-time"},
+            "version": {"type": "string", "pattern": "^\\d+\\.\\d+\\.\\d+$"},
+            "license": {
+                "type": "object",
+                "required": ["type", "url"],
+                "properties": {
+                    "type": {"type": "string"},
+                    "url": {"type": "string", "format": "uri"},
+                    "attribution": {"type": "string"}
+                }
+            },
+            "creator": {
+                "type": "object",
+                "required": ["name"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "email": {"type": "string", "format": "email"},
+                    "url": {"type": "string", "format": "uri"}
+                }
+            },
+            "tags": {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": 1
+            },
+            "formats": {
+                "type": "array",
+                "minItems": 1,
+                "items": {
+                    "type": "object",
+                    "required": ["format", "filename", "mimetype", "size"],
+                    "properties": {
+                        "format": {"type": "string"},
+                        "filename": {"type": "string"},
+                        "mimetype": {"type": "string"},
+                        "size": {"type": "integer", "minimum": 1},
+                        "dimensions": {
+                            "type": "object",
+                            "properties": {
+                                "width": {"type": "integer", "minimum": 1},
+                                "height": {"type": "integer", "minimum": 1}
+                            }
+                        },
+                        "checksum": {
+                            "type": "object",
+                            "properties": {
+                                "md5": {"type": "string", "pattern": "^[a-f0-9]{32}$"},
+                                "sha256": {"type": "string", "pattern": "^[a-f0-9]{64}$"}
+                            }
+                        }
+                    }
+                }
+            },
+            "renditions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "required": ["role", "format", "filename", "mimetype", "size",
+                                 "dimensions", "source", "source_sha256"],
+                    "properties": {
+                        "role": {"type": "string", "enum": ["thumbnail", "responsive"]},
+                        "format": {"type": "string"},
+                        "filename": {"type": "string", "pattern": "^renditions/[^/]+$"},
+                        "mimetype": {"type": "string"},
+                        "size": {"type": "integer", "minimum": 1},
+                        "dimensions": {
+                            "type": "object",
+                            "required": ["width", "height"],
+                            "properties": {
+                                "width": {"type": "integer", "minimum": 1},
+                                "height": {"type": "integer", "minimum": 1}
+                            }
+                        },
+                        "checksum": {
+                            "type": "object",
+                            "properties": {
+                                "md5": {"type": "string", "pattern": "^[a-f0-9]{32}$"},
+                                "sha256": {"type": "string", "pattern": "^[a-f0-9]{64}$"}
+                            }
+                        },
+                        "source": {"type": "string"},
+                        "source_sha256": {"type": "string", "pattern": "^[a-f0-9]{64}$"}
+                    }
+                }
+            }
+        }
+    }
+    
+    # Minimum quality requirements
+    MIN_IMAGE_WIDTH = 1920
+    MIN_IMAGE_HEIGHT = 1080
+    MIN_VIDEO_WIDTH = 1280
+    MIN_VIDEO_HEIGHT = 720
+    MAX_VIDEO_WIDTH = 3840
+    MAX_VIDEO_HEIGHT = 2160
+    MIN_VIDEO_FRAME_RATE = 24
+    MAX_VIDEO_FRAME_RATE = 60
+    AUDIO_SAMPLE_RATES = [44100, 48000]
+    AUDIO_BIT_DEPTHS = [16, 24]
+    MAX_AUDIO_CHANNELS = 2
+    # Seconds a probed duration may differ from technical.duration
+    DURATION_TOLERANCE = 1.0
+    # Image formats without a pixel size; the raster checks do not apply
+    VECTOR_IMAGE_TYPES = ['image/svg+xml']
+    ACCEPTABLE_LICENSES = [
+        "CC0", "CC-BY", "CC-BY-SA", "CC-BY-4.0", "CC-BY-SA-4.0",
+        "MIT", "Apache-2.0", "Public Domain"
+    ]
+    
+    # Bump when a check changes in a way the rule constants do not capture,
+    # so cached validation results are discarded
+    VALIDATION_VERSION = 1
+    
+    # Compiled metadata schema validator, built once per process
+    _schema_validator = None
+    _rules_version = None
+    
+    @classmethod
+    def rules_version(cls) -> str:
+        """Fingerprint of every rule a validation outcome depends on."""
+        if cls._rules_version is None:
+            rules = {
+                'validation_version': cls.VALIDATION_VERSION,
+                'schema': cls.METADATA_SCHEMA,
+                'licenses': cls.ACCEPTABLE_LICENSES,
+                'min_image': [cls.MIN_IMAGE_WIDTH, cls.MIN_IMAGE_HEIGHT],
+                'min_video': [cls.MIN_VIDEO_WIDTH, cls.MIN_VIDEO_HEIGHT],
+                'max_video': [cls.MAX_VIDEO_WIDTH, cls.MAX_VIDEO_HEIGHT],
+                'frame_rate': [cls.MIN_VIDEO_FRAME_RATE, cls.MAX_VIDEO_FRAME_RATE],
+                'audio': [cls.AUDIO_SAMPLE_RATES, cls.AUDIO_BIT_DEPTHS, cls.MAX_AUDIO_CHANNELS],
+                'duration_tolerance': cls.DURATION_TOLERANCE,
+                'vector_images': cls.VECTOR_IMAGE_TYPES,
+                'dataset_profile_version': PROFILE_VERSION,
+            }
+            encoded = json.dumps(rules, sort_keys=True).encode('utf-8')
+            cls._rules_version = hashlib.sha256(encoded).hexdigest()
+        return cls._rules_version
+    
+    @classmethod
+    def schema_validator(cls):
+        """Return the metadata schema validator, checking the schema only once."""
+        if cls._schema_validator is None:
+            validator_class = validator_for(cls.METADATA_SCHEMA)
+            validator_class.check_schema(cls.METADATA_SCHEMA)
+            cls._schema_validator = validator_class(
+                cls.METADATA_SCHEMA, format_checker=FormatChecker()
+            )
+        return cls._schema_validator
+    
+    @classmethod
+    @timed('validate.schema')
+    def schema_errors(cls, metadata: Any) -> List[str]:
+        """Return every schema violation in metadata, ordered by JSON path."""
+        errors = sorted(cls.schema_validator().iter_errors(metadata),
+                        key=lambda error: (error.json_path, error.message))
+        return [
+            f"Metadata schema validation failed at {error.json_path}: {error.message}"
+            for error in errors
+        ]
+    
+    @classmethod
+    @timed('validate.schema_batch')
+    def validate_metadata_batch(cls, metadata_files: List[Path]) -> Dict[Path, List[str]]:
+        """Schema-check many metadata files at once.
+        
+        Documents that pass the validator's short-circuiting is_valid check
+        are skipped; errors are collected only for the ones that fail.
+        Returns the errors of each failing file.
+        """
+        validator = cls.schema_validator()
+        failures = {}
+        
+        for metadata_file in metadata_files:
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                failures[metadata_file] = [f"Invalid JSON in metadata.json: {e}"]
+                continue
+            
+            if not validator.is_valid(metadata):
+                failures[metadata_file] = cls.schema_errors(metadata)
+        
+        return failures
+    
+    def __init__(self, digest_cache: Optional[DigestCache] = None,
+                 result_cache: Optional[ValidationCache] = None,
+                 digest_algorithms: Sequence[str] = ()):
+        self.errors = []
+        self.warnings = []
+        # Probes of the files checked for the current asset, by filename
+        self.probes: Dict[str, FileProbe] = {}
+        self.file_magic = magic.Magic(mime=True)
+        self.digest_cache = digest_cache
+        self.result_cache = result_cache
+        # Digests to compute for every listed file, beyond those in checksums.txt
+        self.digest_algorithms = tuple(digest_algorithms)
+    
+    def validate_asset(self, asset_path: Path, metadata: Any = None) -> ValidationResult:
+        """Validate a single asset directory, replaying a cached outcome if possible.
+        
+        metadata is the already-parsed metadata.json, if the caller has it.
+        """
+        with span('validate.asset', ASSET, asset=str(asset_path)):
+            self.probes = {}
+            
+            if self.result_cache is None:
+                return self._validate_asset(asset_path, metadata)
+            
+            key = self._result_cache_key(asset_path)
+            if key is None:
+                return self._validate_asset(asset_path, metadata)
+            
+            cached = self.result_cache.lookup(str(asset_path), key)
+            if cached is not None:
+                errors, warnings, media = cached
+                return ValidationResult(asset_path, tuple(errors), tuple(warnings),
+                                        {name: MediaInfo(**info) for name, info in media.items()})
+            
+            result = self._validate_asset(asset_path, metadata)
+            self.result_cache.store(str(asset_path), key, result.errors, result.warnings,
+                                    {name: asdict(info) for name, info in result.media.items()})
+            return result
+    
+    @timed('validate.cache_key')
+    def _result_cache_key(self, asset_path: Path) -> Optional[str]:
+        """Key a validation outcome on the rules and the directory's contents.
+        
+        The top-level metadata.json and checksums.txt are hashed directly;
+        every other file, including those in subdirectories such as
+        renditions/, contributes its relative path and identity (device,
+        inode, size, mtime_ns), so building the key never reads it.
+        Subdirectories contribute their relative path. Returns None if a
+        directory cannot be listed or a file was modified too recently for
+        its identity to be trusted (see RACY_WINDOW_NS).
+        """
+        hasher = hashlib.sha256(self.rules_version().encode('utf-8'))
+        now = time.time_ns()
+        
+        entries = []
+        directories = [(asset_path, '')]
+        while directories:
+            directory, prefix = directories.pop()
+            try:
+                listing = list(os.scandir(directory))
+            except OSError:
+                return None
+            for entry in listing:
+                name = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append((Path(entry.path), name + '/'))
+                    entries.append((name + '/', None))
+                elif entry.is_file():
+                    entries.append((name, entry))
+        entries.sort(key=lambda item: item[0])
+        
+        for name, entry in entries:
+            if entry is None:
+                identity = 'dir'
+            elif name in ('metadata.json', 'checksums.txt'):
+                with open(entry.path, 'rb') as f:
+                    identity = hashlib.sha256(f.read()).hexdigest()
+            else:
+                st = entry.stat()
+                if now - st.st_mtime_ns < RACY_WINDOW_NS:
+                    return None
+                identity = '\0'.join(str(part) for part in file_key(st))
+            
+            hasher.update(f"{name}\0{identity}\n".encode('utf-8'))
+        
+        return hasher.hexdigest()
+    
+    def _validate_asset(self, asset_path: Path, metadata: Any = None) -> ValidationResult:
+        """Validate a single asset directory.
+        
+        self.errors and self.warnings are scratch state for the asset being
+        validated; the returned result is an immutable copy of them.
+        """
+        self.errors = []
+        self.warnings = []
+        
+        # Check directory structure
+        self._validate_directory_structure(asset_path)
+        
+        # Validate metadata
+        metadata_file = asset_path / 'metadata.json'
+        if metadata_file.exists():
+            metadata = self._validate_metadata(metadata_file, metadata)
+            
+            if metadata:
+                # Read expected checksums first so each file is probed and
+                # digested in the same pass
+                checksum_file = asset_path / 'checksums.txt'
+                expected = None
+                if checksum_file.exists():
+                    expected = self._read_checksums(checksum_file)
+                
+                # Validate files match metadata
+                self._validate_files(asset_path, metadata, expected or {})
+                
+                # Validate checksums if present
+                if expected is not None:
+                    self._validate_checksums(asset_path, expected)
+        
+        media = {name: probe.media for name, probe in self.probes.items()
+                 if probe.media is not None}
+        return ValidationResult(asset_path, tuple(self.errors), tuple(self.warnings), media)
+    
+    def _validate_directory_structure(self, asset_path: Path) -> None:
+        """Validate the asset directory structure."""
+        if not asset_path.is_dir():
+            self.errors.append(f"Asset path is not a directory: {asset_path}")
+            return
+        
+        # Check for required files
+        metadata_file = asset_path / 'metadata.json'
+        if not metadata_file.exists():
+            self.errors.append("Missing required metadata.json file")
+        
+        # Check for at least one asset file
+        asset_files = [f for f in asset_path.iterdir() 
+                      if f.is_file() and f.name not in ['metadata.json', 'checksums.txt']]
+        
+        if not asset_files:
+            self.errors.append("No asset files found in directory")
+    
+    def _validate_metadata(self, metadata_file: Path, metadata: Any = None) -> Dict[str, Any]:
+        """Validate metadata JSON schema and content."""
+        if metadata is None:
+            try:
+                with span('json.parse'), open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except json.JSONDecodeError as e:
+                self.errors.append(f"Invalid JSON in metadata.json: {e}")
+                return None
+        
+        # Validate schema, reporting every violation at once
+        schema_errors = self.schema_errors(metadata)
+        if schema_errors:
+            self.errors.extend(schema_errors)
+            return None
+        
+        # Additional content validation
+        self._validate_metadata_content(metadata)
+        
+        return metadata
+    
+    def _validate_metadata_content(self, metadata: Dict[str, Any]) -> None:
+        """Validate metadata content beyond schema."""
+        # Check license
+        license_type = metadata.get('license', {}).get('type', '')
+        if license_type not in self.ACCEPTABLE_LICENSES:
+            self.warnings.append(
+                f"License type '{license_type}' not in standard list. "
+                "Please verify it's an acceptable open license."
+            )
+        
+        # Check ID matches directory name
+        # This is just a warning as it's not strictly required
+        
+        # Validate tags
+        tags = metadata.get('tags', [])
+        if len(tags) < 3:
+            self.warnings.append("Consider adding more descriptive tags (minimum 3 recommended)")
+        
+        # Check for required attribution
+        if license_type in ['CC-BY', 'CC-BY-SA', 'CC-BY-4.0', 'CC-BY-SA-4.0']:
+            if not metadata.get('license', {}).get('attribution'):
+                self.errors.append(f"License {license_type} requires attribution field")
+    
+    @timed('validate.files')
+    def _validate_files(self, asset_path: Path, metadata: Dict[str, Any],
+                        expected_checksums: Dict[str, Dict[str, str]]) -> None:
+        """Validate that files match metadata and meet quality standards."""
+        formats_in_metadata = {fmt['filename']: fmt for fmt in metadata.get('formats', [])}
+        profile_source = source_dataset(metadata)
+        
+        # Check each file mentioned in metadata exists
+        for filename, format_info in formats_in_metadata.items():
+            file_path = asset_path / filename
+            
+            if not file_path.exists():
+                self.errors.append(f"File listed in metadata not found: {filename}")
+                continue
+            
+            # Validate file type and size
+            algorithms = dict.fromkeys(self.digest_algorithms)
+            algorithms.update(dict.fromkeys(expected_checksums.get(filename, {})))
+            if format_info is profile_source:
+                algorithms['sha256'] = None
+            self._validate_file(file_path, format_info, metadata.get('type'), list(algorithms),
+                                metadata.get('technical'))
+            
+            probe = self.probes.get(filename)
+            if format_info is profile_source and probe is not None:
+                self._validate_dataset_profile(filename, probe, metadata.get('technical'))
+        
+        # Check for files not in metadata
+        for file_path in asset_path.iterdir():
+            if file_path.is_file() and file_path.name not in ['metadata.json', 'checksums.txt']:
+                if file_path.name not in formats_in_metadata:
+                    self.warnings.append(f"File not listed in metadata: {file_path.name}")
+    
+    def _validate_file(self, file_path: Path, format_info: Dict[str, Any], asset_type: str,
+                       algorithms: List[str], technical: Any = None) -> None:
+        """Validate individual file properties from a single read of the file."""
+        raster = asset_type == 'image' and format_info.get('mimetype') not in self.VECTOR_IMAGE_TYPES
+        try:
+            probe = probe_file(file_path, self.file_magic, algorithms=algorithms,
+                               inspect_image=raster,
+                               inspect_media=asset_type in ('video', 'audio'),
+                               digest_cache=self.digest_cache)
+        except OSError as e:
+            self.errors.append(f"Could not read {file_path.name}: {e}")
+            return
+        self.probes[file_path.name] = probe
+        
+        # Check file size matches
+        stated_size = format_info.get('size', 0)
+        
+        if probe.size != stated_size:
+            self.errors.append(
+                f"File size mismatch for {file_path.name}: "
+                f"actual={probe.size}, metadata={stated_size}"
+            )
+        
+        # Check MIME type
+        if probe.mime_error is not None:
+            self.warnings.append(
+                f"Could not determine MIME type for {file_path.name}: {probe.mime_error}"
+            )
+        else:
+            stated_mime = format_info.get('mimetype')
+            
+            if probe.mimetype != stated_mime:
+                self.warnings.append(
+                    f"MIME type mismatch for {file_path.name}: "
+                    f"actual={probe.mimetype}, metadata={stated_mime}"
+                )
+        
+        # Type-specific validation
+        if raster:
+            self._validate_image(file_path, format_info, probe)
+        elif asset_type in ('video', 'audio'):
+            self._validate_media(file_path, format_info, asset_type, probe,
+                                 technical if isinstance(technical, dict) else {})
+    
+    def _validate_image(self, file_path: Path, format_info: Dict[str, Any],
+                        probe: FileProbe) -> None:
+        """Validate image-specific requirements."""
+        if probe.image_error is not None:
+            self.errors.append(f"Could not validate image {file_path.name}: {probe.image_error}")
+            return
+        
+        width, height = probe.dimensions
+        
+        # Check dimensions match metadata
+        stated_dims = format_info.get('dimensions', {})
+        if stated_dims:
+            if width != stated_dims.get('width') or height != stated_dims.get('height'):
+                self.errors.append(
+                    f"Image dimensions mismatch for {file_path.name}: "
+                    f"actual={width}x{height}, "
+                    f"metadata={stated_dims.get('width')}x{stated_dims.get('height')}"
+                )
+        
+        # Check minimum resolution
+        if width < self.MIN_IMAGE_WIDTH or height < self.MIN_IMAGE_HEIGHT:
+            self.warnings.append(
+                f"Image {file_path.name} below recommended minimum resolution "
+                f"({self.MIN_IMAGE_WIDTH}x{self.MIN_IMAGE_HEIGHT}): {width}x{height}"
+            )
+    
+    def _validate_media(self, file_path: Path, format_info: Dict[str, Any], asset_type: str,
+                        probe: FileProbe, technical: Dict[str, Any]) -> None:
+        """Validate video and audio requirements from the container headers."""
+        if probe.media_error is not None:
+            self.errors.append(f"Could not validate {asset_type} {file_path.name}: {probe.media_error}")
+            return
+        
+        media = probe.media
+        if media is None:
+            # No prober for this container
+            return
+        
+        if asset_type == 'video':
+            self._validate_video_stream(file_path, format_info, media)
+        if media.sample_rate is not None:
+            self._validate_audio_stream(file_path, media)
+        
+        # Check the stated duration
+        stated_duration = technical.get('duration')
+        if (isinstance(stated_duration, (int, float)) and media.duration is not None
+                and abs(media.duration - stated_duration) > self.DURATION_TOLERANCE):
+            self.warnings.append(
+                f"Duration mismatch for {file_path.name}: "
+                f"actual={media.duration:.2f}s, metadata={stated_duration}s"
+            )
+    
+    def _validate_video_stream(self, file_path: Path, format_info: Dict[str, Any],
+                               media: MediaInfo) -> None:
+        """Validate resolution and frame rate of a video file."""
+        if not media.has_video:
+            self.warnings.append(f"No video stream found in {file_path.name}")
+            return
+        
+        width, height = media.width, media.height
+        
+        # Check dimensions match metadata
+        stated_dims = format_info.get('dimensions', {})
+        if stated_dims:
+            if width != stated_dims.get('width') or height != stated_dims.get('height'):
+                self.errors.append(
+                    f"Video dimensions mismatch for {file_path.name}: "
+                    f"actual={width}x{height}, "
+                    f"metadata={stated_dims.get('width')}x{stated_dims.get('height')}"
+                )
+        
+        # Check resolution range
+        if width < self.MIN_VIDEO_WIDTH or height < self.MIN_VIDEO_HEIGHT:
+            self.warnings.append(
+                f"Video {file_path.name} below recommended minimum resolution "
+                f"({self.MIN_VIDEO_WIDTH}x{self.MIN_VIDEO_HEIGHT}): {width}x{height}"
+            )
+        elif width > self.MAX_VIDEO_WIDTH or height > self.MAX_VIDEO_HEIGHT:
+            self.warnings.append(
+                f"Video {file_path.name} above maximum resolution "
+                f"({self.MAX_VIDEO_WIDTH}x{self.MAX_VIDEO_HEIGHT}): {width}x{height}"
+            )
+        
+        # Check frame rate
+        frame_rate = media.frame_rate
+        if frame_rate is not None and not (
+                self.MIN_VIDEO_FRAME_RATE - 0.5 <= frame_rate <= self.MAX_VIDEO_FRAME_RATE + 0.5):
+            self.warnings.append(
+                f"Video {file_path.name} frame rate outside "
+                f"{self.MIN_VIDEO_FRAME_RATE}-{self.MAX_VIDEO_FRAME_RATE} fps: {frame_rate:.2f}"
+            )
+    
+    def _validate_audio_stream(self, file_path: Path, media: MediaInfo) -> None:
+        """Validate sample rate, bit depth and channel count of an audio stream."""
+        if media.sample_rate not in self.AUDIO_SAMPLE_RATES:
+            self.warnings.append(
+                f"Audio in {file_path.name} has a non-standard sample rate: {media.sample_rate} Hz"
+            )
+        
+        if media.bit_depth is not None and media.bit_depth not in self.AUDIO_BIT_DEPTHS:
+            self.warnings.append(
+                f"Audio in {file_path.name} has a non-standard bit depth: {media.bit_depth}-bit"
+            )
+        
+        if media.channels is not None and media.channels > self.MAX_AUDIO_CHANNELS:
+            self.warnings.append(
+                f"Audio in {file_path.name} has more than {self.MAX_AUDIO_CHANNELS} "
+                f"channels: {media.channels}"
+            )
+    
+    def _validate_dataset_profile(self, filename: str, probe: FileProbe, technical: Any) -> None:
+        """Check that the stored dataset profile describes the current file."""
+        if not profile_is_current(technical, filename, probe.digests['sha256']):
+            self.warnings.append(
+                f"Dataset profile for {filename} is missing or out of date "
+                "(run validate-assets.py with --profile-datasets)"
+            )
+    
+    def _read_checksums(self, checksum_file: Path) -> Optional[Dict[str, Dict[str, str]]]:
+        """Parse checksums.txt into the expected digests of each file."""
+        try:
+            entries = parse_checksum_file(checksum_file)
+        except Exception as e:
+            self.warnings.append(f"Could not validate checksums: {e}")
+            return None
+        
+        for entry in entries:
+            if entry.algorithm is None:
+                self.warnings.append(f"Unknown checksum format for {entry.filename}")
+        
+        return group_by_file(entries)
+    
+    @timed('validate.checksums')
+    def _validate_checksums(self, asset_path: Path, expected_checksums: Dict[str, Dict[str, str]]) -> None:
+        """Validate file checksums."""
+        try:
+            for filename, expected in expected_checksums.items():
+                # Files listed in metadata were already digested while probed
+                probe = self.probes.get(filename)
+                if probe is not None and set(expected) <= probe.digests.keys():
+                    actual = probe.digests
+                else:
+                    file_path = asset_path / filename
+                    
+                    if not file_path.exists():
+                        continue
+                    
+                    actual = hash_file_cached(file_path, list(expected), self.digest_cache)
+                
+                for algorithm, checksum in expected.items():
+                    if actual[algorithm] != checksum:
+                        self.errors.append(
+                            f"Checksum mismatch for {filename}: "
+                            f"expected={checksum}, actual={actual[algorithm]}"
+                        )
+                    
+        except Exception as e:
+            self.warnings.append(f"Could not validate checksums: {e}")
+
+
+def create_validator(cache_dir: Optional[Path], use_cache: bool, paranoid: bool,
+                     digest_algorithms: Sequence[str] = ()) -> AssetValidator:
+    """Create a validator with its own cache connections.
+    
+    --paranoid re-validates everything, but still refreshes the results.
+    """
+    digest_cache = result_cache = None
+    if use_cache:
+        digest_cache = DigestCache(cache_dir / 'digests.sqlite' if cache_dir else None,
+                                   paranoid=paranoid)
+        if not paranoid:
+            result_cache = ValidationCache(cache_dir / 'validation.sqlite' if cache_dir else None)
+    return AssetValidator(digest_cache=digest_cache, result_cache=result_cache,
+                          digest_algorithms=digest_algorithms)
+
+
+def close_validator(validator: AssetValidator) -> None:
+    """Flush and close a validator's caches."""
+    for cache in (validator.digest_cache, validator.result_cache):
+        if cache is not None:
+            cache.close()
+
+
+def report_result(result: ValidationResult, strict: bool = False) -> Tuple[int, int]:
+    """Print an asset's errors and warnings; return (errors, warnings) counted.
+    
+    With strict, every warning also counts as an error.
+    """
+    errors = warnings = 0
+    
+    if result.errors or result.warnings:
+        click.echo(f"\n{result.path}:")
+        
+        for error in result.errors:
+            click.echo(f"  ❌ ERROR: {error}", err=True)
+            errors += 1
+        
+        for warning in result.warnings:
+            click.echo(f"  ⚠️  WARNING: {warning}")
+            warnings += 1
+            
+            if strict:
+                errors += 1
+    
+    return errors, warnings
+
+
+# Each worker process owns one validator, with its own libmagic handle
+# and cache connections
+_worker_validator: Optional[AssetValidator] = None
+
+
+def _init_worker(cache_dir: Optional[Path], use_cache: bool, paranoid: bool) -> None:
+    global _worker_validator
+    _worker_validator = create_validator(cache_dir, use_cache, paranoid)
+    # Flush batched cache writes when the worker exits
+    Finalize(None, close_validator, args=(_worker_validator,), exitpriority=10)
+
+
+def _validate_in_worker(asset_path: Path) -> ValidationResult:
+    return _worker_validator.validate_asset(asset_path)
+
+
+def validate_assets(asset_paths: List[Path], jobs: int, cache_dir: Optional[Path],
+                    use_cache: bool, paranoid: bool) -> Iterator[ValidationResult]:
+    """Validate assets, in a process pool when jobs > 1, yielding results in input order."""
+    if jobs <= 1 or len(asset_paths) <= 1:
+        validator = create_validator(cache_dir, use_cache, paranoid)
+        try:
+            for asset_path in asset_paths:
+                yield validator.validate_asset(asset_path)
+        finally:
+            close_validator(validator)
+        return
+    
+    chunksize = max(1, min(16, len(asset_paths) // (jobs * 8)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(cache_dir, use_cache, paranoid)) as pool:
+        yield from pool.map(_validate_in_worker, asset_paths, chunksize=chunksize)
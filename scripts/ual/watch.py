@@ -0,0 +1,246 @@
+"""
+Watch mode: keep the catalog current while assets change.
+
+A watchdog observer reports filesystem events under the assets root into
+a ChangeQueue, which hands them out in batches once they have been quiet
+for a short debounce interval (or pending for at most max_delay, so a
+long copy still shows progress). Each batch is mapped to the asset
+directories it touches; only those are revalidated and rehashed, and
+their records are patched into the catalog records held in memory by a
+LiveCatalog, which rewrites the catalog files without rescanning the tree.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from watchdog.events import (EVENT_TYPE_CLOSED, EVENT_TYPE_CREATED, EVENT_TYPE_DELETED,
+                             EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED, FileSystemEvent,
+                             FileSystemEventHandler)
+from watchdog.observers import Observer
+
+from ual.catalog import CatalogBuilder, discover_metadata_files
+from ual.instrumentation import timed
+from ual.search import SearchIndexBuilder
+
+DEBOUNCE_SECONDS = 0.2
+MAX_DELAY_SECONDS = 1.0
+
+# Validation opens every file, so read-only events (opened, closed_no_write)
+# must not count as changes
+_CHANGE_EVENTS = {EVENT_TYPE_CREATED, EVENT_TYPE_DELETED, EVENT_TYPE_MODIFIED,
+                  EVENT_TYPE_MOVED, EVENT_TYPE_CLOSED}
+
+
+class ChangeQueue:
+    """Changed paths collected from the observer thread, drained in debounced batches."""
+
+    def __init__(self, debounce: float = DEBOUNCE_SECONDS,
+                 max_delay: float = MAX_DELAY_SECONDS):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        # path -> whether it is a directory whose whole subtree changed
+        self._changes: Dict[str, bool] = {}
+        self._first = self._last = 0.0
+        self._condition = threading.Condition()
+        # Files the pipeline wrote itself, with the mtime it left behind
+        self._own_writes: Dict[str, int] = {}
+
+    def put(self, path: str, is_directory: bool = False) -> None:
+        now = time.monotonic()
+        with self._condition:
+            if not self._changes:
+                self._first = now
+            self._changes[path] = self._changes.get(path, False) or is_directory
+            self._last = now
+            self._condition.notify()
+
+    def record_own_write(self, path: Path) -> None:
+        """Ignore events for path for as long as it is the version just written."""
+        try:
+            self._own_writes[os.fspath(path)] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass
+
+    def _is_own_write(self, path: str) -> bool:
+        mtime_ns = self._own_writes.get(path)
+        if mtime_ns is None:
+            return False
+        try:
+            if os.stat(path).st_mtime_ns == mtime_ns:
+                return True
+        except OSError:
+            pass
+        del self._own_writes[path]
+        return False
+
+    def wait(self) -> Dict[str, bool]:
+        """Block until a batch is ready; return it as {path: is_directory}."""
+        with self._condition:
+            while True:
+                if not self._changes:
+                    # Wake up regularly so KeyboardInterrupt is delivered
+                    self._condition.wait(1.0)
+                    continue
+                ready_at = min(self._last + self.debounce, self._first + self.max_delay)
+                remaining = ready_at - time.monotonic()
+                if remaining <= 0:
+                    changes, self._changes = self._changes, {}
+                    break
+                self._condition.wait(remaining)
+
+        return {path: is_directory for path, is_directory in changes.items()
+                if is_directory or not self._is_own_write(path)}
+
+
+class AssetEventHandler(FileSystemEventHandler):
+    """Feed watchdog events under the assets root into a ChangeQueue."""
+
+    def __init__(self, queue: ChangeQueue, ignore: Iterable[Path] = ()):
+        self.queue = queue
+        # e.g. a catalog directory inside the assets tree
+        self.ignore = [os.fspath(Path(path).resolve()) for path in ignore]
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.event_type not in _CHANGE_EVENTS:
+            return
+        # A directory's own modified events only mean its entries changed,
+        # which are reported separately
+        if event.is_directory and event.event_type in (EVENT_TYPE_MODIFIED, EVENT_TYPE_CLOSED):
+            return
+
+        for path in (event.src_path, getattr(event, 'dest_path', '')):
+            if not path:
+                continue
+            path = os.fsdecode(path)
+            if any(path == ignored or path.startswith(ignored + os.sep)
+                   for ignored in self.ignore):
+                continue
+            self.queue.put(path, event.is_directory)
+
+
+def affected_assets(root: Path, changes: Dict[str, bool], known: Set[str]) -> Set[str]:
+    """Map changed paths to the asset directories (relative to root) they affect.
+
+    A changed file belongs to the nearest enclosing directory that holds
+    metadata.json, or that is in known (the assets currently cataloged) if
+    it has just been removed. A directory created, moved or removed as a
+    whole may hold many assets: every known asset below it is included and
+    what exists now is rescanned.
+    """
+    affected = set()
+
+    for path, is_directory in changes.items():
+        relative = os.path.relpath(path, root)
+        if relative.startswith('..'):
+            continue
+
+        if is_directory:
+            if relative == '.':
+                affected.update(known)
+            else:
+                affected.update(key for key in known
+                                if key == relative or key.startswith(relative + os.sep))
+            if os.path.isdir(path):
+                affected.update(os.path.relpath(os.path.dirname(metadata_path), root)
+                                for metadata_path in discover_metadata_files(Path(path)))
+
+        directory = relative if is_directory else os.path.dirname(relative)
+        while directory not in ('', '.'):
+            if directory in known or os.path.isfile(os.path.join(root, directory, 'metadata.json')):
+                affected.add(directory)
+                break
+            directory = os.path.dirname(directory)
+
+    return affected
+
+
+class LiveCatalog:
+    """Catalog records held in memory, patched and rewritten per batch of changes.
+
+    Statistics and the search index are kept up to date as records come and
+    go, so a patch only re-counts and re-tokenizes the changed assets; what
+    still grows with the library is writing the files, whose sidecars are
+    compressed at fast levels from here on.
+    """
+
+    def __init__(self, builder: CatalogBuilder, records: Iterable[Dict[str, Any]]):
+        self.builder = builder
+        self.records: Dict[str, Dict[str, Any]] = {}
+        # Unchanged records keep their encoded JSON from one write to the next
+        builder.encoded_records = {}
+        self._stats: Dict[Optional[str], Dict[str, Any]] = {}
+        # Keyed by asset path, as catalog positions shift when assets come and go
+        self._search = SearchIndexBuilder() if builder.build_search_index else None
+        for record in records:
+            self._add(record)
+
+        builder.search_index = self._search
+        builder.fast_compression = True
+
+    def _add(self, record: Dict[str, Any]) -> None:
+        self.records[record['_path']] = record
+        self.builder.encoded_records[id(record)] = None
+        self.builder.add_stats(self._stats, record)
+        if self._search is not None:
+            self._search.add(record['_path'], record)
+
+    def _remove(self, key: str) -> Optional[Dict[str, Any]]:
+        record = self.records.pop(key, None)
+        if record is not None:
+            del self.builder.encoded_records[id(record)]
+            self.builder.remove_stats(self._stats, record)
+            if self._search is not None:
+                self._search.remove(key, record)
+        return record
+
+    @timed('watch.patch')
+    def patch(self, changes: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        """Replace records by asset path (None removes the asset) and rewrite the catalog.
+
+        Of the type catalogs only those of types gaining or losing assets
+        are rewritten.
+        """
+        changed_types = set()
+        for key, record in changes.items():
+            previous = self._remove(key)
+            if previous is not None:
+                changed_types.add(previous.get('type'))
+            if record is not None:
+                self._add(record)
+                changed_types.add(record.get('type'))
+
+        sorted_assets = sorted(self.records.values(), key=lambda x: x.get('id', ''))
+        if self._search is not None:
+            self._search.positions = {
+                asset['_path']: position for position, asset in enumerate(sorted_assets)
+            }
+
+        main_catalog, type_catalogs = self.builder.assemble_catalogs(sorted_assets, self._stats)
+        self.builder.write_outputs(main_catalog, type_catalogs, changed_types)
+
+
+def watch_assets(root: Path, queue: ChangeQueue, on_batch: Callable[[List[str]], None],
+                 known: Callable[[], Set[str]], ignore: Iterable[Path] = ()) -> None:
+    """Observe root until interrupted, calling on_batch with each batch's asset directories.
+
+    known returns the asset directories currently cataloged; on_batch gets
+    the affected ones, relative to root and sorted.
+    """
+    root = Path(root).resolve()
+    observer = Observer()
+    observer.schedule(AssetEventHandler(queue, ignore), os.fspath(root), recursive=True)
+    observer.start()
+
+    try:
+        while True:
+            assets = affected_assets(root, queue.wait(), known())
+            if assets:
+                on_batch(sorted(assets))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
+        observer.join()
@@ -0,0 +1,46 @@
+"""
+Shared fixtures: a small synthetic asset library and isolated caches.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from ual.synthetic import LibrarySpec, generate_library
+
+# Seed 5 draws every asset type within the first 20 assets
+LIBRARY_SPEC = LibrarySpec(count=20, seed=5)
+
+
+def _backdate(root: Path, seconds: float = 3600) -> None:
+    """Move every file's mtime into the past, out of the caches' racy window."""
+    past = time.time() - seconds
+    for path in Path(root).rglob('*'):
+        if path.is_file():
+            os.utime(path, (past, past))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep the default cache directory inside the test's temporary directory."""
+    path = tmp_path / 'cache'
+    monkeypatch.setenv('UAL_CACHE_DIR', str(path))
+    return path
+
+
+@pytest.fixture
+def backdate() -> Callable[..., None]:
+    return _backdate
+
+
+@pytest.fixture
+def library(tmp_path: Path) -> Path:
+    """A freshly generated library of LIBRARY_SPEC.count valid assets."""
+    root = tmp_path / 'assets'
+    for _ in generate_library(root, LIBRARY_SPEC):
+        pass
+    _backdate(root)
+    return root
@@ -0,0 +1,186 @@
+"""
+Tests for the persistent digest and validation caches.
+"""
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from ual.cache import DigestCache, ValidationCache, default_cache_dir
+from ual.validation import AssetValidator
+
+DIGESTS = {'md5': 'a' * 32, 'sha256': 'b' * 64}
+
+
+@pytest.fixture
+def data_file(tmp_path, backdate):
+    path = tmp_path / 'files' / 'data.bin'
+    path.parent.mkdir()
+    path.write_bytes(b'contents')
+    backdate(path.parent)
+    return path
+
+
+def test_default_cache_dir_is_anchored_to_the_repository(tmp_path, monkeypatch):
+    monkeypatch.delenv('UAL_CACHE_DIR')
+    monkeypatch.chdir(tmp_path)
+
+    assert default_cache_dir() == Path(__file__).resolve().parent.parent / '.cache' / 'ual'
+
+
+def test_digests_are_found_before_and_after_they_are_flushed(tmp_path, data_file):
+    cache = DigestCache(tmp_path / 'digests.sqlite')
+    st = os.stat(data_file)
+    cache.store(st, DIGESTS)
+
+    assert cache.lookup(st, ('md5', 'sha256')) == DIGESTS
+    assert cache.lookup(st, ('md5', 'sha1')) is None
+    cache.close()
+
+    reopened = DigestCache(tmp_path / 'digests.sqlite')
+    assert reopened.lookup(os.stat(data_file), ('sha256',)) == {'sha256': DIGESTS['sha256']}
+    reopened.close()
+
+
+def test_changed_files_miss_and_replace_their_old_entries(tmp_path, data_file):
+    cache = DigestCache(tmp_path / 'digests.sqlite')
+    cache.store(os.stat(data_file), DIGESTS)
+
+    data_file.write_bytes(b'new contents')
+    past = time.time() - 600
+    os.utime(data_file, (past, past))
+    st = os.stat(data_file)
+    assert cache.lookup(st, ('md5',)) is None
+
+    # Both versions are written in the same batch
+    cache.store(st, {'md5': 'c' * 32})
+    cache.close()
+    reopened = DigestCache(tmp_path / 'digests.sqlite')
+    assert reopened.lookup(st, ('md5',)) == {'md5': 'c' * 32}
+    reopened.close()
+
+
+def test_recently_modified_files_are_not_cached(tmp_path):
+    path = tmp_path / 'fresh.bin'
+    path.write_bytes(b'just written')
+    cache = DigestCache(tmp_path / 'digests.sqlite')
+
+    cache.store(os.stat(path), DIGESTS)
+
+    assert cache.lookup(os.stat(path), ('md5',)) is None
+    cache.close()
+
+
+def test_paranoid_cache_records_but_never_answers(tmp_path, data_file):
+    paranoid = DigestCache(tmp_path / 'digests.sqlite', paranoid=True)
+    first = paranoid.hash_file(data_file, ('md5',))
+    assert paranoid.hash_file(data_file, ('md5',)) == first
+    assert (paranoid.hits, paranoid.misses) == (0, 2)
+    paranoid.close()
+
+    cache = DigestCache(tmp_path / 'digests.sqlite')
+    assert cache.hash_file(data_file, ('md5',)) == first
+    assert (cache.hits, cache.misses) == (1, 0)
+    cache.close()
+
+
+def test_files_changing_while_hashed_are_not_cached(tmp_path, data_file):
+    cache = DigestCache(tmp_path / 'digests.sqlite')
+    st = os.stat(data_file)
+    later = os.stat_result(st[:8] + (st.st_mtime + 1, st.st_ctime))
+
+    cache.get_or_compute(st, ('md5',), lambda: {'md5': 'a' * 32}, lambda: later)
+
+    assert cache.lookup(st, ('md5',)) is None
+    cache.close()
+
+
+def test_validation_outcomes_are_keyed(tmp_path):
+    media = {'clip.mp4': {'container': 'mp4', 'duration': 1.5, 'width': 640}}
+    cache = ValidationCache(tmp_path / 'validation.sqlite')
+    cache.store('assets/a', 'key-1', ['an error'], ['a warning'], media)
+    cache.close()
+
+    cache = ValidationCache(tmp_path / 'validation.sqlite')
+    assert cache.lookup('assets/a', 'key-1') == (['an error'], ['a warning'], media)
+    assert cache.lookup('assets/a', 'key-2') is None
+    assert cache.lookup('assets/b', 'key-1') is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Only the latest outcome per asset is kept
+    cache.store('assets/a', 'key-2', [], [], {})
+    cache.close()
+    cache = ValidationCache(tmp_path / 'validation.sqlite')
+    assert cache.lookup('assets/a', 'key-1') is None
+    assert cache.lookup('assets/a', 'key-2') == ([], [], {})
+    cache.close()
+
+
+def test_validation_tables_without_media_are_discarded(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'validation.sqlite'))
+    conn.execute('CREATE TABLE validations (asset_path TEXT PRIMARY KEY, key TEXT NOT NULL,'
+                 ' errors TEXT NOT NULL, warnings TEXT NOT NULL)')
+    conn.execute("INSERT INTO validations VALUES ('assets/a', 'key-1', '[]', '[]')")
+    conn.commit()
+    conn.close()
+
+    cache = ValidationCache(tmp_path / 'validation.sqlite')
+    assert cache.lookup('assets/a', 'key-1') is None
+    cache.close()
+
+
+def video_asset(library):
+    return next(path.parent for path in sorted(library.rglob('*.mp4')))
+
+
+def test_replayed_validation_keeps_probed_media(library, tmp_path):
+    asset = video_asset(library)
+    validator = AssetValidator(result_cache=ValidationCache(tmp_path / 'validation.sqlite'))
+
+    first = validator.validate_asset(asset)
+    replayed = validator.validate_asset(asset)
+
+    assert first.valid and first.media
+    assert validator.result_cache.hits == 1
+    assert replayed == first
+    assert replayed.media == first.media
+    validator.result_cache.close()
+
+
+def touch_back(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - 10 ** 9))
+
+
+@pytest.mark.parametrize('change', ['metadata', 'file', 'new-subdirectory', 'nested-file'])
+def test_validation_key_changes_with_the_asset(library, tmp_path, backdate, change):
+    asset = video_asset(library)
+    renditions = asset / 'renditions'
+    renditions.mkdir()
+    (renditions / 'poster-320.webp').write_bytes(b'rendition')
+    backdate(asset)
+    validator = AssetValidator(result_cache=ValidationCache(tmp_path / 'validation.sqlite'))
+    key = validator._result_cache_key(asset)
+    assert validator._result_cache_key(asset) == key
+
+    if change == 'metadata':
+        metadata = asset / 'metadata.json'
+        metadata.write_text(metadata.read_text(encoding='utf-8') + '\n', encoding='utf-8')
+    elif change == 'file':
+        touch_back(next(asset.glob('*.mp4')))
+    elif change == 'new-subdirectory':
+        (asset / 'extras').mkdir()
+    else:
+        touch_back(renditions / 'poster-320.webp')
+
+    assert validator._result_cache_key(asset) not in (key, None)
+
+    # Files modified within the racy window give no key at all
+    (asset / 'notes.txt').write_text('new file', encoding='utf-8')
+    assert validator._result_cache_key(asset) is None
+    backdate(asset)
+    assert validator._result_cache_key(asset) is not None
+    validator.result_cache.close()
@@ -0,0 +1,129 @@
+"""
+Tests for catalog building: incremental scans, shards and live patches.
+"""
+
+import copy
+import gzip
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict
+
+from ual.catalog import CatalogBuilder
+from ual.watch import LiveCatalog
+
+
+def load(path: Path) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build(assets_dir: Path, catalog_dir: Path, **options: Any) -> CatalogBuilder:
+    builder = CatalogBuilder(str(assets_dir), str(catalog_dir), **options)
+    builder.build()
+    return builder
+
+
+def without_generated(document: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in document.items() if key != 'generated'}
+
+
+def test_incremental_scan_reparses_only_changed_metadata(library, tmp_path, capsys):
+    metadata_files = sorted(library.rglob('metadata.json'))
+    total = len(metadata_files)
+    catalog = tmp_path / 'catalog'
+    build(library, catalog, incremental=True)
+    assert len(load(catalog / '.scan-manifest.json')['entries']) == total
+
+    metadata = load(metadata_files[0])
+    metadata['title'] = 'Renamed asset'
+    metadata_files[0].write_text(json.dumps(metadata), encoding='utf-8')
+    shutil.rmtree(metadata_files[1].parent)
+    capsys.readouterr()
+
+    build(library, catalog, incremental=True)
+    assert (f"Incremental scan: 1 parsed, {total - 2} unchanged, 1 removed"
+            in capsys.readouterr().out)
+
+    assets = load(catalog / 'assets.json')['assets']
+    assert len(assets) == total - 1
+    assert 'Renamed asset' in {asset['title'] for asset in assets}
+    assert len(load(catalog / '.scan-manifest.json')['entries']) == total - 1
+
+
+def test_incremental_scan_matches_full_scan(library, tmp_path):
+    build(library, tmp_path / 'incremental', incremental=True)
+    build(library, tmp_path / 'incremental', incremental=True)
+    build(library, tmp_path / 'full')
+
+    assert (without_generated(load(tmp_path / 'incremental' / 'assets.json'))
+            == without_generated(load(tmp_path / 'full' / 'assets.json')))
+
+
+def test_shards_list_every_asset_once_in_id_order(library, tmp_path):
+    catalog = tmp_path / 'catalog'
+    build(library, catalog, shard_size=6)
+    manifest = load(catalog / 'shards' / 'manifest.json')
+    assets = load(catalog / 'assets.json')['assets']
+
+    pages = manifest['shards']['id']
+    assert [page['count'] for page in pages] == [6, 6, 6, 2]
+    paged = [asset['id'] for page in pages for asset in load(catalog / page['path'])['assets']]
+    assert paged == [asset['id'] for asset in assets]
+
+    for page in pages:
+        data = (catalog / page['path']).read_bytes()
+        assert hashlib.sha256(data).hexdigest() == page['sha256']
+        assert gzip.decompress((catalog / (page['path'] + '.gz')).read_bytes()) == data
+
+    by_type = {}
+    for asset in assets:
+        by_type[asset['type']] = by_type.get(asset['type'], 0) + 1
+    assert manifest['by_type'] == by_type
+    for asset_type, type_pages in manifest['shards']['type'].items():
+        assert sum(page['count'] for page in type_pages) == by_type[asset_type]
+
+
+def test_shards_from_larger_builds_are_removed(library, tmp_path):
+    catalog = tmp_path / 'catalog'
+    build(library, catalog, shard_size=6)
+    build(library, catalog, shard_size=10)
+
+    pages = sorted(path.name for path in (catalog / 'shards' / 'id').iterdir())
+    assert pages == ['0000.json', '0000.json.br', '0000.json.gz',
+                     '0001.json', '0001.json.br', '0001.json.gz']
+
+
+def test_live_patch_matches_a_full_rebuild(library, tmp_path):
+    builder = CatalogBuilder(str(library), str(tmp_path / 'live'), shard_size=6)
+    records = builder.scan_assets()
+    builder.build(records)
+    live = LiveCatalog(builder, records)
+
+    renamed = copy.deepcopy(records[0])
+    renamed['title'] = 'Zebra crossing'
+    renamed['tags'] = ['zebra'] + renamed['tags']
+    retyped = copy.deepcopy(records[1])
+    retyped['type'] = 'archive' if retyped['type'] != 'archive' else 'image'
+    added = copy.deepcopy(records[2])
+    added['id'] = 'aaa-added'
+    added['_path'] = 'added/asset'
+    live.patch({
+        renamed['_path']: renamed,
+        retyped['_path']: retyped,
+        records[3]['_path']: None,
+        added['_path']: added,
+    })
+
+    rebuilt = tmp_path / 'rebuilt'
+    CatalogBuilder(str(library), str(rebuilt), shard_size=6).build(list(live.records.values()))
+
+    live_dir = tmp_path / 'live'
+    files = sorted(path.relative_to(rebuilt) for path in rebuilt.rglob('*.json'))
+    assert files == sorted(path.relative_to(live_dir) for path in live_dir.rglob('*.json'))
+    for relative in files:
+        patched, expected = load(live_dir / relative), load(rebuilt / relative)
+        if isinstance(expected, dict):
+            patched, expected = without_generated(patched), without_generated(expected)
+        assert patched == expected, relative
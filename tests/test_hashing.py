@@ -0,0 +1,96 @@
+"""
+Tests for multi-digest hashing and the checksums.txt parser.
+"""
+
+import hashlib
+
+from ual.checksums import ChecksumGenerator
+from ual.hashing import ChecksumEntry, group_by_file, hash_file, parse_checksum_file
+
+MD5 = 'd41d8cd98f00b204e9800998ecf8427e'
+SHA256 = 'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855'
+BLAKE2B = hashlib.blake2b(b'').hexdigest()
+SHA512 = hashlib.sha512(b'').hexdigest()
+
+
+def test_hash_file_computes_every_digest_in_one_read(tmp_path):
+    path = tmp_path / 'data.bin'
+    data = bytes(range(256)) * 5000
+    path.write_bytes(data)
+
+    assert hash_file(path, ('md5', 'sha256', 'sha1')) == {
+        'md5': hashlib.md5(data).hexdigest(),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'sha1': hashlib.sha1(data).hexdigest(),
+    }
+
+
+def test_section_headers_name_the_algorithm(tmp_path):
+    path = tmp_path / 'checksums.txt'
+    path.write_text(
+        "# Checksums for asset files\n"
+        "# Format: [checksum]  [filename]\n"
+        "\n"
+        "# MD5 checksums\n"
+        f"{MD5}  a.png\n"
+        "\n"
+        "# SHA-256 checksums\n"
+        f"{SHA256.upper()}  a.png\n"
+        "# BLAKE2B checksums\n"
+        f"{BLAKE2B}  a.png\n",
+        encoding='utf-8'
+    )
+
+    assert parse_checksum_file(path) == [
+        ChecksumEntry('a.png', 'md5', MD5),
+        ChecksumEntry('a.png', 'sha256', SHA256),
+        # Same length as SHA-512, told apart by its header
+        ChecksumEntry('a.png', 'blake2b', BLAKE2B),
+    ]
+
+
+def test_digests_without_a_usable_header_are_identified_by_length(tmp_path):
+    path = tmp_path / 'checksums.txt'
+    path.write_text(
+        f"{MD5}  a.png\n"
+        "# Unknown checksums\n"
+        f"{SHA512}  a.png\n"
+        "# SHA256 checksums\n"
+        f"{MD5}  b.png\n"
+        "abc123  c.png\n"
+        "not a checksum line\n",
+        encoding='utf-8'
+    )
+
+    assert parse_checksum_file(path) == [
+        ChecksumEntry('a.png', 'md5', MD5),
+        ChecksumEntry('a.png', 'sha512', SHA512),
+        # The wrong length for its section, so the length decides
+        ChecksumEntry('b.png', 'md5', MD5),
+        ChecksumEntry('c.png', None, 'abc123'),
+    ]
+
+
+def test_group_by_file_drops_unidentified_digests():
+    entries = [
+        ChecksumEntry('a.png', 'md5', MD5),
+        ChecksumEntry('a.png', 'sha256', SHA256),
+        ChecksumEntry('b.png', 'md5', MD5),
+        ChecksumEntry('c.png', None, 'abc123'),
+    ]
+
+    assert group_by_file(entries) == {
+        'a.png': {'md5': MD5, 'sha256': SHA256},
+        'b.png': {'md5': MD5},
+    }
+
+
+def test_written_checksum_files_parse_back(tmp_path):
+    checksums = {'b.wav': {'md5': MD5, 'sha256': SHA256, 'size': 0},
+                 'a.png': {'md5': MD5, 'sha256': SHA256, 'size': 0}}
+    ChecksumGenerator().write_checksum_file(tmp_path, checksums)
+
+    assert group_by_file(parse_checksum_file(tmp_path / 'checksums.txt')) == {
+        'a.png': {'md5': MD5, 'sha256': SHA256},
+        'b.wav': {'md5': MD5, 'sha256': SHA256},
+    }
@@ -0,0 +1,104 @@
+"""
+Tests for the header-only MP4, WAV and FLAC probes.
+"""
+
+import random
+import struct
+
+import pytest
+
+from ual.media import MediaInfo, MediaProbeError, MediaUnsupportedError, probe_media
+from ual.synthetic import build_audio, build_video
+
+
+def flac_file(sample_rate: int, channels: int, bit_depth: int, total_samples: int) -> bytes:
+    packed = (sample_rate << 44 | (channels - 1) << 41 | (bit_depth - 1) << 36
+              | total_samples)
+    streaminfo = struct.pack('>HH', 4096, 4096) + bytes(6) + packed.to_bytes(8, 'big') + bytes(16)
+    # Last metadata block, type 0 (STREAMINFO)
+    return b'fLaC' + bytes([0x80]) + len(streaminfo).to_bytes(3, 'big') + streaminfo
+
+
+def test_mp4_probe_reads_the_moov_box(tmp_path):
+    data, fmt, technical = build_video(random.Random(1), 200_000)
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(data)
+
+    info = probe_media(path)
+
+    assert info.container == 'mp4'
+    assert (info.width, info.height) == (fmt['dimensions']['width'],
+                                         fmt['dimensions']['height'])
+    assert info.video_codec == 'avc1'
+    assert info.audio_codec == 'mp4a'
+    assert info.duration == pytest.approx(technical['duration'], abs=0.001)
+    assert info.frame_rate == pytest.approx(technical['framerate'])
+    assert info.bitrate == round(len(data) * 8 / info.duration)
+    assert info.has_video
+
+
+def test_mp4_probe_finds_moov_after_mdat(tmp_path):
+    data, fmt, technical = build_video(random.Random(2), 100_000)
+    # build_video writes ftyp, moov, mdat; move moov to the end
+    ftyp_size = struct.unpack('>I', data[:4])[0]
+    moov_size = struct.unpack('>I', data[ftyp_size:ftyp_size + 4])[0]
+    moov = data[ftyp_size:ftyp_size + moov_size]
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(data[:ftyp_size] + data[ftyp_size + moov_size:] + moov)
+
+    info = probe_media(path)
+
+    assert info.width == fmt['dimensions']['width']
+    assert info.duration == pytest.approx(technical['duration'], abs=0.001)
+
+
+def test_wav_probe_reads_the_fmt_chunk(tmp_path):
+    data, _, technical = build_audio(random.Random(3), 50_000)
+    path = tmp_path / 'tone.wav'
+    path.write_bytes(data)
+
+    info = probe_media(path)
+
+    assert info == MediaInfo(
+        'wav', duration=pytest.approx(technical['duration'], abs=0.001), audio_codec='pcm',
+        sample_rate=technical['sample_rate'], channels=technical['channels'],
+        bit_depth=technical['bit_depth'],
+        bitrate=technical['sample_rate'] * technical['channels'] * technical['bit_depth']
+    )
+    assert not info.has_video
+
+
+def test_flac_probe_reads_streaminfo(tmp_path):
+    path = tmp_path / 'song.flac'
+    path.write_bytes(flac_file(48000, 2, 24, 48000 * 90))
+
+    info = probe_media(path)
+
+    assert (info.container, info.audio_codec) == ('flac', 'flac')
+    assert (info.sample_rate, info.channels, info.bit_depth) == (48000, 2, 24)
+    assert info.duration == 90
+    assert info.technical() == {'duration': 90, 'bitrate': info.bitrate, 'codec': 'flac',
+                                'sample_rate': 48000, 'channels': 2, 'bit_depth': 24}
+
+
+@pytest.mark.parametrize('data', [
+    b'fLaC' + bytes([0x81]) + bytes(3),
+    b'fLaC' + bytes([0x80, 0, 0, 34]) + bytes(10),
+    b'\0\0\0\x10ftypisom' + bytes(4),
+    b'RIFF\x04\0\0\0WAVE',
+], ids=['no-streaminfo', 'truncated-streaminfo', 'no-moov', 'no-fmt'])
+def test_malformed_headers_raise_probe_errors(tmp_path, data):
+    path = tmp_path / 'broken.bin'
+    path.write_bytes(data)
+
+    with pytest.raises(MediaProbeError):
+        probe_media(path)
+
+
+def test_other_containers_need_ffprobe(tmp_path, monkeypatch):
+    monkeypatch.setattr('ual.media.shutil.which', lambda name: None)
+    path = tmp_path / 'clip.webm'
+    path.write_bytes(b'\x1aE\xdf\xa3' + bytes(60))
+
+    with pytest.raises(MediaUnsupportedError):
+        probe_media(path)
@@ -0,0 +1,50 @@
+"""
+Tests for rendition generation and its on-disk manifest.
+"""
+
+import json
+
+from ual.renditions import (MANIFEST_NAME, RENDITIONS_DIR, RenditionSpec, remove_stale_files,
+                            renditions_for_asset)
+
+SPECS = [RenditionSpec('thumbnail', 64, 'webp'), RenditionSpec('responsive', 128, 'webp')]
+
+
+def image_asset(library):
+    asset = next(path.parent for path in sorted(library.rglob('metadata.json'))
+                 if '/images/' in path.as_posix())
+    with open(asset / 'metadata.json', 'r', encoding='utf-8') as f:
+        return asset, json.load(f)
+
+
+def test_recorded_renditions_are_current(library):
+    asset, metadata = image_asset(library)
+
+    status, renditions = renditions_for_asset(asset, metadata, SPECS)
+    assert status == 'rendered'
+    assert [entry['filename'].split('/')[0] for entry in renditions] == [RENDITIONS_DIR] * 2
+
+    metadata['renditions'] = renditions
+    assert renditions_for_asset(asset, metadata, SPECS) == ('current', None)
+
+
+def test_unrecorded_renditions_are_restored_from_the_manifest(library):
+    asset, metadata = image_asset(library)
+    _, renditions = renditions_for_asset(asset, metadata, SPECS)
+
+    # A fresh checkout of metadata.json with a renditions directory restored from a cache
+    assert renditions_for_asset(asset, metadata, SPECS) == ('restored', renditions)
+    assert renditions_for_asset(asset, metadata, SPECS, force=True)[0] == 'rendered'
+
+    # A manifest that no longer matches the files is not trusted
+    (asset / renditions[0]['filename']).write_bytes(b'truncated')
+    assert renditions_for_asset(asset, metadata, SPECS)[0] == 'rendered'
+
+
+def test_stale_file_removal_keeps_the_manifest(library):
+    asset, metadata = image_asset(library)
+    _, renditions = renditions_for_asset(asset, metadata, SPECS)
+    (asset / RENDITIONS_DIR / 'old-thumb.webp').write_bytes(b'old')
+
+    assert remove_stale_files(asset, renditions) == 1
+    assert (asset / RENDITIONS_DIR / MANIFEST_NAME).exists()
@@ -0,0 +1,88 @@
+"""
+End-to-end tests of scripts/run-pipeline.py, run as CI runs it.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'scripts' / 'run-pipeline.py'
+
+
+def run_pipeline(assets: Path, catalog: Path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, str(SCRIPT), '--assets-dir', str(assets),
+         '--catalog-dir', str(catalog), *args],
+        capture_output=True, text=True, env=os.environ.copy(), timeout=300
+    )
+
+
+def catalog_assets(catalog: Path) -> Dict[str, Any]:
+    with open(catalog / 'assets.json', 'r', encoding='utf-8') as f:
+        return {asset['id']: asset for asset in json.load(f)['assets']}
+
+
+def test_valid_library_exits_zero_and_writes_the_catalog(library, tmp_path):
+    catalog = tmp_path / 'catalog'
+
+    result = run_pipeline(library, catalog, '--strict', '--profile-datasets')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert len(catalog_assets(catalog)) == len(list(library.rglob('metadata.json')))
+
+
+def test_validation_errors_exit_non_zero_without_writing(library, tmp_path):
+    broken = next(library.rglob('*.wav'))
+    broken.write_bytes(b'not audio')
+    catalog = tmp_path / 'catalog'
+
+    result = run_pipeline(library, catalog)
+
+    assert result.returncode == 1
+    assert f"File size mismatch for {broken.name}" in result.stderr
+    assert not (catalog / 'assets.json').exists()
+
+
+def test_missing_assets_directory_exits_non_zero(tmp_path):
+    result = run_pipeline(tmp_path / 'missing', tmp_path / 'catalog')
+
+    assert result.returncode == 1
+    assert 'Assets directory does not exist' in result.stderr
+
+
+def test_cached_run_writes_the_same_catalog(library, tmp_path):
+    cache = tmp_path / 'pipeline-cache'
+
+    cold = run_pipeline(library, tmp_path / 'cold', '--cache-dir', str(cache))
+    warm = run_pipeline(library, tmp_path / 'warm', '--cache-dir', str(cache))
+
+    assert cold.returncode == warm.returncode == 0, cold.stderr + warm.stderr
+    assert catalog_assets(tmp_path / 'warm') == catalog_assets(tmp_path / 'cold')
+    media = [fmt['media'] for asset in catalog_assets(tmp_path / 'warm').values()
+             for fmt in asset['formats'] if 'media' in fmt]
+    assert media
+
+
+def test_validating_does_not_import_pyarrow():
+    # Only dataset profiling needs it, and it is slow to import in every worker
+    result = subprocess.run(
+        [sys.executable, '-c', "import sys, ual.pipeline, ual.validation; "
+                               "print('pyarrow' in sys.modules)"],
+        capture_output=True, text=True, cwd=SCRIPT.parent, timeout=60
+    )
+
+    assert result.stdout.strip() == 'False', result.stderr
+
+
+def test_search_without_an_index_exits_non_zero(tmp_path):
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT.parent / 'search-catalog.py'), 'forest',
+         '--catalog-dir', str(tmp_path)],
+        capture_output=True, text=True, timeout=60
+    )
+
+    assert result.returncode == 1
+    assert 'No search index' in result.stderr
@@ -0,0 +1,113 @@
+"""
+Tests for the prebuilt search index: tokenization, lookups and ranking.
+"""
+
+from ual.search import SEARCH_FIELDS, SearchIndex, SearchIndexBuilder, tokenize
+
+ASSETS = [
+    {'id': 'a', 'title': 'Forest at dawn', 'description': 'Mist over pines',
+     'tags': ['forest', 'nature'], 'category': 'landscape', 'creator': {'name': 'Ana'}},
+    {'id': 'b', 'title': 'City lights', 'description': 'A forest of towers',
+     'tags': ['city', 'night'], 'category': 'urban', 'creator': {'name': 'Bo'}},
+    {'id': 'c', 'title': 'Forestry report', 'description': 'Café statistics',
+     'tags': ['data'], 'category': 'science', 'creator': {'name': 'Forest Lab'}},
+]
+
+
+def field_mask(*fields: str) -> int:
+    return sum(1 << SEARCH_FIELDS.index(field) for field in fields)
+
+
+def index_of(assets) -> SearchIndex:
+    builder = SearchIndexBuilder()
+    for position, asset in enumerate(assets):
+        builder.add(position, asset)
+    return SearchIndex(builder.to_document())
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize('Café CRÈME brûlée') == ['cafe', 'creme', 'brulee']
+
+
+def test_tokenize_splits_on_anything_but_letters_and_numbers():
+    assert tokenize('snake_case, x-ray/3D  (v2.0)') == ['snake', 'case', 'x', 'ray', '3d',
+                                                        'v2', '0']
+    assert tokenize('ﬁle №5') == ['file', 'no5']
+    assert tokenize(' -- ') == []
+
+
+def test_terms_are_sorted_by_code_point():
+    document = SearchIndexBuilder().to_document()
+    assert document['terms'] == []
+
+    builder = SearchIndexBuilder()
+    builder.add(0, {'title': 'zeta Ärger apple Zulu'})
+    terms = builder.to_document()['terms']
+    assert terms == sorted(terms) == ['apple', 'arger', 'zeta', 'zulu']
+
+
+def test_lookup_returns_field_masks_per_position():
+    index = index_of(ASSETS)
+
+    assert index.documents == len(ASSETS)
+    assert index.lookup('forest') == {
+        0: field_mask('title', 'tags'),
+        1: field_mask('description'),
+        2: field_mask('creator.name'),
+    }
+    assert index.lookup('cafe') == {2: field_mask('description')}
+    assert index.lookup('fores') == {}
+
+
+def test_prefix_lookup_merges_every_matching_term():
+    index = index_of(ASSETS)
+
+    assert index.lookup('fores', prefix=True) == {
+        0: field_mask('title', 'tags'),
+        1: field_mask('description'),
+        2: field_mask('title', 'creator.name'),
+    }
+    assert index.lookup('zzz', prefix=True) == {}
+
+
+def test_search_requires_every_token_and_ranks_by_field():
+    index = index_of(ASSETS)
+
+    # A title match outweighs a description or creator match; equal scores
+    # keep catalog order
+    assert index.search('forest', prefix=False) == [0, 1, 2]
+    # As a prefix, forest also matches the title "Forestry report"
+    assert index.search('forest') == [0, 2, 1]
+    assert index.search('forest night') == [1]
+    assert index.search('forest nothing') == []
+    assert index.search('CAFÉ') == [2]
+
+
+def test_removed_and_readded_documents_match_a_fresh_index():
+    builder = SearchIndexBuilder()
+    for asset in ASSETS:
+        builder.add(asset['id'], asset)
+    builder.positions = {'a': 0, 'b': 1, 'c': 2}
+    builder.to_document()
+
+    renamed = {**ASSETS[1], 'title': 'Harbour lights'}
+    builder.remove('b', ASSETS[1])
+    builder.add('b', renamed)
+    builder.remove('a', ASSETS[0])
+    builder.positions = {'b': 0, 'c': 1}
+
+    expected = SearchIndexBuilder()
+    expected.add(0, renamed)
+    expected.add(1, ASSETS[2])
+    assert builder.to_document() == expected.to_document()
+
+    # Same positions: cached posting lists are reused for untouched terms
+    retagged = {**ASSETS[2], 'tags': ['forest']}
+    builder.remove('c', ASSETS[2])
+    builder.add('c', retagged)
+    builder.positions = {'b': 0, 'c': 1}
+
+    expected = SearchIndexBuilder()
+    expected.add(0, renamed)
+    expected.add(1, retagged)
+    assert builder.to_document() == expected.to_document()
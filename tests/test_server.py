@@ -0,0 +1,44 @@
+"""
+Tests for the local query server's in-memory index.
+"""
+
+import pytest
+
+from ual.server import CatalogQueryIndex, QueryError
+
+SIZES = [3, 1, 3, 2, 3, 1]
+
+
+@pytest.fixture
+def index() -> CatalogQueryIndex:
+    assets = [
+        {'id': f"asset-{number}", 'type': 'image' if number % 2 else 'video',
+         'tags': ['even'] if number % 2 == 0 else [], '_total_size': size}
+        for number, size in enumerate(SIZES)
+    ]
+    return CatalogQueryIndex({'assets': assets}, 'test')
+
+
+def ids(page) -> list:
+    return [asset['id'] for asset in page['assets']]
+
+
+def test_equal_keys_stay_in_id_order_in_both_directions(index):
+    assert ids(index.query({'sort': ['size']})) == [
+        'asset-1', 'asset-5', 'asset-3', 'asset-0', 'asset-2', 'asset-4']
+    assert ids(index.query({'sort': ['-size']})) == [
+        'asset-0', 'asset-2', 'asset-4', 'asset-3', 'asset-1', 'asset-5']
+
+
+@pytest.mark.parametrize('params', [{'type': ['image']}, {'tag': ['even'], 'type': ['video']}])
+def test_filtered_descending_sorts_keep_id_order_for_ties(index, params):
+    expected = [asset_id for asset_id in ids(index.query({'sort': ['-size']}))
+                if asset_id in ids(index.query(params))]
+
+    assert ids(index.query({**params, 'sort': ['-size']})) == expected
+
+
+@pytest.mark.parametrize('sort', ['--size', 'nope', '-'])
+def test_unknown_sort_keys_are_rejected(index, sort):
+    with pytest.raises(QueryError):
+        index.query({'sort': [sort]})
@@ -0,0 +1,136 @@
+"""
+Tests for the SQLite catalog export: upserts, deletes and full-text rows.
+"""
+
+import copy
+import sqlite3
+from typing import Any, Dict, List
+
+import pytest
+
+from ual.sqlite_catalog import write_sqlite_catalog
+
+
+def record(asset_id: str, title: str, tags: List[str]) -> Dict[str, Any]:
+    return {
+        'id': asset_id,
+        'type': 'image',
+        'category': 'nature',
+        'title': title,
+        'tags': tags,
+        'license': {'type': 'CC0'},
+        'creator': {'name': 'Ana'},
+        'formats': [{'filename': f"{asset_id}.png", 'format': 'png', 'size': 10,
+                     'checksum': {'sha256': '0' * 64}}],
+        '_path': f"images/nature/{asset_id}",
+        '_last_modified': '2024-01-01T00:00:00Z',
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / 'catalog.sqlite'
+
+
+def query(db_path, sql: str, *params: Any) -> List[tuple]:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def fts_ids(db_path, match: str) -> List[str]:
+    return sorted(row[0] for row in query(
+        db_path, 'SELECT a.id FROM assets_fts f JOIN assets a ON a.pk = f.rowid '
+                 'WHERE assets_fts MATCH ?', match))
+
+
+def test_first_export_inserts_every_asset(db_path):
+    assets = [record('a', 'Forest dawn', ['forest']), record('b', 'City night', ['city'])]
+
+    counts = write_sqlite_catalog(assets, db_path, '2024-01-01T00:00:00Z')
+
+    assert counts == {'inserted': 2, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+    assert query(db_path, 'SELECT id, title FROM assets ORDER BY id') == [
+        ('a', 'Forest dawn'), ('b', 'City night')]
+    assert query(db_path, 'SELECT asset_id, tag FROM tags ORDER BY asset_id') == [
+        ('a', 'forest'), ('b', 'city')]
+    assert fts_ids(db_path, 'forest') == ['a']
+
+
+def test_reexport_updates_changed_assets_and_deletes_removed_ones(db_path):
+    assets = [record('a', 'Forest dawn', ['forest']), record('b', 'City night', ['city']),
+              record('c', 'Desert noon', ['desert'])]
+    write_sqlite_catalog(assets, db_path, 'first')
+
+    changed = copy.deepcopy(assets[0])
+    changed['title'] = 'Harbour dawn'
+    changed['tags'] = ['harbour']
+    counts = write_sqlite_catalog([changed, assets[1]], db_path, 'second')
+
+    assert counts == {'inserted': 0, 'updated': 1, 'unchanged': 1, 'deleted': 1}
+    assert query(db_path, 'SELECT id FROM assets ORDER BY id') == [('a',), ('b',)]
+    assert query(db_path, "SELECT tag FROM tags WHERE asset_id = 'a'") == [('harbour',)]
+    # The deleted asset's formats and tags go with it
+    assert query(db_path, "SELECT COUNT(*) FROM formats WHERE asset_id = 'c'") == [(0,)]
+    assert query(db_path, "SELECT COUNT(*) FROM tags WHERE asset_id = 'c'") == [(0,)]
+    # Full-text rows follow their asset's pk
+    assert fts_ids(db_path, 'harbour') == ['a']
+    assert fts_ids(db_path, 'forest') == []
+    assert fts_ids(db_path, 'desert') == []
+    assert query(db_path, 'SELECT COUNT(*) FROM assets_fts') == [(2,)]
+    assert query(db_path, "SELECT value FROM meta WHERE key = 'generated'") == [('second',)]
+
+
+def test_metadata_mtime_alone_refreshes_last_modified(db_path):
+    asset = record('a', 'Forest dawn', ['forest'])
+    write_sqlite_catalog([asset], db_path, 'first')
+
+    touched = {**asset, '_last_modified': '2025-06-01T00:00:00Z'}
+    counts = write_sqlite_catalog([touched], db_path, 'second')
+
+    assert counts == {'inserted': 0, 'updated': 1, 'unchanged': 0, 'deleted': 0}
+    assert query(db_path, 'SELECT last_modified FROM assets') == [('2025-06-01T00:00:00Z',)]
+
+
+def test_full_text_rows_survive_vacuum(db_path):
+    assets = [record(asset_id, f"{asset_id} title", [asset_id]) for asset_id in 'abcde']
+    write_sqlite_catalog(assets, db_path, 'first')
+    # Leave gaps in the key sequence for VACUUM to close up
+    write_sqlite_catalog([assets[1], assets[3]], db_path, 'second')
+
+    conn = sqlite3.connect(str(db_path))
+    conn.execute('VACUUM')
+    conn.close()
+
+    assert fts_ids(db_path, 'b') == ['b']
+    assert fts_ids(db_path, 'd') == ['d']
+    assert write_sqlite_catalog(assets[1:4], db_path, 'third')['inserted'] == 1
+    assert fts_ids(db_path, 'c') == ['c']
+    assert fts_ids(db_path, 'd') == ['d']
+
+
+def test_duplicate_and_missing_ids_are_skipped(db_path):
+    assets = [record('a', 'First', []), record('a', 'Second', []), {'title': 'No id'}]
+
+    counts = write_sqlite_catalog(assets, db_path, 'first')
+
+    assert counts['inserted'] == 1
+    assert query(db_path, 'SELECT title FROM assets') == [('First',)]
+
+
+def test_database_with_an_old_schema_is_rebuilt(db_path):
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(
+        "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+        "INSERT INTO meta VALUES ('schema_version', '2');"
+        "CREATE TABLE assets (id TEXT PRIMARY KEY, stale TEXT);"
+    )
+    conn.commit()
+    conn.close()
+
+    counts = write_sqlite_catalog([record('a', 'Forest dawn', ['forest'])], db_path, 'first')
+
+    assert counts['inserted'] == 1
+    assert fts_ids(db_path, 'forest') == ['a']
@@ -0,0 +1,20 @@
+"""
+Tests for asset validation rules.
+"""
+
+import shutil
+from pathlib import Path
+
+from ual.validation import AssetValidator
+
+LOGO = (Path(__file__).resolve().parent.parent / 'assets' / 'images' / 'branding'
+        / 'rey-it-solutions-logo-001')
+
+
+def test_vector_images_skip_the_raster_checks(tmp_path):
+    asset = tmp_path / LOGO.name
+    shutil.copytree(LOGO, asset)
+
+    result = AssetValidator().validate_asset(asset)
+
+    assert result.errors == ()